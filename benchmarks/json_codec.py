@@ -0,0 +1,106 @@
+"""Compares decode and encode throughput of the available JSON codecs on daemon messages.
+
+Usage: python benchmarks/json_codec.py [RECORDED_MESSAGES]
+
+RECORDED_MESSAGES is a file with one raw daemon message per line. Without it, messages shaped like the ones the
+collectors receive are generated.
+"""
+import json
+import os
+import random
+import sys
+from collections import defaultdict
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitor.codec import CODECS
+
+MIN_DURATION = 1.0
+
+
+def random_hash() -> str:
+    return "0x" + os.urandom(32).hex()
+
+
+def message(command: str, data: dict) -> str:
+    return json.dumps(
+        {
+            "command": command,
+            "ack": False,
+            "data": data,
+            "request_id": os.urandom(32).hex(),
+            "destination": "wallet_ui",
+            "origin": "chia_farmer",
+        },
+        sort_keys=True)
+
+
+def generate_messages():
+    farming_info = message(
+        "new_farming_info", {
+            "farming_info": {
+                "challenge_hash": random_hash(),
+                "signage_point": random_hash(),
+                "passed_filter": random.randint(0, 20),
+                "proofs": 0,
+                "total_plots": 5000,
+                "timestamp": 1700000000
+            }
+        })
+    signage_point = message(
+        "new_signage_point", {
+            "signage_point": {
+                "challenge_hash": random_hash(),
+                "challenge_chain_sp": random_hash(),
+                "reward_chain_sp": random_hash(),
+                "difficulty": 2000,
+                "sub_slot_iters": 147849216,
+                "signage_point_index": random.randint(0, 63)
+            }
+        })
+    plots = [{
+        "filename": f"/mnt/disk{i // 100}/plot-k32-{os.urandom(8).hex()}.plot",
+        "size": 32,
+        "plot_id": random_hash(),
+        "pool_public_key": None,
+        "pool_contract_puzzle_hash": random_hash(),
+        "plot_public_key": "0x" + os.urandom(48).hex(),
+        "file_size": 108837910000 + i,
+        "time_modified": 1700000000.0 + i
+    } for i in range(5000)]
+    harvesters = json.dumps({"harvesters": [{"connection": {"host": "192.168.1.10"}, "plots": plots}], "success": True})
+    return {"farming_info": [farming_info], "signage_point": [signage_point], "get_harvesters": [harvesters]}
+
+
+def load_messages(path: str):
+    messages = defaultdict(list)
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                messages[json.loads(line).get("command", "response")].append(line)
+    return messages
+
+
+def throughput(function, items) -> float:
+    count = 0
+    start = perf_counter()
+    while perf_counter() - start < MIN_DURATION:
+        for item in items:
+            function(item)
+        count += len(items)
+    return count / (perf_counter() - start)
+
+
+def main() -> None:
+    messages = load_messages(sys.argv[1]) if len(sys.argv) > 1 else generate_messages()
+    for kind, raw_messages in messages.items():
+        decoded = [json.loads(raw) for raw in raw_messages]
+        for name, (loads, dumps) in CODECS.items():
+            decode = throughput(loads, raw_messages)
+            encode = throughput(dumps, decoded)
+            print(f"{kind:>16} {name:>8}: decode={decode:.0f} msg/s, encode={encode:.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
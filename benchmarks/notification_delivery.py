@@ -0,0 +1,97 @@
+"""Sends notifications through the delivery queue to a local HTTP stub and reports delivery latency.
+
+Usage: python benchmarks/notification_delivery.py [MESSAGES] [LATENCY_SECONDS] [FAILURE_RATE]
+       python benchmarks/notification_delivery.py serve [LATENCY_SECONDS] [FAILURE_RATE]
+
+The stub accepts Apprise's json:// notifications, answering each after LATENCY_SECONDS and failing the given share
+of them with a server error, so retries and backoff can be observed without a real notification service. With
+`serve`, only the stub is started and prints every notification it receives, so it can be configured as
+`json://127.0.0.1:8931` for the `status_service_url` or `alert_service_url` of a running monitor.
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+
+from aiohttp import web
+from apprise import Apprise, AppriseAsset
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitor.delivery import DeliveryQueue
+
+STUB_PORT = 8931
+WORKERS = 4
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 0.1
+MAX_BACKOFF_SECONDS = 1.0
+
+
+async def start_stub(latency: float,
+                     failure_rate: float,
+                     delivered: dict,
+                     verbose: bool = False,
+                     failures: int = 0) -> web.AppRunner:
+    """Starts the stub, which records the time each notification was delivered by its title.
+
+    The first `failures` notifications always fail, so tests can rely on a number of retries.
+    """
+    requests = 0
+
+    async def handle(request: web.Request) -> web.Response:
+        nonlocal requests
+        message = await request.json()
+        await asyncio.sleep(latency)
+        requests += 1
+        if requests <= failures or random.random() < failure_rate:
+            return web.Response(status=500)
+        delivered[message["title"]] = time.monotonic()
+        if verbose:
+            print(f"{message['title']}\n{message['message']}\n")
+        return web.Response(text="OK")
+
+    app = web.Application()
+    app.router.add_post("/", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", STUB_PORT).start()
+    return runner
+
+
+async def serve() -> None:
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+    failure_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0
+    await start_stub(latency, failure_rate, {}, verbose=True)
+    print(f"Listening on json://127.0.0.1:{STUB_PORT}")
+    await asyncio.Event().wait()
+
+
+async def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    failure_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0.1
+    delivered = {}
+    runner = await start_stub(latency, failure_rate, delivered)
+    apobj = Apprise(asset=AppriseAsset(async_mode=True))
+    apobj.add(f"json://127.0.0.1:{STUB_PORT}")
+    delivery = DeliveryQueue({"stub": apobj}, WORKERS, MAX_RETRIES, BACKOFF_SECONDS, MAX_BACKOFF_SECONDS, 0)
+    delivery.start()
+    submitted = {}
+    start = time.monotonic()
+    for i in range(count):
+        submitted[f"message {i}"] = time.monotonic()
+        delivery.submit("stub", f"message {i}", "body")
+    while len(delivered) < count and time.monotonic() - start < 60:
+        await asyncio.sleep(0.01)
+    duration = time.monotonic() - start
+    latencies = sorted(delivered[title] - submitted[title] for title in delivered)
+    print(f"delivered {len(delivered)}/{count} in {duration:.2f}s ({len(delivered) / duration:.0f} msg/s)")
+    if latencies:
+        print(f"latency p50={latencies[len(latencies) // 2]:.3f}s, max={latencies[-1]:.3f}s")
+    await delivery.stop()
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve() if sys.argv[1:2] == ["serve"] else main())
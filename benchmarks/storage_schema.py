@@ -0,0 +1,111 @@
+"""Compares DB size and query times of the legacy text schema with the compact schema.
+
+Usage: python benchmarks/storage_schema.py [ROW_COUNT]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from time import perf_counter
+
+LEGACY_SCHEMA = """
+CREATE TABLE signage_point_events (id INTEGER PRIMARY KEY, ts DATETIME NOT NULL, challenge_hash VARCHAR(66),
+                                   signage_point VARCHAR(66), signage_point_index INTEGER);
+CREATE TABLE farming_info_events (id INTEGER PRIMARY KEY, ts DATETIME NOT NULL, challenge_hash VARCHAR(66),
+                                  signage_point VARCHAR(66), passed_filter INTEGER, proofs INTEGER, total_plots INTEGER);
+"""
+
+COMPACT_SCHEMA = """
+CREATE TABLE signage_point_events (id INTEGER PRIMARY KEY, ts BIGINT NOT NULL, challenge_hash BLOB,
+                                   signage_point BLOB, signage_point_index INTEGER);
+CREATE TABLE farming_info_events (id INTEGER PRIMARY KEY, ts BIGINT NOT NULL, challenge_hash BLOB,
+                                  signage_point BLOB, passed_filter INTEGER, proofs INTEGER, total_plots INTEGER);
+"""
+
+INDEXES = """
+CREATE INDEX ix_signage_point_events_ts ON signage_point_events (ts);
+CREATE INDEX ix_signage_point_events_challenge_hash ON signage_point_events (challenge_hash);
+CREATE INDEX ix_signage_point_events_signage_point ON signage_point_events (signage_point);
+CREATE INDEX ix_farming_info_events_ts ON farming_info_events (ts);
+CREATE INDEX ix_farming_info_events_challenge_hash ON farming_info_events (challenge_hash);
+CREATE INDEX ix_farming_info_events_signage_point ON farming_info_events (signage_point);
+"""
+
+
+def legacy_ts(ts: datetime):
+    return str(ts)
+
+
+def compact_ts(ts: datetime):
+    return round(ts.timestamp() * 1000)
+
+
+def legacy_hash(value: bytes):
+    return "0x" + value.hex()
+
+
+def compact_hash(value: bytes):
+    return value
+
+
+def create_db(path: str, schema: str, rows, to_ts, to_hash) -> None:
+    db = sqlite3.connect(path)
+    db.executescript(schema + INDEXES)
+    db.executemany(
+        "INSERT INTO signage_point_events (ts, challenge_hash, signage_point, signage_point_index) VALUES (?, ?, ?, ?)",
+        [(to_ts(ts), to_hash(challenge), to_hash(sp), index) for ts, challenge, sp, index, _ in rows])
+    db.executemany(
+        "INSERT INTO farming_info_events (ts, challenge_hash, signage_point, passed_filter, proofs, total_plots) "
+        "VALUES (?, ?, ?, ?, 0, 5000)", [(to_ts(ts + timedelta(seconds=1)), to_hash(challenge), to_hash(sp), passed_filter)
+                                         for ts, challenge, sp, _, passed_filter in rows])
+    db.commit()
+    db.execute("VACUUM")
+    db.close()
+
+
+def time_query(db: sqlite3.Connection, query: str, params_list) -> float:
+    start = perf_counter()
+    for params in params_list:
+        db.execute(query, params).fetchall()
+    return (perf_counter() - start) / len(params_list) * 1000
+
+
+def benchmark(path: str, rows, to_ts, to_hash) -> dict:
+    db = sqlite3.connect(path)
+    now = rows[-1][0]
+    sample = random.sample(rows, 1000)
+    results = {
+        "size_mb":
+        os.path.getsize(path) / 2**20,
+        "sp_ts_by_hash_ms":
+        time_query(db, "SELECT ts FROM signage_point_events WHERE signage_point = ?",
+                   [(to_hash(row[2]), ) for row in sample]),
+        "sp_count_1h_ms":
+        time_query(db, "SELECT COUNT(ts) FROM signage_point_events WHERE ts >= ?",
+                   [(to_ts(now - timedelta(hours=1)), )] * 100),
+        "passed_filter_24h_ms":
+        time_query(db, "SELECT SUM(passed_filter) FROM farming_info_events WHERE ts >= ?",
+                   [(to_ts(now - timedelta(hours=24)), )] * 20),
+    }
+    db.close()
+    return results
+
+
+def main() -> None:
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    start = datetime.now() - timedelta(seconds=9 * row_count)
+    rows = [(start + timedelta(seconds=9 * i), os.urandom(32), os.urandom(32), i % 64, random.randint(0, 20))
+            for i in range(row_count)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, schema, to_ts, to_hash in (("legacy", LEGACY_SCHEMA, legacy_ts, legacy_hash), ("compact", COMPACT_SCHEMA,
+                                                                                                 compact_ts, compact_hash)):
+            path = os.path.join(tmp_dir, f"{name}.sqlite")
+            create_db(path, schema, rows, to_ts, to_hash)
+            results = benchmark(path, rows, to_ts, to_hash)
+            print(f"{name:>8}: " + ", ".join(f"{key}={value:.3f}" for key, value in results.items()))
+
+
+if __name__ == "__main__":
+    main()
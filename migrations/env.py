@@ -4,6 +4,7 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 
 from alembic import context
+from monitor.database import aggregates, blocks, cursors, harvesters, inventory, partials
 from monitor.database.events import GoldEvent
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,61 @@
+"""Add farming_rollups_1m and farming_rollups_1h tables
+
+Revision ID: 4e0c7d1a92f3
+Revises: b81f4c2e9a07
+Create Date: 2026-10-18 18:02:47.530914
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '4e0c7d1a92f3'
+down_revision = 'b81f4c2e9a07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('farming_rollups_1m',
+    sa.Column('bucket', sa.DateTime(), nullable=False),
+    sa.Column('signage_points', sa.Integer(), nullable=False),
+    sa.Column('challenges', sa.Integer(), nullable=False),
+    sa.Column('passed_filter', sa.Integer(), nullable=False),
+    sa.Column('passed_filter_min', sa.Integer(), nullable=True),
+    sa.Column('passed_filter_max', sa.Integer(), nullable=True),
+    sa.Column('passed_filter_p50', sa.Integer(), nullable=True),
+    sa.Column('passed_filter_p95', sa.Integer(), nullable=True),
+    sa.Column('proofs', sa.Integer(), nullable=False),
+    sa.Column('proofs_max', sa.Integer(), nullable=True),
+    sa.Column('lookup_time_count', sa.Integer(), nullable=False),
+    sa.Column('lookup_time_sum', sa.Float(), nullable=True),
+    sa.Column('lookup_time_min', sa.Float(), nullable=True),
+    sa.Column('lookup_time_max', sa.Float(), nullable=True),
+    sa.Column('lookup_time_p50', sa.Float(), nullable=True),
+    sa.Column('lookup_time_p95', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('bucket', name=op.f('pk_farming_rollups_1m'))
+    )
+    op.create_table('farming_rollups_1h',
+    sa.Column('bucket', sa.DateTime(), nullable=False),
+    sa.Column('signage_points', sa.Integer(), nullable=False),
+    sa.Column('challenges', sa.Integer(), nullable=False),
+    sa.Column('passed_filter', sa.Integer(), nullable=False),
+    sa.Column('passed_filter_min', sa.Integer(), nullable=True),
+    sa.Column('passed_filter_max', sa.Integer(), nullable=True),
+    sa.Column('passed_filter_p50', sa.Integer(), nullable=True),
+    sa.Column('passed_filter_p95', sa.Integer(), nullable=True),
+    sa.Column('proofs', sa.Integer(), nullable=False),
+    sa.Column('proofs_max', sa.Integer(), nullable=True),
+    sa.Column('lookup_time_count', sa.Integer(), nullable=False),
+    sa.Column('lookup_time_sum', sa.Float(), nullable=True),
+    sa.Column('lookup_time_min', sa.Float(), nullable=True),
+    sa.Column('lookup_time_max', sa.Float(), nullable=True),
+    sa.Column('lookup_time_p50', sa.Float(), nullable=True),
+    sa.Column('lookup_time_p95', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('bucket', name=op.f('pk_farming_rollups_1h'))
+    )
+
+
+def downgrade():
+    op.drop_table('farming_rollups_1h')
+    op.drop_table('farming_rollups_1m')
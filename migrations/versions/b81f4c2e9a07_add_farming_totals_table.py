@@ -0,0 +1,33 @@
+"""Add farming_totals table
+
+Revision ID: b81f4c2e9a07
+Revises: da29916875ec
+Create Date: 2026-10-18 17:40:12.118204
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'b81f4c2e9a07'
+down_revision = 'da29916875ec'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('farming_totals',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('challenges', sa.Integer(), nullable=False),
+    sa.Column('signage_points', sa.Integer(), nullable=False),
+    sa.Column('passed_filter', sa.Integer(), nullable=False),
+    sa.Column('proofs', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_farming_totals'))
+    )
+    op.execute("INSERT INTO farming_totals (id, challenges, passed_filter, proofs, signage_points) "
+               "SELECT 1, COUNT(id), COALESCE(SUM(passed_filter), 0), COALESCE(SUM(proofs), 0), "
+               "(SELECT COUNT(id) FROM signage_point_events) FROM farming_info_events")
+
+
+def downgrade():
+    op.drop_table('farming_totals')
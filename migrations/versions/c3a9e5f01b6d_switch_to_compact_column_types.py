@@ -0,0 +1,119 @@
+"""Switch to compact column types for timestamps, hashes and big integers
+
+Timestamps are stored as epoch milliseconds, hashes as 32 raw bytes and heights and balances as integers.
+Existing rows are converted in chunks while copying every table into a new one with the compact schema.
+
+Revision ID: c3a9e5f01b6d
+Revises: 4e0c7d1a92f3
+Create Date: 2026-10-18 18:31:05.207731
+
+"""
+from datetime import datetime
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'c3a9e5f01b6d'
+down_revision = '4e0c7d1a92f3'
+branch_labels = None
+depends_on = None
+
+CHUNK_SIZE = 50000
+
+
+def datetime_to_millis(value):
+    return round(value.timestamp() * 1000) if value is not None else None
+
+
+def millis_to_datetime(value):
+    return datetime.fromtimestamp(value / 1000) if value is not None else None
+
+
+def hex_to_bytes(value):
+    return bytes.fromhex(value[2:] if value.startswith("0x") else value) if value is not None else None
+
+
+def bytes_to_hex(value):
+    return ("0x" + value.hex() if value else "") if value is not None else None
+
+
+def str_to_int(value):
+    return int(value) if value is not None else None
+
+
+def int_to_str(value):
+    return str(value) if value is not None else None
+
+
+TIMESTAMP = (sa.BigInteger(), datetime_to_millis, sa.DateTime(), millis_to_datetime)
+HASH = (sa.LargeBinary(32), hex_to_bytes, sa.String(66), bytes_to_hex)
+INTEGER = (sa.Integer(), str_to_int, sa.String(32), int_to_str)
+BIG_INTEGER = (sa.BigInteger(), str_to_int, sa.String(32), int_to_str)
+
+# table -> (chunk key, {column: (compact type, upgrade converter, previous type, downgrade converter)})
+TABLES = {
+    'harvester_events': ('id', {'ts': TIMESTAMP}),
+    'connection_events': ('id', {'ts': TIMESTAMP}),
+    'blockchain_state_events': ('id', {'ts': TIMESTAMP, 'peak_height': INTEGER}),
+    'wallet_balance_events': ('id', {'ts': TIMESTAMP, 'confirmed': BIG_INTEGER, 'farmed': BIG_INTEGER}),
+    'signage_point_events': ('id', {'ts': TIMESTAMP, 'challenge_hash': HASH, 'signage_point': HASH}),
+    'farming_info_events': ('id', {'ts': TIMESTAMP, 'challenge_hash': HASH, 'signage_point': HASH}),
+    'pool_state_events': ('id', {'ts': TIMESTAMP, 'p2_singleton_puzzle_hash': HASH}),
+    'price_events': ('id', {'ts': TIMESTAMP}),
+    'farming_rollups_1m': ('bucket', {'bucket': TIMESTAMP}),
+    'farming_rollups_1h': ('bucket', {'bucket': TIMESTAMP}),
+}
+
+
+def convert_table(table_name, key, columns, downgrade=False):
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    old_table = sa.Table(table_name, sa.MetaData(), autoload_with=bind)
+    indexes = inspector.get_indexes(table_name)
+    type_index, converter_index = (2, 3) if downgrade else (0, 1)
+
+    new_table_name = f"_{table_name}_compact"
+    new_columns = []
+    for column in old_table.columns:
+        column_type = columns[column.name][type_index] if column.name in columns else column.type
+        new_columns.append(sa.Column(column.name, column_type, nullable=column.nullable))
+    new_table = op.create_table(new_table_name, *new_columns,
+                                sa.PrimaryKeyConstraint(*old_table.primary_key.columns.keys(), name=f"pk_{table_name}"))
+
+    key_column = old_table.c[key]
+    last_key = None
+    while True:
+        query = sa.select(old_table).order_by(key_column).limit(CHUNK_SIZE)
+        if last_key is not None:
+            query = query.where(key_column > last_key)
+        rows = bind.execute(query).mappings().all()
+        if not rows:
+            break
+        last_key = rows[-1][key]
+        values = []
+        for row in rows:
+            row = dict(row)
+            for name, conversion in columns.items():
+                row[name] = conversion[converter_index](row[name])
+            values.append(row)
+        bind.execute(new_table.insert(), values)
+
+    op.drop_table(table_name)
+    op.rename_table(new_table_name, table_name)
+    for index in indexes:
+        op.create_index(index['name'], table_name, index['column_names'], unique=bool(index['unique']))
+
+
+def upgrade():
+    for table_name, (key, columns) in TABLES.items():
+        convert_table(table_name, key, columns)
+    with op.get_context().autocommit_block():
+        op.execute("VACUUM")
+
+
+def downgrade():
+    for table_name, (key, columns) in TABLES.items():
+        convert_table(table_name, key, columns, downgrade=True)
+    with op.get_context().autocommit_block():
+        op.execute("VACUUM")
@@ -3,7 +3,6 @@ import json
 import logging
 import sys
 from asyncio.queues import Queue
-from typing import Optional
 from pathlib import Path
 from typing import Any, Callable, Dict, Optional, Union
 
@@ -11,6 +10,7 @@ import colorlog
 import yaml
 import os
 
+from sqlalchemy.engine import Connection
 from sqlalchemy.exc import OperationalError
 
 from chia.util.streamable import dataclass_from_dict
@@ -25,11 +25,23 @@ def from_json_dict(json_dict: Dict) -> Any:
 setattr(BlockRecord, 'from_json_dict', from_json_dict)
 
 from monitor.collectors import RpcCollector, WsCollector
+from monitor.collectors.block_collector import BlockCollector
 from monitor.collectors.price_collector import PriceCollector
-from monitor.database import GoldEvent, session
+from monitor.database import session
+from monitor.database.inventory import load_plot_indexes
+from monitor.database.partials import load_pool_partials
+from monitor.database.rollups import RollupEngine
+from monitor.database.transactions import load_transaction_cursors
+from monitor.dispatcher import Dispatcher
 from monitor.exporter import GoldExporter
 from monitor.logger import GoldLogger
 from monitor.notifier import Notifier
+from monitor.partials import PoolPartials
+from monitor.persister import GoldPersister
+from monitor.plots import PlotIndex
+from monitor.signage_points import SignagePointIndex
+from monitor.state import GoldState, get_harvester_ttl
+from monitor.transactions import TransactionCursor
 
 
 def config_path_for_filename(root_path: Path, filename: Union[str, Path]) -> Path:
@@ -77,57 +89,117 @@ def initilize_logging():
     logger.setLevel(logging.INFO)
 
 
-def persist_event(event: GoldEvent):
-    with session.begin() as db_session:
-        db_session.add(event)
-        db_session.commit()
-
-
-async def aggregator(exporter: GoldExporter, notifier: Optional[Notifier], rpc_refresh_interval: int,
-                     price_refresh_interval: int) -> None:
+class CollectorConfig:
+    """Settings of the collectors, read from the config.json at once, so a missing key is reported on startup."""
+    rpc_refresh_interval: int
+    rpc_method_config: Dict[str, Dict]
+    wallet_max_concurrent_requests: int
+    wallet_list_refresh_seconds: int
+    price_refresh_interval: int
+    enable_block_collector: bool
+    block_start_height: int
+    block_batch_size: int
+    block_max_concurrent_requests: int
+    block_refresh_interval: int
+
+    def __init__(self, config: Dict) -> None:
+        self.rpc_refresh_interval = config["rpc_collector"]["refresh_interval_seconds"]
+        self.rpc_method_config = config["rpc_collector"]["methods"]
+        self.wallet_max_concurrent_requests = config["rpc_collector"]["wallet"]["max_concurrent_requests"]
+        self.wallet_list_refresh_seconds = config["rpc_collector"]["wallet"]["wallet_list_refresh_seconds"]
+        self.price_refresh_interval = config["price_collector"]["refresh_interval_seconds"]
+        self.enable_block_collector = config["block_collector"]["enable"]
+        self.block_start_height = config["block_collector"]["start_height"]
+        self.block_batch_size = config["block_collector"]["batch_size"]
+        self.block_max_concurrent_requests = config["block_collector"]["max_concurrent_requests"]
+        self.block_refresh_interval = config["block_collector"]["refresh_interval_seconds"]
+
+
+class CollectorHistory:
+    """What the collectors continue from, loaded from the DB on startup."""
+    plot_indexes: Dict[str, PlotIndex]
+    pool_partials: Dict[str, PoolPartials]
+    transaction_cursors: Dict[int, TransactionCursor]
+
+    def __init__(self, connection: Connection) -> None:
+        self.plot_indexes = load_plot_indexes(connection)
+        self.pool_partials = load_pool_partials(connection)
+        self.transaction_cursors = load_transaction_cursors(connection)
+
+
+async def aggregator(exporter: GoldExporter, persister: GoldPersister, rollup_engine: RollupEngine, state: GoldState,
+                     signage_points: SignagePointIndex, notifier: Optional[Notifier], sink_config: Dict[str, Dict],
+                     collector_config: CollectorConfig, history: CollectorHistory) -> None:
     rpc_collector = None
     ws_collector = None
+    block_collector = None
     event_queue = Queue()
-    logger = GoldLogger()
+    wallets_changed = asyncio.Event()
+    GoldExporter.event_queue_depth_gauge.set_function(event_queue.qsize)
+    logger = GoldLogger(signage_points)
+    dispatcher = Dispatcher(sink_config)
+    dispatcher.add_sink("exporter", exporter.process_event)
+    dispatcher.add_sink("logger", logger.process_event)
+    dispatcher.add_sink("persister", persister.process_event)
+    dispatcher.add_sink("notifier", notifier.process_event if notifier is not None else state.process_event)
+    await exporter.start()
 
     try:
         logging.info("🔌 Creating RPC Collector...")
-        rpc_collector = await RpcCollector.create(DEFAULT_ROOT_PATH, gold_config, event_queue, rpc_refresh_interval)
+        rpc_collector = await RpcCollector.create(DEFAULT_ROOT_PATH, gold_config, event_queue,
+                                                  collector_config.rpc_refresh_interval, collector_config.rpc_method_config,
+                                                  history.plot_indexes, wallets_changed,
+                                                  collector_config.wallet_max_concurrent_requests,
+                                                  collector_config.wallet_list_refresh_seconds, history.pool_partials,
+                                                  history.transaction_cursors)
     except Exception as e:
         logging.warning(f"Failed to create RPC collector. Continuing without it. {type(e).__name__}: {e}")
 
     try:
         logging.info("🔌 Creating WebSocket Collector...")
-        ws_collector = await WsCollector.create(DEFAULT_ROOT_PATH, gold_config, event_queue)
+        ws_collector = await WsCollector.create(DEFAULT_ROOT_PATH, gold_config, event_queue, wallets_changed)
     except Exception as e:
         logging.warning(f"Failed to create WebSocket collector. Continuing without it. {type(e).__name__}: {e}")
 
     try:
         logging.info("🔌 Creating Price Collector...")
         price_collector = await PriceCollector.create(DEFAULT_ROOT_PATH, gold_config, event_queue,
-                                                      price_refresh_interval)
+                                                      collector_config.price_refresh_interval)
     except Exception as e:
         logging.warning(f"Failed to create Price collector. Continuing without it. {type(e).__name__}: {e}")
 
+    if collector_config.enable_block_collector:
+        try:
+            logging.info("🔌 Creating Block Collector...")
+            block_collector = await BlockCollector.create(DEFAULT_ROOT_PATH, gold_config, event_queue,
+                                                          collector_config.block_start_height,
+                                                          collector_config.block_batch_size,
+                                                          collector_config.block_max_concurrent_requests,
+                                                          collector_config.block_refresh_interval)
+        except Exception as e:
+            logging.warning(f"Failed to create Block collector. Continuing without it. {type(e).__name__}: {e}")
+
     if rpc_collector and ws_collector:
         logging.info("🚀 Starting monitoring loop!")
         rpc_task = asyncio.create_task(rpc_collector.task())
         ws_task = asyncio.create_task(ws_collector.task())
+        persister.start()
+        dispatcher.start()
+        rollup_task = asyncio.create_task(rollup_engine.task())
+        event_loop_lag_task = asyncio.create_task(exporter.event_loop_lag_task())
         if notifier is not None:
             notifier.start()
         if price_collector is not None:
             asyncio.create_task(price_collector.task())
+        if block_collector is not None:
+            block_task = asyncio.create_task(block_collector.task())
         while True:
             try:
                 event = await event_queue.get()
-                exporter.process_event(event)
-                logger.process_event(event)
-                persist_event(event)
-
-            except OperationalError:
-                logging.exception(
-                    f"Failed to persist event to DB. Please initialize DB using: 'pipenv run alembic upgrade head'")
-                break
+                signage_points.process_event(event)
+                await dispatcher.dispatch(event)
+                if persister.failed:
+                    break
 
             except asyncio.CancelledError:
                 break
@@ -142,8 +214,18 @@ async def aggregator(exporter: GoldExporter, notifier: Optional[Notifier], rpc_r
     if ws_collector:
         ws_task.cancel()
         await ws_collector.close()
+    if block_collector:
+        if rpc_collector and ws_collector:
+            block_task.cancel()
+        await block_collector.close()
+    if rpc_collector and ws_collector:
+        rollup_task.cancel()
+        event_loop_lag_task.cancel()
+        await dispatcher.close()
+    persister.stop()
     if notifier:
-        notifier.stop()
+        await notifier.stop()
+    await exporter.close()
 
 
 def read_config():
@@ -164,29 +246,76 @@ if __name__ == "__main__":
 
     try:
         exporter_port = config["exporter_port"]
-        rpc_refresh_interval = config["rpc_collector"]["refresh_interval_seconds"]
-        price_refresh_interval = enable_notifications = config["price_collector"]["refresh_interval_seconds"]
+        exporter_render_interval = config["exporter_render_interval_seconds"]
+        collector_config = CollectorConfig(config)
         enable_notifications = config["notifications"]["enable"]
-        notifications_refresh_interval = config["notifications"]["refresh_interval_seconds"]
+        notifications_retry_interval = config["notifications"]["retry_interval_seconds"]
+        delivery_workers = config["notifications"]["delivery"]["workers"]
+        delivery_max_retries = config["notifications"]["delivery"]["max_retries"]
+        delivery_backoff_seconds = config["notifications"]["delivery"]["backoff_seconds"]
+        delivery_max_backoff_seconds = config["notifications"]["delivery"]["max_backoff_seconds"]
+        delivery_rate_limit_seconds = config["notifications"]["delivery"]["rate_limit_seconds"]
+        notification_rules = config["notifications"]["rules"]
         status_url = config["notifications"]["status_service_url"]
         alert_url = config["notifications"]["alert_service_url"]
         status_interval_minutes = config["notifications"]["status_interval_minutes"]
+        daily_summary = config["notifications"]["daily_summary"]
+        weekly_summary = config["notifications"]["weekly_summary"]
         lost_plots_alert_threshold = config["notifications"]["lost_plots_alert_threshold"]
         disable_proof_found_alert = config["notifications"]["disable_proof_found_alert"]
+        persister_batch_size = config["persister"]["batch_size"]
+        persister_flush_interval_ms = config["persister"]["flush_interval_ms"]
+        raw_retention_days = config["history"]["raw_retention_days"]
+        rollup_1m_retention_days = config["history"]["rollup_1m_retention_days"]
+        rollup_refresh_interval = config["history"]["rollup_interval_seconds"]
+        sink_config = config["dispatcher"]
     except KeyError as ex:
         logging.error(
             f"Failed to validate config. Missing required key {ex}. Please compare the fields of your config.json with the config-example.json and fix all inconsistencies."
         )
         sys.exit(1)
 
-    exporter = GoldExporter(exporter_port)
+    signage_points = SignagePointIndex()
+    persister = GoldPersister(persister_batch_size, persister_flush_interval_ms)
+    try:
+        rollup_engine = RollupEngine(lambda: persister.flushed_ts, raw_retention_days, rollup_1m_retention_days,
+                                     rollup_refresh_interval)
+    except ValueError as ex:
+        logging.error(f"Failed to validate config. {ex}")
+        sys.exit(1)
+    state = GoldState(get_harvester_ttl(collector_config.rpc_method_config, collector_config.rpc_refresh_interval))
+    try:
+        with session() as db_session:
+            state.load(db_session)
+            history = CollectorHistory(db_session.connection())
+            GoldExporter.load(db_session)
+    except OperationalError:
+        logging.exception(f"Failed to load state from DB. Please initialize DB using: 'pipenv run alembic upgrade head'")
+        sys.exit(1)
+    exporter = GoldExporter(exporter_port, signage_points, exporter_render_interval)
     if enable_notifications:
-        notifier = Notifier(status_url, alert_url, status_interval_minutes, lost_plots_alert_threshold,
-                            disable_proof_found_alert, notifications_refresh_interval)
+        try:
+            notifier = Notifier(state, status_url, alert_url, status_interval_minutes, daily_summary, weekly_summary,
+                                lost_plots_alert_threshold, disable_proof_found_alert, notifications_retry_interval,
+                                delivery_workers, delivery_max_retries, delivery_backoff_seconds,
+                                delivery_max_backoff_seconds, delivery_rate_limit_seconds, notification_rules,
+                                signage_points)
+        except ValueError as ex:
+            logging.error(f"Failed to validate config. {ex}")
+            sys.exit(1)
     else:
         notifier = None
 
     try:
-        asyncio.run(aggregator(exporter, notifier, rpc_refresh_interval, price_refresh_interval))
+        asyncio.run(
+            aggregator(exporter,
+                       persister,
+                       rollup_engine,
+                       state,
+                       signage_points,
+                       notifier,
+                       sink_config=sink_config,
+                       collector_config=collector_config,
+                       history=history))
     except KeyboardInterrupt:
         logging.info("👋 Bye!")
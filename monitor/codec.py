@@ -0,0 +1,26 @@
+"""JSON codec used on the hot paths of the collectors.
+
+orjson is used if it is installed, otherwise the standard library. orjson decodes integers that don't fit into
+64 bits as floats, so it is only used for payloads whose integers are at most 64 bits wide: daemon messages, plot
+lists, wallet transactions and prices. The netspace and other space values can be wider and are decoded by the
+chia RPC clients with the standard library.
+"""
+import json
+from typing import Any, Callable, Dict, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def orjson_dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+
+CODECS: Dict[str, Tuple[Callable, Callable]] = {"json": (json.loads, json.dumps)}
+if orjson is not None:
+    CODECS["orjson"] = (orjson.loads, orjson_dumps)
+
+CODEC_NAME = "orjson" if orjson is not None else "json"
+loads, dumps = CODECS[CODEC_NAME]
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from asyncio import Queue
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Set
+
+from chia.consensus.block_rewards import calculate_base_farmer_reward, calculate_pool_reward
+from chia.rpc.farmer_rpc_client import FarmerRpcClient
+from chia.rpc.full_node_rpc_client import FullNodeRpcClient
+from chia.util.bech32m import decode_puzzle_hash
+from chia.util.ints import uint16, uint32
+from monitor.collectors.collector import Collector
+from monitor.database import engine
+from monitor.database.blocks import BLOCK_CURSOR, get_blocks_won, store_blocks
+from monitor.database.cursors import get_cursor
+from monitor.database.events import GoldEvent
+from monitor.exporter import GoldExporter
+
+# Blocks this close to the peak may still be reorged
+CONFIRMATION_DEPTH = 10
+REWARD_TARGETS_REFRESH_SECONDS = 3600
+
+
+def normalize_hash(value: str) -> str:
+    return value[2:].lower() if value.startswith("0x") else value.lower()
+
+
+class BlockCollector(Collector):
+    """Ingests the block records of the chain and flags the blocks won by this farmer.
+
+    Starting from the persisted cursor, height ranges are fetched concurrently until the collector caught up
+    with the peak, after which it follows the peak one range at a time.
+    """
+    full_node_client: FullNodeRpcClient
+    farmer_client: FarmerRpcClient
+    start_height: int
+    batch_size: int
+    max_concurrent_requests: int
+    refresh_interval_seconds: int
+    farmer_target: str
+    pool_target: str
+    reward_targets: Set[str]
+    blocks_won: int
+
+    @staticmethod
+    async def create(root_path: Path, net_config: Dict, event_queue: Queue[GoldEvent], start_height: int, batch_size: int,
+                     max_concurrent_requests: int, refresh_interval_seconds: int) -> BlockCollector:
+        self = BlockCollector()
+        self.log = logging.getLogger(__name__)
+        self.event_queue = event_queue
+        self.start_height = start_height
+        self.batch_size = batch_size
+        self.max_concurrent_requests = max_concurrent_requests
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.farmer_target = None
+        self.pool_target = None
+        self.reward_targets = set()
+        self.reward_targets_expiry = 0
+        self.full_node_client = None
+        self.farmer_client = None
+
+        hostname = net_config["self_hostname"]
+        try:
+            self.full_node_client = await FullNodeRpcClient.create(hostname, uint16(net_config["full_node"]["rpc_port"]),
+                                                                   root_path, net_config)
+            self.farmer_client = await FarmerRpcClient.create(hostname, uint16(net_config["farmer"]["rpc_port"]), root_path,
+                                                              net_config)
+            await self.update_reward_targets()
+        except Exception as e:
+            await self.close()
+            raise ConnectionError(f"Failed to connect to full node and farmer RPC endpoints. {type(e).__name__}: {e}")
+
+        with engine.connect() as connection:
+            self.cursor = get_cursor(connection, BLOCK_CURSOR)
+            self.blocks_won = get_blocks_won(connection)
+        if self.cursor is None:
+            self.cursor = start_height - 1
+        GoldExporter.blocks_won_gauge.set(self.blocks_won)
+        return self
+
+    async def update_reward_targets(self) -> None:
+        if time.monotonic() < self.reward_targets_expiry:
+            return
+        reward_targets = await self.farmer_client.get_reward_targets(False)
+        pool_state = await self.farmer_client.get_pool_state()
+        self.farmer_target = decode_puzzle_hash(reward_targets["farmer_target"]).hex()
+        self.pool_target = decode_puzzle_hash(reward_targets["pool_target"]).hex()
+        p2_singletons = {normalize_hash(pool["p2_singleton_puzzle_hash"]) for pool in pool_state["pool_state"]}
+        self.reward_targets = {self.farmer_target, self.pool_target} | p2_singletons
+        self.reward_targets_expiry = time.monotonic() + REWARD_TARGETS_REFRESH_SECONDS
+
+    def to_row(self, block_record: Dict) -> Dict:
+        """Converts a block record into a row, with the part of the block reward that is paid to this farm.
+
+        The farmer reward and fees go to the farmer puzzle hash. The pool reward only counts for plots whose pool
+        puzzle hash is the farm's own pool target, not for pool plots, where it is paid to the pool.
+        """
+        height = block_record["height"]
+        farmer_puzzle_hash = normalize_hash(block_record["farmer_puzzle_hash"])
+        pool_puzzle_hash = normalize_hash(block_record["pool_puzzle_hash"])
+        won = farmer_puzzle_hash in self.reward_targets or pool_puzzle_hash in self.reward_targets
+        reward = 0
+        if farmer_puzzle_hash == self.farmer_target:
+            reward += calculate_base_farmer_reward(uint32(height)) + (block_record.get("fees") or 0)
+        if pool_puzzle_hash == self.pool_target:
+            reward += calculate_pool_reward(uint32(height))
+        timestamp = block_record.get("timestamp")
+        return {
+            "height": height,
+            "ts": datetime.fromtimestamp(timestamp) if timestamp is not None else None,
+            "reward": reward,
+            "won": won,
+        }
+
+    async def get_blocks(self, start_height: int, end_height: int) -> List[Dict]:
+        block_records = await self.full_node_client.get_block_records(start_height, end_height)
+        if len(block_records) != end_height - start_height:
+            raise ValueError(f"Expected {end_height - start_height} block records, got {len(block_records)}")
+        return [self.to_row(block_record) for block_record in block_records]
+
+    async def get_peak_height(self) -> int:
+        state = await self.full_node_client.get_blockchain_state()
+        return state["peak"].height if state["peak"] is not None else 0
+
+    async def ingest(self, target_height: int) -> None:
+        """Fetches up to max_concurrent_requests ranges after the cursor and stores them."""
+        start_height = self.cursor + 1
+        ranges = []
+        for _ in range(self.max_concurrent_requests):
+            end_height = min(start_height + self.batch_size, target_height + 1)
+            if start_height >= end_height:
+                break
+            ranges.append((start_height, end_height))
+            start_height = end_height
+        results = await asyncio.gather(*[self.get_blocks(start, end) for start, end in ranges])
+        blocks = [block for result in results for block in result]
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, store_blocks, blocks, ranges[0][0], ranges[-1][1])
+        self.cursor = ranges[-1][1] - 1
+        for block in blocks:
+            if block["won"]:
+                self.blocks_won += 1
+                self.log.info(f"🏆 Won block at height {block['height']}")
+        GoldExporter.blocks_won_gauge.set(self.blocks_won)
+        GoldExporter.block_height_gauge.set(self.cursor)
+
+    async def task(self) -> None:
+        while True:
+            try:
+                await self.update_reward_targets()
+                target_height = await self.get_peak_height() - CONFIRMATION_DEPTH
+                if target_height - self.cursor > self.batch_size * self.max_concurrent_requests:
+                    self.log.info(f"Backfilling blocks from height {self.cursor + 1} to {target_height}...")
+                while self.cursor < target_height:
+                    await self.ingest(target_height)
+            except Exception as e:
+                self.log.warning(f"Error while collecting blocks. Trying again... {type(e).__name__}: {e}")
+            await asyncio.sleep(self.refresh_interval_seconds)
+
+    async def close(self) -> None:
+        for rpc_client in (self.full_node_client, self.farmer_client):
+            if rpc_client is not None:
+                rpc_client.close()
+                await rpc_client.await_closed()
@@ -8,6 +8,7 @@ from pathlib import Path
 from typing import Dict
 
 import aiohttp
+from monitor import codec
 from monitor.collectors.collector import Collector
 from monitor.database import GoldEvent
 from monitor.database.events import PriceEvent
@@ -32,7 +33,7 @@ class PriceCollector(Collector):
 
     async def get_current_prices(self) -> None:
         async with self.session.get(PRICE_API) as resp:
-            result = await resp.json()
+            result = await resp.json(loads=codec.loads)
             event = PriceEvent(
                 ts=datetime.now(),
                 usd_cents=int(result["chia"]["usd"] * 100),
@@ -3,12 +3,14 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import random
 import time
 from asyncio import Queue
 from datetime import datetime
 from pathlib import Path
-from typing import Callable, Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
 
+import aiohttp
 from chia.rpc.farmer_rpc_client import FarmerRpcClient
 from chia.rpc.full_node_rpc_client import FullNodeRpcClient
 from chia.rpc.harvester_rpc_client import HarvesterRpcClient
@@ -16,9 +18,18 @@ from chia.rpc.rpc_client import RpcClient
 from chia.rpc.wallet_rpc_client import WalletRpcClient
 from chia.server.outbound_message import NodeType
 from chia.util.ints import uint16
+from monitor import codec
 from monitor.collectors.collector import Collector
+from monitor.collectors.streaming import STREAMING_SUPPORTED, parse_harvester_plots
 from monitor.database.events import (BlockchainStateEvent, GoldEvent, ConnectionsEvent,
-                                     HarvesterPlotsEvent, PoolStateEvent, WalletBalanceEvent)
+                                     HarvesterPlotsEvent, PoolStateEvent, WalletBalanceEvent, WalletTransactionEvent)
+from monitor.exporter import GoldExporter
+from monitor.partials import PoolPartials
+from monitor.plots import DuplicatePlotIndex, PlotIndex
+from monitor.transactions import TransactionCursor
+
+PLOT_PAGE_SIZE = 1000
+TRANSACTION_PAGE_SIZE = 100
 
 
 class RpcCollector(Collector):
@@ -31,10 +42,23 @@ class RpcCollector(Collector):
     hostname: str
     tasks: List[Callable]
     refresh_interval_seconds: int
+    method_config: Dict[str, Dict]
+    plot_indexes: Dict[str, PlotIndex]
+    duplicate_plots: DuplicatePlotIndex
+    harvester_summaries_supported: bool
+    wallets: Optional[List[Dict]]
+    wallets_changed: asyncio.Event
+    wallet_list_refresh_seconds: int
+    farmed_amount: Optional[int]
+    pool_partials: Dict[str, PoolPartials]
+    transaction_cursors: Dict[int, TransactionCursor]
 
     @staticmethod
-    async def create(root_path: Path, net_config: Dict, event_queue: Queue[GoldEvent],
-                     refresh_interval_seconds: int) -> RpcCollector:
+    async def create(root_path: Path, net_config: Dict, event_queue: Queue[GoldEvent], refresh_interval_seconds: int,
+                     method_config: Dict[str, Dict], plot_indexes: Dict[str, PlotIndex], wallets_changed: asyncio.Event,
+                     wallet_max_concurrent_requests: int, wallet_list_refresh_seconds: int,
+                     pool_partials: Dict[str, PoolPartials],
+                     transaction_cursors: Dict[int, TransactionCursor]) -> RpcCollector:
         self = RpcCollector()
         self.log = logging.getLogger(__name__)
         self.event_queue = event_queue
@@ -45,6 +69,19 @@ class RpcCollector(Collector):
         self.tasks = []
         self.harvester_clients = []
         self.refresh_interval_seconds = refresh_interval_seconds
+        self.method_config = method_config
+        self.plot_indexes = plot_indexes
+        self.duplicate_plots = DuplicatePlotIndex()
+        self.duplicate_plot_pairs = set()
+        self.harvester_summaries_supported = True
+        self.wallets = None
+        self.wallets_changed = wallets_changed
+        self.wallet_list_refresh_seconds = wallet_list_refresh_seconds
+        self.wallet_list_expiry = 0
+        self.wallet_semaphore = asyncio.Semaphore(wallet_max_concurrent_requests)
+        self.farmed_amount = None
+        self.pool_partials = pool_partials
+        self.transaction_cursors = transaction_cursors
 
         try:
             full_node_rpc_port = net_config["full_node"]["rpc_port"]
@@ -68,6 +105,8 @@ class RpcCollector(Collector):
                                                               self.root_path, self.net_config)
             await self.wallet_client.get_connections()
             self.tasks.append(self.get_wallet_balance)
+            self.tasks.append(self.get_farmed_amount)
+            self.tasks.append(self.get_wallet_transactions)
         except Exception as e:
             if self.wallet_client is not None:
                 await RpcCollector.close_rpc_client(self.wallet_client)
@@ -97,68 +136,221 @@ class RpcCollector(Collector):
 
         return self
 
-    async def get_wallet_balance(self) -> None:
+    async def get_wallets(self) -> List[Dict]:
+        """Returns the cached wallet list, refreshing it when a wallet was created or the cache expired."""
+        if self.wallets is None or self.wallets_changed.is_set() or time.monotonic() >= self.wallet_list_expiry:
+            self.wallets_changed.clear()
+            self.wallets = await self.wallet_client.get_wallets()
+            self.wallet_list_expiry = time.monotonic() + self.wallet_list_refresh_seconds
+        return self.wallets
+
+    async def get_confirmed_balance(self, wallet_id: int) -> int:
+        async with self.wallet_semaphore:
+            balance = await self.wallet_client.get_wallet_balance(wallet_id)
+        return balance["confirmed_wallet_balance"]
+
+    async def get_farmed_amount(self) -> None:
         try:
-            wallets = await self.wallet_client.get_wallets()
             farmed_amount = await self.wallet_client.get_farmed_amount()
-            confirmed_balances = []
-            for wallet in wallets:
-                balance = await self.wallet_client.get_wallet_balance(wallet["id"])
-                confirmed_balances.append(balance["confirmed_wallet_balance"])
         except Exception as e:
+            raise ConnectionError(
+                f"Failed to get farmed amount via RPC. Is your wallet running? {type(e).__name__}: {e}")
+        self.farmed_amount = farmed_amount["farmed_amount"]
+
+    async def get_wallet_balance(self) -> None:
+        try:
+            wallets = await self.get_wallets()
+            confirmed_balances = await asyncio.gather(
+                *[self.get_confirmed_balance(wallet["id"]) for wallet in wallets])
+        except Exception as e:
+            self.wallets = None
             raise ConnectionError(
                 f"Failed to get wallet balance via RPC. Is your wallet running? {type(e).__name__}: {e}")
-        event = WalletBalanceEvent(ts=datetime.now(),
-                                   confirmed=str(sum(confirmed_balances)),
-                                   farmed=str(farmed_amount['farmed_amount']))
+        if self.farmed_amount is None:
+            await self.get_farmed_amount()
+        event = WalletBalanceEvent(ts=datetime.now(), confirmed=sum(confirmed_balances), farmed=self.farmed_amount)
         await self.publish_event(event)
 
-    async def get_harvester_plots(self) -> None:
+    async def get_new_transactions(self, wallet_id: int, cursor: TransactionCursor) -> List[Dict]:
+        """Pages backwards from the end of the transactions of a wallet until a whole page is behind the cursor.
+
+        The wallet lists transactions in ascending order of confirmation height, but the order within a page isn't
+        relied upon. Every row of a page is checked against the cursor.
+        """
+        async with self.wallet_semaphore:
+            response = await RpcCollector.fetch(self.wallet_client, "get_transaction_count", {"wallet_id": wallet_id})
+        transactions = {}
+        end = response["count"]
+        while end > 0:
+            start = max(0, end - TRANSACTION_PAGE_SIZE)
+            async with self.wallet_semaphore:
+                response = await RpcCollector.fetch(self.wallet_client, "get_transactions", {
+                    "wallet_id": wallet_id,
+                    "start": start,
+                    "end": end
+                })
+            confirmed = [transaction for transaction in response["transactions"] if transaction["confirmed"]]
+            for transaction in confirmed:
+                if cursor.is_new(transaction):
+                    # Keyed by name, since a transaction added meanwhile shifts the pages by one
+                    transactions[transaction["name"]] = transaction
+            if confirmed and all(cursor.is_behind(transaction) for transaction in confirmed):
+                break
+            end = start
+        return list(transactions.values())
+
+    async def get_wallet_transactions(self) -> None:
         try:
-            harvesters = await self.farmer_client.get_harvesters()
-            ts = datetime.now()
-            for harvester in harvesters["harvesters"]:
-                host = harvester["connection"]["host"]
-                plots = harvester["plots"]
-                og_plots = [plot for plot in plots if plot["pool_contract_puzzle_hash"] is None]
-                portable_plots = [
-                    plot for plot in plots if plot["pool_contract_puzzle_hash"] is not None
-                ]
-                event = HarvesterPlotsEvent(ts=ts,
-                                            plot_count=len(og_plots),
-                                            plot_size=sum(og_plot["file_size"] for og_plot in og_plots),
-                                            portable_plot_count=len(portable_plots),
-                                            portable_plot_size=sum(portable_plot["file_size"]
-                                                                   for portable_plot in portable_plots),
-                                            host=host)
+            wallets = await self.get_wallets()
+            cursors = [self.transaction_cursors.get(wallet["id"]) for wallet in wallets]
+            new_transactions = await asyncio.gather(*[
+                self.get_new_transactions(wallet["id"], cursor or TransactionCursor())
+                for wallet, cursor in zip(wallets, cursors)
+            ])
+        except Exception as e:
+            self.wallets = None
+            raise ConnectionError(
+                f"Failed to get wallet transactions via RPC. Is your wallet running? {type(e).__name__}: {e}")
+        ts = datetime.now()
+        for wallet, cursor, transactions in zip(wallets, cursors, new_transactions):
+            self.transaction_cursors.setdefault(wallet["id"], TransactionCursor()).advance(transactions)
+            for transaction in sorted(transactions, key=lambda transaction: transaction["confirmed_at_height"]):
+                event = WalletTransactionEvent(ts=ts,
+                                               name=transaction["name"],
+                                               wallet_id=wallet["id"],
+                                               height=transaction["confirmed_at_height"],
+                                               created_ts=datetime.fromtimestamp(transaction["created_at_time"]),
+                                               type=transaction["type"],
+                                               amount=transaction["amount"],
+                                               fee=transaction["fee_amount"],
+                                               to_puzzle_hash=transaction["to_puzzle_hash"],
+                                               initial=cursor is None)
                 await self.publish_event(event)
-        except:
-            raise ConnectionError("Failed to get harvesters via RPC. Is your farmer running?")
+
+    async def get_harvester_plots(self) -> None:
+        try:
+            plot_lists = None
+            if self.harvester_summaries_supported:
+                try:
+                    plot_lists = await self.get_changed_plot_lists()
+                except aiohttp.ClientResponseError as e:
+                    if e.status != 404:
+                        raise
+                    self.log.info("Farmer doesn't support harvester summaries. Falling back to full plot lists.")
+                    self.harvester_summaries_supported = False
+            if plot_lists is None:
+                plot_lists = await self.get_plot_lists()
+        except Exception as e:
+            raise ConnectionError(
+                f"Failed to get harvesters via RPC. Is your farmer running? {type(e).__name__}: {e}")
+        ts = datetime.now()
+        # Harvesters that disconnected from the farmer don't farm their plots anymore
+        for host in self.duplicate_plots.hosts - plot_lists.keys():
+            self.duplicate_plots.evict(host, self.plot_indexes[host].plots.values())
+        for host, plots in plot_lists.items():
+            index = self.plot_indexes.setdefault(host, PlotIndex())
+            # The first snapshot of a host that isn't in the plot inventory yet is its baseline, not a change
+            baseline = not index.synced and not index.plots
+            added, removed = index.update(plots) if plots is not None else ([], [])
+            if host in self.duplicate_plots.hosts:
+                self.duplicate_plots.remove(host, removed)
+                self.log_duplicate_plots(host, self.duplicate_plots.add(host, added))
+            else:
+                # A host is only indexed once it is connected, not from the plot inventory of past harvesters
+                self.log_duplicate_plots(host, self.duplicate_plots.add(host, index.plots.values()))
+            event = HarvesterPlotsEvent(ts=ts,
+                                        plot_count=index.og_plot_count,
+                                        plot_size=index.og_plot_size,
+                                        portable_plot_count=index.portable_plot_count,
+                                        portable_plot_size=index.portable_plot_size,
+                                        plots_added=len(added) if not baseline else 0,
+                                        plots_removed=len(removed),
+                                        added_plots=added,
+                                        removed_plots=removed,
+                                        host=host)
+            await self.publish_event(event)
+        self.update_duplicate_plot_metrics()
+
+    def log_duplicate_plots(self, host: str, duplicates: List[Tuple[Dict, str, str]]) -> None:
+        for plot, other_host, other_filename in duplicates:
+            self.log.warning(
+                f"Plot {plot['plot_id']} is farmed twice: {host}:{plot['filename']} and {other_host}:{other_filename}")
+
+    def update_duplicate_plot_metrics(self) -> None:
+        pair_counts = self.duplicate_plots.pair_counts
+        for host, other_host in self.duplicate_plot_pairs - pair_counts.keys():
+            GoldExporter.duplicate_plots_gauge.labels(host, other_host).set(0)
+        for (host, other_host), count in pair_counts.items():
+            GoldExporter.duplicate_plots_gauge.labels(host, other_host).set(count)
+        self.duplicate_plot_pairs = set(pair_counts)
+
+    async def get_plot_lists(self) -> Dict[str, List[Dict]]:
+        if not STREAMING_SUPPORTED:
+            harvesters = await RpcCollector.fetch(self.farmer_client, "get_harvesters", {})
+            return {harvester["connection"]["host"]: harvester["plots"] for harvester in harvesters["harvesters"]}
+        client = self.farmer_client
+        async with client.session.post(client.url + "get_harvesters", json={},
+                                       ssl_context=client.ssl_context) as response:
+            response.raise_for_status()
+            return await parse_harvester_plots(response.content)
+
+    async def get_changed_plot_lists(self) -> Dict[str, Optional[List[Dict]]]:
+        """Fetches the plot list of every harvester whose summary doesn't match its plot index.
+
+        Harvesters that are unchanged or still syncing their plots to the farmer are mapped to None.
+        """
+        summaries = await RpcCollector.fetch(self.farmer_client, "get_harvesters_summary", {})
+        plot_lists = {}
+        for summary in summaries["harvesters"]:
+            host = summary["connection"]["host"]
+            index = self.plot_indexes.get(host)
+            if summary["syncing"] is not None or (index is not None
+                                                  and index.matches(summary["plots"], summary["total_plot_size"])):
+                plot_lists[host] = None
+            else:
+                plot_lists[host] = await self.get_valid_plots(summary["connection"]["node_id"])
+        return plot_lists
+
+    async def get_valid_plots(self, node_id: str) -> List[Dict]:
+        plots = []
+        page = 0
+        page_count = 1
+        while page < page_count:
+            response = await RpcCollector.fetch(
+                self.farmer_client, "get_harvester_plots_valid", {
+                    "node_id": node_id,
+                    "page": page,
+                    "page_size": PLOT_PAGE_SIZE,
+                    "filter": [],
+                    "sort_key": "filename",
+                    "reverse": False
+                })
+            plots.extend(response["plots"])
+            page_count = response["page_count"]
+            page += 1
+        return plots
 
     async def get_pool_state(self) -> None:
         try:
             pool_state = await self.farmer_client.get_pool_state()
             for pool in pool_state["pool_state"]:
                 if pool["current_difficulty"] is not None:
-                    points_24h = 0
-                    for t, point in pool["points_found_24h"]:
-                        if (time.time() - float(t)) < 86400:
-                            points_24h += point
-                    points_ack_24h = 0
-                    for t, point in pool["points_acknowledged_24h"]:
-                        if (time.time() - float(t)) < 86400:
-                            points_ack_24h += point
+                    p2 = pool["p2_singleton_puzzle_hash"]
+                    partials = self.pool_partials.setdefault(p2, PoolPartials())
+                    new_partials = partials.update(pool["points_found_24h"], pool["points_acknowledged_24h"])
+                    ts = datetime.now()
                     event = PoolStateEvent(
-                        ts=datetime.now(),
-                        p2_singleton_puzzle_hash=pool["p2_singleton_puzzle_hash"],
+                        ts=ts,
+                        p2_singleton_puzzle_hash=p2,
                         pool_url=pool["pool_config"]["pool_url"],
                         current_points=pool["current_points"],
                         current_difficulty=pool["current_difficulty"],
                         points_found_since_start=pool["points_found_since_start"],
                         points_acknowledged_since_start=pool["points_acknowledged_since_start"],
-                        points_found_24h=points_24h,
-                        points_acknowledged_24h=points_ack_24h,
-                        num_pool_errors_24h=len(pool["pool_errors_24h"]))
+                        points_found_24h=partials.found.total(ts),
+                        points_acknowledged_24h=partials.acknowledged.total(ts),
+                        num_pool_errors_24h=len(pool["pool_errors_24h"]),
+                        partials=new_partials)
                     await self.publish_event(event)
         except Exception as e:
             self.log.error(e)
@@ -173,7 +365,7 @@ class RpcCollector(Collector):
         event = BlockchainStateEvent(ts=datetime.now(),
                                      space=str(state["space"]),
                                      diffculty=state["difficulty"],
-                                     peak_height=str(peak_height),
+                                     peak_height=peak_height,
                                      mempool_size=state["mempool_size"],
                                      synced=state["sync"]["synced"])
         await self.publish_event(event)
@@ -202,14 +394,65 @@ class RpcCollector(Collector):
                                  harvester_count=len(harvester_connections))
         await self.publish_event(event)
 
-    async def task(self) -> None:
+    @staticmethod
+    async def timed(task: Callable) -> None:
+        method = task.__name__
+        start = time.monotonic()
+        try:
+            await task()
+        except Exception:
+            GoldExporter.rpc_errors_counter.labels(method).inc()
+            raise
+        finally:
+            GoldExporter.rpc_duration.labels(method).observe(time.monotonic() - start)
+
+    async def schedule(self, task: Callable) -> None:
+        """Runs a single collection method on its own interval.
+
+        Calls never overlap. If a call overruns its interval, all ticks that were missed meanwhile are coalesced into a
+        single call that starts right away instead of firing several times in a row to catch up.
+        """
+        method = task.__name__
+        config = self.method_config.get(method, {})
+        interval = config.get("interval_seconds", self.refresh_interval_seconds)
+        timeout = config.get("timeout_seconds", interval)
+        jitter = config.get("jitter_seconds", 0)
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
         while True:
+            await asyncio.sleep(max(0, next_tick - loop.time()) + random.uniform(0, jitter))
             try:
-                await asyncio.gather(*[task() for task in self.tasks])
+                await asyncio.wait_for(RpcCollector.timed(task), timeout)
+            except asyncio.TimeoutError:
+                GoldExporter.rpc_errors_counter.labels(method).inc()
+                self.log.warning(f"Timed out after {timeout}s while collecting events via {method}. Trying again...")
             except Exception as e:
                 self.log.warning(
-                    f"Error while collecting events. Trying again... {type(e).__name__}: {e}")
-            await asyncio.sleep(self.refresh_interval_seconds)
+                    f"Error while collecting events via {method}. Trying again... {type(e).__name__}: {e}")
+            next_tick += interval
+            missed_ticks = int((loop.time() - next_tick) // interval)
+            if missed_ticks > 0:
+                next_tick += missed_ticks * interval
+                GoldExporter.rpc_skipped_ticks_counter.labels(method).inc(missed_ticks)
+
+    async def task(self) -> None:
+        for method in self.method_config:
+            if method not in (task.__name__ for task in self.tasks):
+                self.log.warning(f"Ignoring config for unknown or unavailable RPC method '{method}'")
+        await asyncio.gather(*[self.schedule(task) for task in self.tasks])
+
+    @staticmethod
+    async def fetch(rpc_client: RpcClient, path: str, request: Dict) -> Dict:
+        """Same as RpcClient.fetch, but encodes and decodes with the fast JSON codec."""
+        async with rpc_client.session.post(rpc_client.url + path,
+                                           data=codec.dumps(request),
+                                           headers={"Content-Type": "application/json"},
+                                           ssl_context=rpc_client.ssl_context) as response:
+            response.raise_for_status()
+            result = codec.loads(await response.read())
+        if not result["success"]:
+            raise ValueError(result)
+        return result
 
     @staticmethod
     async def close_rpc_client(rpc_client: RpcClient) -> None:
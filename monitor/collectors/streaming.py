@@ -0,0 +1,68 @@
+import re
+from typing import Dict, List, Optional, Pattern, Tuple
+
+try:
+    import ijson
+    STREAMING_SUPPORTED = True
+except ImportError:
+    STREAMING_SUPPORTED = False
+
+from monitor.plots import PLOT_FIELDS
+
+# The daemon serializes messages with sorted keys, so the command follows "ack" and precedes the nested "data"
+COMMAND_PATTERN = re.compile(r'"command"\s*:\s*"([^"\\]*)"')
+COMMAND_PREFIX_LENGTH = 256
+STATE_PATTERN = r'"state"\s*:\s*"(?:{})"'
+
+HARVESTER_PREFIX = "harvesters.item"
+HOST_PREFIX = "harvesters.item.connection.host"
+PLOT_PREFIX = "harvesters.item.plots.item"
+PLOT_FIELD_PREFIXES = {f"{PLOT_PREFIX}.{field}": field for field in PLOT_FIELDS}
+
+
+def sniff_command(message: str) -> Optional[str]:
+    """Reads the command of a daemon message without decoding it. Returns None if it isn't near the start."""
+    match = COMMAND_PATTERN.search(message, 0, COMMAND_PREFIX_LENGTH)
+    return match.group(1) if match is not None else None
+
+
+def state_pattern(states: Tuple[str, ...]) -> Pattern:
+    """Matches state_changed messages with one of the given states, to skip all others without decoding them.
+
+    A match may still be a nested "state" key, so matching messages have to be checked after decoding.
+    """
+    return re.compile(STATE_PATTERN.format("|".join(re.escape(state) for state in states)))
+
+
+async def parse_harvester_plots(stream) -> Dict[str, List[Dict]]:
+    """Incrementally decodes a get_harvesters response into the plot list of every harvester host.
+
+    Only the plot fields the plot index needs are kept, so the full response is never materialized.
+    """
+    plot_lists = {}
+    success = None
+    host = None
+    plots = None
+    plot = None
+    async for prefix, event, value in ijson.parse_async(stream):
+        if plot is not None:
+            if prefix == PLOT_PREFIX and event == "end_map":
+                plots.append(plot)
+                plot = None
+            elif prefix in PLOT_FIELD_PREFIXES:
+                plot[PLOT_FIELD_PREFIXES[prefix]] = value
+        elif prefix == PLOT_PREFIX and event == "start_map":
+            plot = {}
+        elif prefix == HARVESTER_PREFIX:
+            if event == "start_map":
+                host = None
+                plots = []
+            elif event == "end_map":
+                plot_lists[host] = plots
+        elif prefix == HOST_PREFIX:
+            host = value
+        elif prefix == "success":
+            success = value
+    if not success:
+        raise ValueError("get_harvesters failed")
+    return plot_lists
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from asyncio import Queue
 from datetime import datetime
@@ -10,20 +11,29 @@ from typing import Dict
 import aiohttp
 from chia.server.server import ssl_context_for_client
 from chia.util.ws_message import WsRpcMessage
+from monitor import codec
 from monitor.collectors.collector import Collector
+from monitor.collectors.streaming import sniff_command, state_pattern
 from monitor.database.events import GoldEvent, FarmingInfoEvent, SignagePointEvent
 
+HANDLED_COMMANDS = ("new_farming_info", "new_signage_point", "state_changed")
+WALLET_LIST_STATES = ("wallet_created", )
+WALLET_LIST_PATTERN = state_pattern(WALLET_LIST_STATES)
+
 
 class WsCollector(Collector):
     session: aiohttp.ClientSession
     ws: aiohttp.ClientWebSocketResponse
+    wallets_changed: asyncio.Event
     closed = False
 
     @staticmethod
-    async def create(root_path: Path, net_config: Dict, event_queue: Queue[GoldEvent]) -> WsCollector:
+    async def create(root_path: Path, net_config: Dict, event_queue: Queue[GoldEvent],
+                     wallets_changed: asyncio.Event) -> WsCollector:
         self = WsCollector()
         self.log = logging.getLogger(__name__)
         self.event_queue = event_queue
+        self.wallets_changed = wallets_changed
 
         ca_crt_path = root_path / net_config["private_ssl_ca"]["crt"]
         ca_key_path = root_path / net_config["private_ssl_ca"]["key"]
@@ -51,9 +61,9 @@ class WsCollector(Collector):
             destination="daemon",
             origin="client",
         )
-        await self.ws.send_json(msg)
+        await self.ws.send_json(msg, dumps=codec.dumps)
         try:
-            msg = await self.ws.receive_json()
+            msg = await self.ws.receive_json(loads=codec.loads)
             assert (msg["data"]["success"])
         except:
             await self.close()
@@ -78,12 +88,22 @@ class WsCollector(Collector):
     async def task(self) -> None:
         while not self.closed:
             try:
-                msg = await self.ws.receive_json()
+                data = await self.ws.receive_str()
+                # Skip large messages we don't handle (e.g. plot updates) without decoding them
+                cmd = sniff_command(data)
+                if cmd is not None and cmd not in HANDLED_COMMANDS:
+                    continue
+                # Most state changes come from the node and the wallet's sync, only wallet changes matter here
+                if cmd == "state_changed" and WALLET_LIST_PATTERN.search(data) is None:
+                    continue
+                msg = codec.loads(data)
                 cmd = msg["command"]
                 if cmd == "new_farming_info":
                     await self.process_farming_info(msg["data"]["farming_info"])
                 elif cmd == "new_signage_point":
                     await self.process_signage_point(msg["data"]["signage_point"])
+                elif cmd == "state_changed" and msg["data"].get("state") in WALLET_LIST_STATES:
+                    self.wallets_changed.set()
             except Exception as e:
                 if self.closed:
                     break
@@ -3,6 +3,8 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 DATABASE_URL = "sqlite:///history.sqlite"
+# The persister, rollups and pruning write concurrently, so a writer waits for the lock instead of failing right away
+BUSY_TIMEOUT_SECONDS = 30
 
 meta = MetaData(
     naming_convention={
@@ -14,5 +16,5 @@ meta = MetaData(
     })
 GoldEvent = declarative_base(metadata=meta)
 
-engine = create_engine(DATABASE_URL, echo=False)
+engine = create_engine(DATABASE_URL, echo=False, connect_args={"timeout": BUSY_TIMEOUT_SECONDS})
 session = sessionmaker(engine, expire_on_commit=False)
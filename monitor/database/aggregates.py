@@ -0,0 +1,39 @@
+from monitor.database import GoldEvent
+from monitor.database.types import Timestamp
+from sqlalchemy import Column, Float, Integer
+
+
+class FarmingTotals(GoldEvent):
+    __tablename__ = "farming_totals"
+    id = Column(Integer, primary_key=True)
+    challenges = Column(Integer, default=0, nullable=False)
+    signage_points = Column(Integer, default=0, nullable=False)
+    passed_filter = Column(Integer, default=0, nullable=False)
+    proofs = Column(Integer, default=0, nullable=False)
+
+
+class FarmingRollup:
+    bucket = Column(Timestamp, primary_key=True)
+    signage_points = Column(Integer, nullable=False)
+    challenges = Column(Integer, nullable=False)
+    passed_filter = Column(Integer, nullable=False)
+    passed_filter_min = Column(Integer)
+    passed_filter_max = Column(Integer)
+    passed_filter_p50 = Column(Integer)
+    passed_filter_p95 = Column(Integer)
+    proofs = Column(Integer, nullable=False)
+    proofs_max = Column(Integer)
+    lookup_time_count = Column(Integer, nullable=False)
+    lookup_time_sum = Column(Float)
+    lookup_time_min = Column(Float)
+    lookup_time_max = Column(Float)
+    lookup_time_p50 = Column(Float)
+    lookup_time_p95 = Column(Float)
+
+
+class FarmingRollup1m(FarmingRollup, GoldEvent):
+    __tablename__ = "farming_rollups_1m"
+
+
+class FarmingRollup1h(FarmingRollup, GoldEvent):
+    __tablename__ = "farming_rollups_1h"
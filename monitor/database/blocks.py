@@ -0,0 +1,34 @@
+from typing import Dict, List
+
+from sqlalchemy import BigInteger, Boolean, Column, Integer
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.expression import delete, insert, select
+from sqlalchemy.sql.functions import func
+
+from monitor.database import GoldEvent, engine
+from monitor.database.cursors import set_cursor
+from monitor.database.types import Timestamp
+
+BLOCK_CURSOR = "blocks"
+
+
+class Block(GoldEvent):
+    """Block of the chain. Only transaction blocks have a timestamp."""
+    __tablename__ = "blocks"
+    height = Column(Integer, primary_key=True, autoincrement=False)
+    ts = Column(Timestamp, index=True)
+    reward = Column(BigInteger, nullable=False)
+    won = Column(Boolean, nullable=False)
+
+
+def store_blocks(blocks: List[Dict], start_height: int, end_height: int) -> None:
+    """Replaces the blocks in [start_height, end_height) and moves the cursor past them in one transaction."""
+    with engine.begin() as connection:
+        connection.execute(delete(Block).where(Block.height >= start_height).where(Block.height < end_height))
+        if blocks:
+            connection.execute(insert(Block), blocks)
+        set_cursor(connection, BLOCK_CURSOR, end_height - 1)
+
+
+def get_blocks_won(connection: Connection) -> int:
+    return connection.execute(select(func.count(Block.height)).where(Block.won.is_(True))).scalar()
@@ -0,0 +1,23 @@
+from typing import Optional
+
+from sqlalchemy import BigInteger, Column, String
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.expression import insert, select, update
+
+from monitor.database import GoldEvent
+
+
+class Cursor(GoldEvent):
+    """Position up to which a collector has ingested an append-only source, e.g. a block height."""
+    __tablename__ = "cursors"
+    name = Column(String(64), primary_key=True)
+    position = Column(BigInteger, nullable=False)
+
+
+def get_cursor(connection: Connection, name: str) -> Optional[int]:
+    return connection.execute(select(Cursor.position).where(Cursor.name == name)).scalar()
+
+
+def set_cursor(connection: Connection, name: str, position: int) -> None:
+    if connection.execute(update(Cursor).where(Cursor.name == name).values(position=position)).rowcount == 0:
+        connection.execute(insert(Cursor).values(name=name, position=position))
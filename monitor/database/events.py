@@ -1,22 +1,36 @@
 from monitor.database import GoldEvent
-from sqlalchemy import Boolean, Column, DateTime, Integer, String
+from monitor.database.types import Hash32, Timestamp
+from sqlalchemy import BigInteger, Boolean, Column, Integer, String
+
+# Subset of chia.wallet.util.transaction_type.TransactionType
+INCOMING_TX = 0
+OUTGOING_TX = 1
+COINBASE_REWARD = 2
+FEE_REWARD = 3
+PAYMENT_TYPES = (INCOMING_TX, COINBASE_REWARD, FEE_REWARD)
+REWARD_TYPES = (COINBASE_REWARD, FEE_REWARD)
 
 
 class HarvesterPlotsEvent(GoldEvent):
     __tablename__ = "harvester_events"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ts = Column(DateTime, index=True, nullable=False)
+    ts = Column(Timestamp, index=True, nullable=False)
     host = Column(String(255), nullable=False)
     plot_count = Column(Integer)
     portable_plot_count = Column(Integer)
     plot_size = Column(Integer)
     portable_plot_size = Column(Integer)
+    plots_added = Column(Integer)
+    plots_removed = Column(Integer)
+    # Changed plots aren't stored with the event, but in the plot inventory
+    added_plots = ()
+    removed_plots = ()
 
 
 class ConnectionsEvent(GoldEvent):
     __tablename__ = "connection_events"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ts = Column(DateTime, index=True, nullable=False)
+    ts = Column(Timestamp, index=True, nullable=False)
     full_node_count = Column(Integer)
     farmer_count = Column(Integer)
     wallet_count = Column(Integer)
@@ -26,10 +40,10 @@ class ConnectionsEvent(GoldEvent):
 class BlockchainStateEvent(GoldEvent):
     __tablename__ = "blockchain_state_events"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ts = Column(DateTime, index=True, nullable=False)
+    ts = Column(Timestamp, index=True, nullable=False)
     space = Column(String(32))
     diffculty = Column(Integer)
-    peak_height = Column(String(32))
+    peak_height = Column(Integer)
     mempool_size = Column(Integer)
     synced = Column(Boolean())
 
@@ -37,26 +51,43 @@ class BlockchainStateEvent(GoldEvent):
 class WalletBalanceEvent(GoldEvent):
     __tablename__ = "wallet_balance_events"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ts = Column(DateTime, index=True, nullable=False)
-    confirmed = Column(String(32))
-    farmed = Column(String(32))
+    ts = Column(Timestamp, index=True, nullable=False)
+    confirmed = Column(BigInteger)
+    farmed = Column(BigInteger)
+
+
+class WalletTransactionEvent(GoldEvent):
+    """Confirmed wallet transaction, ingested once by its confirmation height."""
+    __tablename__ = "wallet_transactions"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    ts = Column(Timestamp, index=True, nullable=False)
+    name = Column(Hash32, index=True, nullable=False)
+    wallet_id = Column(Integer, nullable=False)
+    height = Column(Integer, index=True, nullable=False)
+    created_ts = Column(Timestamp, nullable=False)
+    type = Column(Integer, nullable=False)
+    amount = Column(BigInteger, nullable=False)
+    fee = Column(BigInteger, nullable=False)
+    to_puzzle_hash = Column(Hash32)
+    # Transactions of the first sync of a wallet are history, not new payments
+    initial = False
 
 
 class SignagePointEvent(GoldEvent):
     __tablename__ = "signage_point_events"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ts = Column(DateTime, index=True, nullable=False)
-    challenge_hash = Column(String(66), index=True)
-    signage_point = Column(String(66), index=True)
+    ts = Column(Timestamp, index=True, nullable=False)
+    challenge_hash = Column(Hash32, index=True)
+    signage_point = Column(Hash32, index=True)
     signage_point_index = Column(Integer)
 
 
 class FarmingInfoEvent(GoldEvent):
     __tablename__ = "farming_info_events"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ts = Column(DateTime, index=True, nullable=False)
-    challenge_hash = Column(String(66), index=True)
-    signage_point = Column(String(66), index=True)
+    ts = Column(Timestamp, index=True, nullable=False)
+    challenge_hash = Column(Hash32, index=True)
+    signage_point = Column(Hash32, index=True)
     passed_filter = Column(Integer)
     proofs = Column(Integer)
     total_plots = Column(Integer)
@@ -65,8 +96,8 @@ class FarmingInfoEvent(GoldEvent):
 class PoolStateEvent(GoldEvent):
     __tablename__ = "pool_state_events"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ts = Column(DateTime, index=True, nullable=False)
-    p2_singleton_puzzle_hash = Column(String(66), default="", nullable=False)
+    ts = Column(Timestamp, index=True, nullable=False)
+    p2_singleton_puzzle_hash = Column(Hash32, default="", nullable=False)
     pool_url = Column(String(255))
     current_points = Column(Integer)
     current_difficulty = Column(Integer)
@@ -75,12 +106,14 @@ class PoolStateEvent(GoldEvent):
     points_found_24h = Column(Integer)
     points_acknowledged_24h = Column(Integer)
     num_pool_errors_24h = Column(Integer)
+    # New partials aren't stored with the event, but in the pool partials table
+    partials = ()
 
 
 class PriceEvent(GoldEvent):
     __tablename__ = "price_events"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    ts = Column(DateTime, index=True, nullable=False)
+    ts = Column(Timestamp, index=True, nullable=False)
     usd_cents = Column(Integer)
     eur_cents = Column(Integer)
     btc_satoshi = Column(Integer)
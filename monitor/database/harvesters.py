@@ -0,0 +1,48 @@
+from typing import Dict, List
+
+from sqlalchemy import BigInteger, Column, Integer, String
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.expression import bindparam, insert, select, update
+
+from monitor.database import GoldEvent
+from monitor.database.events import HarvesterPlotsEvent
+from monitor.database.types import Timestamp
+
+CURRENT_COLUMNS = ("ts", "plot_count", "portable_plot_count", "plot_size", "portable_plot_size")
+
+
+class HarvesterRecord(GoldEvent):
+    """Latest plot counts of each harvester and the time it last reported them, updated in place."""
+    __tablename__ = "harvester_current"
+    host = Column(String(255), primary_key=True)
+    ts = Column(Timestamp, nullable=False)
+    plot_count = Column(Integer)
+    portable_plot_count = Column(Integer)
+    plot_size = Column(BigInteger)
+    portable_plot_size = Column(BigInteger)
+
+
+def upsert_harvesters(connection: Connection, events: List[GoldEvent]) -> None:
+    latest = {}
+    for event in events:
+        if isinstance(event, HarvesterPlotsEvent):
+            latest[event.host] = {"b_host": event.host, **{column: getattr(event, column) for column in CURRENT_COLUMNS}}
+    if not latest:
+        return
+    known_hosts = set(
+        connection.execute(select(HarvesterRecord.host).where(HarvesterRecord.host.in_(list(latest)))).scalars())
+    updated = [values for host, values in latest.items() if host in known_hosts]
+    inserted = [{"host": values.pop("b_host"), **values} for host, values in latest.items() if host not in known_hosts]
+    if updated:
+        connection.execute(
+            update(HarvesterRecord).where(HarvesterRecord.host == bindparam("b_host")).values(
+                {column: bindparam(column)
+                 for column in CURRENT_COLUMNS}), updated)
+    if inserted:
+        connection.execute(insert(HarvesterRecord), inserted)
+
+
+def load_harvesters(connection: Connection) -> Dict[str, HarvesterPlotsEvent]:
+    """Last report of every harvester, to judge staleness and sum up plots right after a restart."""
+    result = connection.execute(select(HarvesterRecord.host, *[getattr(HarvesterRecord, c) for c in CURRENT_COLUMNS]))
+    return {row.host: HarvesterPlotsEvent(**row._mapping) for row in result}
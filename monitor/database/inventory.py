@@ -0,0 +1,74 @@
+from collections import defaultdict
+from typing import Dict, List
+
+from sqlalchemy import BigInteger, Column, Integer, String
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.expression import bindparam, insert, select, update
+
+from monitor.database import GoldEvent
+from monitor.database.events import HarvesterPlotsEvent
+from monitor.database.types import Hash32, Timestamp
+from monitor.plots import PlotIndex
+
+
+class PlotRecord(GoldEvent):
+    """Time a plot was farmed by a harvester. Plots that are still farmed have no removed_ts."""
+    __tablename__ = "plots"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    plot_id = Column(Hash32, index=True, nullable=False)
+    host = Column(String(255), nullable=False)
+    filename = Column(String(1024), nullable=False)
+    file_size = Column(BigInteger, nullable=False)
+    size = Column(Integer, nullable=False)
+    pool_contract_puzzle_hash = Column(Hash32)
+    added_ts = Column(Timestamp, index=True, nullable=False)
+    removed_ts = Column(Timestamp, index=True)
+
+
+def apply_plot_changes(connection: Connection, events: List[GoldEvent]) -> None:
+    """Applies the plot changes of a batch in event order, with as few statements as that allows.
+
+    Removals are written before additions, so removals of a later event must wait until the additions of the
+    earlier events are written. Otherwise a plot added and removed within one batch would stay farmed.
+    """
+    added = []
+    removed = []
+    for event in events:
+        if isinstance(event, HarvesterPlotsEvent):
+            if event.removed_plots and added:
+                write_plot_changes(connection, added, removed)
+                added = []
+                removed = []
+            added.extend({**plot, "host": event.host, "added_ts": event.ts} for plot in event.added_plots)
+            removed.extend({
+                "b_plot_id": plot["plot_id"],
+                "b_host": event.host,
+                "b_removed_ts": event.ts
+            } for plot in event.removed_plots)
+    write_plot_changes(connection, added, removed)
+
+
+def write_plot_changes(connection: Connection, added: List[Dict], removed: List[Dict]) -> None:
+    if removed:
+        connection.execute(
+            update(PlotRecord).where(
+                PlotRecord.plot_id == bindparam("b_plot_id")).where(PlotRecord.host == bindparam("b_host")).where(
+                    PlotRecord.removed_ts.is_(None)).values(removed_ts=bindparam("b_removed_ts")), removed)
+    if added:
+        connection.execute(insert(PlotRecord), added)
+
+
+def load_plot_indexes(connection: Connection) -> Dict[str, PlotIndex]:
+    """Rebuilds the plot index of every harvester from the plots that are still farmed.
+
+    The indexes are left unsynced, so each harvester is listed in full once, even if its plot count and size still
+    match. Plots may have been replaced by the same number of plots of the same size meanwhile.
+    """
+    plot_indexes = defaultdict(PlotIndex)
+    result = connection.execute(
+        select(PlotRecord.host, PlotRecord.plot_id, PlotRecord.filename, PlotRecord.file_size, PlotRecord.size,
+               PlotRecord.pool_contract_puzzle_hash).where(PlotRecord.removed_ts.is_(None)))
+    for row in result:
+        plot = dict(row._mapping)
+        plot_indexes[plot.pop("host")].add(plot)
+    return dict(plot_indexes)
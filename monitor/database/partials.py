@@ -0,0 +1,53 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import Boolean, Column, Integer
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.expression import insert, select
+from sqlalchemy.sql.functions import func
+
+from monitor.database import GoldEvent
+from monitor.database.events import PoolStateEvent
+from monitor.database.types import Hash32, Timestamp
+from monitor.partials import PARTIALS_WINDOW, PoolPartials
+
+
+class PoolPartial(GoldEvent):
+    """Partial found by the farmer, and again once the pool acknowledged it."""
+    __tablename__ = "pool_partials"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    ts = Column(Timestamp, index=True, nullable=False)
+    p2_singleton_puzzle_hash = Column(Hash32, nullable=False)
+    points = Column(Integer, nullable=False)
+    acknowledged = Column(Boolean, nullable=False)
+
+
+def insert_partials(connection: Connection, events: List[GoldEvent]) -> None:
+    partials = []
+    for event in events:
+        if isinstance(event, PoolStateEvent):
+            partials.extend({
+                **partial, "p2_singleton_puzzle_hash": event.p2_singleton_puzzle_hash
+            } for partial in event.partials)
+    if partials:
+        connection.execute(insert(PoolPartial), partials)
+
+
+def load_pool_partials(connection: Connection) -> Dict[str, PoolPartials]:
+    """Restores the partials of the last 24 hours and the high-water mark of every pool launcher."""
+    pool_partials = defaultdict(PoolPartials)
+    result = connection.execute(
+        select(PoolPartial.p2_singleton_puzzle_hash, PoolPartial.ts, PoolPartial.points,
+               PoolPartial.acknowledged).where(PoolPartial.ts >= datetime.now() - PARTIALS_WINDOW).order_by(PoolPartial.ts))
+    for p2, ts, points, acknowledged in result:
+        partials = pool_partials[p2]
+        (partials.acknowledged if acknowledged else partials.found).add(ts, points)
+    result = connection.execute(
+        select(PoolPartial.p2_singleton_puzzle_hash, PoolPartial.acknowledged,
+               func.max(PoolPartial.ts)).group_by(PoolPartial.p2_singleton_puzzle_hash, PoolPartial.acknowledged))
+    for p2, acknowledged, cursor in result:
+        partials = pool_partials[p2]
+        window = partials.acknowledged if acknowledged else partials.found
+        window.cursor = max(window.cursor, cursor) if window.cursor is not None else cursor
+    return dict(pool_partials)
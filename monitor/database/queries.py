@@ -1,17 +1,25 @@
 from datetime import datetime, timedelta
-from functools import lru_cache
-from typing import Optional, Tuple
-
-from monitor.database import session
-from monitor.database.events import (BlockchainStateEvent, ConnectionsEvent, FarmingInfoEvent, HarvesterPlotsEvent,
-                                     SignagePointEvent, WalletBalanceEvent)
+from typing import List, Optional, Tuple
+
+from monitor.database.aggregates import FarmingRollup, FarmingRollup1h, FarmingRollup1m, FarmingTotals
+from monitor.database.rollups import RESOLUTIONS, floor_ts
+from monitor.database.events import (BlockchainStateEvent, ConnectionsEvent, FarmingInfoEvent, INCOMING_TX, PAYMENT_TYPES,
+                                     REWARD_TYPES, SignagePointEvent, WalletBalanceEvent, WalletTransactionEvent)
+from monitor.database.inventory import PlotRecord
+from sqlalchemy import BigInteger
 from sqlalchemy.orm import Session
-from sqlalchemy.sql.expression import select
+from sqlalchemy.engine import Row
+from sqlalchemy.sql.expression import and_, case, select, type_coerce
 from sqlalchemy.sql.functions import func
 
 
+def get_farming_totals(db_session: Session) -> Optional[FarmingTotals]:
+    result = db_session.execute(select(FarmingTotals))
+    return result.scalars().first()
+
+
 def get_proofs_found(db_session: Session) -> Optional[int]:
-    result = db_session.execute(select(func.sum(FarmingInfoEvent.proofs)))
+    result = db_session.execute(select(FarmingTotals.proofs))
     return result.scalars().first()
 
 
@@ -41,6 +49,10 @@ def get_connections(db_session: Session) -> Optional[ConnectionsEvent]:
 
 
 def get_farming_start(db_session: Session) -> Optional[datetime]:
+    result = db_session.execute(select(func.min(FarmingRollup1h.bucket)))
+    first_bucket = result.scalars().first()
+    if first_bucket is not None:
+        return first_bucket
     result = db_session.execute(select(func.min(FarmingInfoEvent.ts)))
     return result.scalars().first()
 
@@ -52,112 +64,72 @@ def get_previous_signage_point(db_session: Session) -> Optional[str]:
     return result.all()[-1][0]
 
 
-def get_plot_delta(db_session: Session, period=timedelta(hours=24)) -> Tuple[int, int]:
-    result = db_session.execute(select(func.min(HarvesterPlotsEvent.ts)))
-    first_ts = result.scalars().first()
-    if first_ts is None:
-        return 0, 0
-    initial_ts = max(first_ts, datetime.now() - period)
-    sub_query = select([
-        HarvesterPlotsEvent.plot_count, HarvesterPlotsEvent.portable_plot_count, HarvesterPlotsEvent.plot_size,
-        HarvesterPlotsEvent.portable_plot_size
-    ]).where(HarvesterPlotsEvent.ts > initial_ts).order_by(HarvesterPlotsEvent.ts).group_by(HarvesterPlotsEvent.host)
-    result = db_session.execute(
-        select([
-            func.sum(sub_query.c.plot_count),
-            func.sum(sub_query.c.portable_plot_count),
-            func.sum(sub_query.c.plot_size),
-            func.sum(sub_query.c.portable_plot_size)
-        ]))
-    initial_plots = result.one()
-    if initial_plots is None:
-        return 0, 0
-    initial_og_plot_count, initial_portable_plot_count, initial_og_plot_size, initial_portable_plot_size = initial_plots
-    initial_plot_count = initial_og_plot_count + initial_portable_plot_count
-    initial_plot_size = initial_og_plot_size + initial_portable_plot_size
-    current_plot_count = get_plot_count(db_session)
-    if current_plot_count is None:
-        return 0, 0
-    current_plot_size = get_plot_size(db_session)
-    if current_plot_size is None:
-        return 0, 0
-    return current_plot_count - initial_plot_count, current_plot_size - initial_plot_size
-
-
-def get_plot_count(db_session: Session) -> Optional[int]:
-    og_plot_count = get_og_plot_count(db_session)
-    portable_plot_count = get_portable_plot_count(db_session)
-    if og_plot_count is not None and portable_plot_count is not None:
-        return og_plot_count + portable_plot_count
-    elif og_plot_count is not None and portable_plot_count is None:
-        return og_plot_count
-    elif og_plot_count is None and portable_plot_count is not None:
-        return portable_plot_count
-    else:
-        return None
-
-
-def get_plot_size(db_session: Session) -> Optional[int]:
-    og_plot_size = get_og_plot_size(db_session)
-    portable_plot_size = get_portable_plot_size(db_session)
-    if og_plot_size is not None and portable_plot_size is not None:
-        return og_plot_size + portable_plot_size
-    elif og_plot_size is not None and portable_plot_size is None:
-        return og_plot_size
-    elif og_plot_size is None and portable_plot_size is not None:
-        return portable_plot_size
-    else:
-        return None
-
-
-def get_og_plot_size(db_session: Session) -> Optional[int]:
-    sub_query = select([
-        func.max(HarvesterPlotsEvent.plot_size).label("plot_size")
-    ]).where(HarvesterPlotsEvent.ts > datetime.now() - timedelta(seconds=30)).group_by(HarvesterPlotsEvent.host)
-    result = db_session.execute(select(func.sum(sub_query.c.plot_size)))
-    return result.scalars().first()
-
-
-def get_og_plot_count(db_session: Session) -> Optional[int]:
-    sub_query = select([
-        func.max(HarvesterPlotsEvent.plot_count).label("plot_count")
-    ]).where(HarvesterPlotsEvent.ts > datetime.now() - timedelta(seconds=30)).group_by(HarvesterPlotsEvent.host)
-    result = db_session.execute(select(func.sum(sub_query.c.plot_count)))
-    return result.scalars().first()
-
-
-def get_portable_plot_size(db_session: Session) -> Optional[int]:
-    sub_query = select([
-        func.max(HarvesterPlotsEvent.portable_plot_size).label("portable_plot_size")
-    ]).where(HarvesterPlotsEvent.ts > datetime.now() - timedelta(seconds=30)).group_by(HarvesterPlotsEvent.host)
-    result = db_session.execute(select(func.sum(sub_query.c.portable_plot_size)))
-    return result.scalars().first()
-
-
-def get_portable_plot_count(db_session: Session) -> Optional[int]:
-    sub_query = select([
-        func.max(HarvesterPlotsEvent.portable_plot_count).label("portable_plot_count")
-    ]).where(HarvesterPlotsEvent.ts > datetime.now() - timedelta(seconds=30)).group_by(HarvesterPlotsEvent.host)
-    result = db_session.execute(select(func.sum(sub_query.c.portable_plot_count)))
-    return result.scalars().first()
-
-
-def get_signage_points_per_minute(db_session: Session, interval: timedelta) -> Optional[float]:
+def get_rollup_model(interval: timedelta) -> FarmingRollup:
+    return FarmingRollup1h if interval >= timedelta(days=1) else FarmingRollup1m
+
+
+def get_summary_start(start: datetime) -> datetime:
+    """Start of a summary window, aligned to the resolution of the rollup serving it."""
+    return floor_ts(start, RESOLUTIONS[get_rollup_model(datetime.now() - start)])
+
+
+def get_summary_window(db_session: Session, start: datetime, plot_start: datetime) -> Row:
+    """Windowed figures of the farm summary, computed by a single query.
+
+    Signage points, passed filters and proofs since start are taken from the rollups, plus the raw events that
+    aren't rolled up yet. Start has to be aligned by `get_summary_start`. Plot changes since plot_start come from
+    the plot inventory, where the first snapshot of each harvester is its baseline rather than a change. Farmed
+    rewards and received payouts are summed from the wallet ledger.
+    """
+    model = get_rollup_model(datetime.now() - start)
+    resolution = RESOLUTIONS[model]
+    start_ms = round(start.timestamp() * 1000)
+    last_bucket = select(func.max(type_coerce(model.bucket, BigInteger))).scalar_subquery()
+    rollup_end = func.coalesce(last_bucket + int(resolution.total_seconds() * 1000), start_ms)
+    raw_start = case((rollup_end > start_ms, rollup_end), else_=start_ms)
+
+    def rolled_up(column, raw_total, ts_column):
+        rolled = select(func.coalesce(func.sum(column), 0)).where(model.bucket >= start).scalar_subquery()
+        raw = select(func.coalesce(raw_total, 0)).where(type_coerce(ts_column, BigInteger) >= raw_start)
+        return rolled + raw.scalar_subquery()
+
+    first_snapshots = PlotRecord.__table__.alias("first_snapshots")
+    first_snapshot = select(func.min(
+        first_snapshots.c.added_ts)).where(first_snapshots.c.host == PlotRecord.host).scalar_subquery()
+    added = and_(PlotRecord.added_ts >= plot_start, PlotRecord.added_ts > first_snapshot)
+    removed = PlotRecord.removed_ts >= plot_start
+    return db_session.execute(
+        select(
+            rolled_up(model.signage_points, func.count(SignagePointEvent.id), SignagePointEvent.ts).label("signage_points"),
+            rolled_up(model.passed_filter, func.sum(FarmingInfoEvent.passed_filter),
+                      FarmingInfoEvent.ts).label("passed_filter"),
+            rolled_up(model.proofs, func.sum(FarmingInfoEvent.proofs), FarmingInfoEvent.ts).label("proofs"),
+            select(func.count(PlotRecord.id)).where(added).scalar_subquery().label("plots_added"),
+            select(func.coalesce(func.sum(PlotRecord.file_size), 0)).where(added).scalar_subquery().label("plot_size_added"),
+            select(func.count(PlotRecord.id)).where(removed).scalar_subquery().label("plots_removed"),
+            select(func.coalesce(func.sum(PlotRecord.file_size),
+                                 0)).where(removed).scalar_subquery().label("plot_size_removed"),
+            select(func.coalesce(func.sum(WalletTransactionEvent.amount),
+                                 0)).where(WalletTransactionEvent.type.in_(REWARD_TYPES)).where(
+                                     WalletTransactionEvent.created_ts >= start).scalar_subquery().label("farmed"),
+            select(func.coalesce(func.sum(WalletTransactionEvent.amount),
+                                 0)).where(WalletTransactionEvent.type == INCOMING_TX).where(
+                                     WalletTransactionEvent.created_ts >= start).scalar_subquery().label("received"),
+        )).one()
+
+
+def get_payouts(db_session: Session, start: datetime) -> List[Tuple[str, int, int]]:
+    """Number and sum of incoming payouts since start per receiving puzzle hash.
+
+    Pools pay to the payout instructions of the farmer, which are usually the same address for every pool, so this
+    breaks payouts down by receiving address, not by pool.
+    """
     result = db_session.execute(
-        select(func.count(SignagePointEvent.ts)).where(SignagePointEvent.ts >= datetime.now() - interval))
-    num_signage_points = result.scalars().first()
-    if num_signage_points is None:
-        return None
-    return num_signage_points / (interval.seconds / 60)
-
-
-def get_passed_filters_per_minute(db_session: Session, interval: timedelta) -> Optional[float]:
-    result = db_session.execute(
-        select(func.sum(FarmingInfoEvent.passed_filter)).where(FarmingInfoEvent.ts >= datetime.now() - interval))
-    passed_filters = result.scalars().first()
-    if passed_filters is None:
-        return None
-    return passed_filters / (interval.seconds / 60)
+        select(WalletTransactionEvent.to_puzzle_hash, func.count(WalletTransactionEvent.id),
+               func.sum(WalletTransactionEvent.amount)).where(WalletTransactionEvent.type == INCOMING_TX).where(
+                   WalletTransactionEvent.created_ts >= start).group_by(WalletTransactionEvent.to_puzzle_hash).order_by(
+                       func.sum(WalletTransactionEvent.amount).desc()))
+    return [(puzzle_hash, payouts, amount) for puzzle_hash, payouts, amount in result]
 
 
 def get_current_balance(db_session: Session) -> int:
@@ -165,21 +137,8 @@ def get_current_balance(db_session: Session) -> int:
     return result.scalars().first()
 
 
-def get_last_payment(db_session: Session) -> int:
-    current_balance = get_current_balance(db_session)
-    previous_balance_query = db_session.execute(
-        select(WalletBalanceEvent.confirmed).where(WalletBalanceEvent.confirmed != current_balance).order_by(
-            WalletBalanceEvent.ts.desc()))
-    last_balance = previous_balance_query.scalars().first()
-    return int(current_balance) - int(last_balance)
-
-
-@lru_cache(maxsize=16)
-def get_signage_point_ts(signage_point: str, db_session: Session = None) -> datetime:
-    query = select(SignagePointEvent.ts).where(SignagePointEvent.signage_point == signage_point)
-    if db_session is not None:
-        result = db_session.execute(query)
-        return result.scalars().first()
-    with session() as db_session:
-        result = db_session.execute(query)
-        return result.scalars().first()
+def get_last_payment(db_session: Session) -> Optional[int]:
+    result = db_session.execute(
+        select(WalletTransactionEvent.amount).where(WalletTransactionEvent.type.in_(PAYMENT_TYPES)).order_by(
+            WalletTransactionEvent.height.desc(), WalletTransactionEvent.id.desc()))
+    return result.scalars().first()
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Type
+
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.expression import delete, insert, select
+from sqlalchemy.sql.functions import func
+
+from monitor.database import engine
+from monitor.database.aggregates import FarmingRollup, FarmingRollup1h, FarmingRollup1m
+from monitor.database.events import FarmingInfoEvent, SignagePointEvent
+
+RESOLUTIONS = {FarmingRollup1m: timedelta(minutes=1), FarmingRollup1h: timedelta(hours=1)}
+CHUNK_SIZE = timedelta(hours=6)
+PRUNE_BATCH_SIZE = 10000
+SIGNAGE_POINT_GRACE = timedelta(minutes=10)
+# Allowance for events still on their way from the collectors to the persister
+ROLLUP_DELAY = timedelta(minutes=1)
+# Summaries over less than a day are served by the 1-minute rollup, so it has to cover at least one day
+MIN_ROLLUP_1M_RETENTION = timedelta(days=1)
+
+
+def floor_ts(ts: datetime, resolution: timedelta) -> datetime:
+    seconds = resolution.total_seconds()
+    return datetime.fromtimestamp(ts.timestamp() // seconds * seconds)
+
+
+def quantile(values: List, q: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def get_rollup_end(connection: Connection, model: Type[FarmingRollup]) -> Optional[datetime]:
+    last_bucket = connection.execute(select(func.max(model.bucket))).scalar()
+    if last_bucket is None:
+        return None
+    return last_bucket + RESOLUTIONS[model]
+
+
+def get_next_raw_ts(connection: Connection, start: Optional[datetime]) -> Optional[datetime]:
+    timestamps = []
+    for column in (SignagePointEvent.ts, FarmingInfoEvent.ts):
+        query = select(func.min(column))
+        if start is not None:
+            query = query.where(column >= start)
+        timestamps.append(connection.execute(query).scalar())
+    timestamps = [ts for ts in timestamps if ts is not None]
+    return min(timestamps) if timestamps else None
+
+
+def aggregate(connection: Connection, model: Type[FarmingRollup], start: datetime, end: datetime) -> List[Dict]:
+    resolution = RESOLUTIONS[model]
+    buckets = defaultdict(lambda: {"signage_points": 0, "passed_filter": [], "proofs": [], "lookup_time": []})
+
+    result = connection.execute(
+        select(SignagePointEvent.ts).where(SignagePointEvent.ts >= start).where(SignagePointEvent.ts < end))
+    for ts, in result:
+        buckets[floor_ts(ts, resolution)]["signage_points"] += 1
+
+    signage_point_ts = select(func.min(
+        SignagePointEvent.ts)).where(SignagePointEvent.signage_point == FarmingInfoEvent.signage_point).scalar_subquery()
+    result = connection.execute(
+        select(FarmingInfoEvent.ts, FarmingInfoEvent.passed_filter, FarmingInfoEvent.proofs,
+               signage_point_ts).where(FarmingInfoEvent.ts >= start).where(FarmingInfoEvent.ts < end))
+    for ts, passed_filter, proofs, sp_ts in result:
+        bucket = buckets[floor_ts(ts, resolution)]
+        bucket["passed_filter"].append(passed_filter)
+        bucket["proofs"].append(proofs)
+        if sp_ts is not None and sp_ts <= ts:
+            bucket["lookup_time"].append((ts - sp_ts).total_seconds())
+
+    rows = []
+    for bucket_ts, bucket in sorted(buckets.items()):
+        passed_filter, proofs, lookup_time = bucket["passed_filter"], bucket["proofs"], bucket["lookup_time"]
+        rows.append({
+            "bucket": bucket_ts,
+            "signage_points": bucket["signage_points"],
+            "challenges": len(passed_filter),
+            "passed_filter": sum(passed_filter),
+            "passed_filter_min": min(passed_filter, default=None),
+            "passed_filter_max": max(passed_filter, default=None),
+            "passed_filter_p50": quantile(passed_filter, 0.5),
+            "passed_filter_p95": quantile(passed_filter, 0.95),
+            "proofs": sum(proofs),
+            "proofs_max": max(proofs, default=None),
+            "lookup_time_count": len(lookup_time),
+            "lookup_time_sum": sum(lookup_time) if lookup_time else None,
+            "lookup_time_min": min(lookup_time, default=None),
+            "lookup_time_max": max(lookup_time, default=None),
+            "lookup_time_p50": quantile(lookup_time, 0.5),
+            "lookup_time_p95": quantile(lookup_time, 0.95),
+        })
+    return rows
+
+
+def rollup(model: Type[FarmingRollup], until: datetime) -> int:
+    """Aggregates all complete buckets that have not been rolled up yet and returns the number of new rows."""
+    resolution = RESOLUTIONS[model]
+    end = floor_ts(until, resolution)
+    with engine.connect() as connection:
+        start = get_rollup_end(connection, model)
+    row_count = 0
+    while True:
+        with engine.begin() as connection:
+            next_ts = get_next_raw_ts(connection, start)
+            if next_ts is None or next_ts >= end:
+                break
+            start = max(start, floor_ts(next_ts, resolution)) if start is not None else floor_ts(next_ts, resolution)
+            chunk_end = min(start + CHUNK_SIZE, end)
+            rows = aggregate(connection, model, start, chunk_end)
+            if rows:
+                connection.execute(insert(model), rows)
+            row_count += len(rows)
+            start = chunk_end
+    return row_count
+
+
+def prune_table(column, cutoff: datetime) -> int:
+    """Deletes rows older than the cutoff in batches, one transaction each, so the persister is locked out only briefly."""
+    table = column.table
+    key = table.primary_key.columns.values()[0]
+    row_count = 0
+    while True:
+        with engine.begin() as connection:
+            keys = select(key).where(column < cutoff).limit(PRUNE_BATCH_SIZE).scalar_subquery()
+            deleted = connection.execute(delete(table).where(key.in_(keys))).rowcount
+        row_count += deleted
+        if deleted < PRUNE_BATCH_SIZE:
+            return row_count
+
+
+def prune(retention: timedelta) -> int:
+    """Deletes raw events older than the retention window, but never ones that haven't been rolled up yet."""
+    with engine.connect() as connection:
+        rollup_ends = [get_rollup_end(connection, model) for model in RESOLUTIONS]
+    if None in rollup_ends:
+        return 0
+    cutoff = min(datetime.now() - retention, *rollup_ends)
+    return prune_table(FarmingInfoEvent.ts, cutoff) + prune_table(SignagePointEvent.ts, cutoff - SIGNAGE_POINT_GRACE)
+
+
+def prune_rollup_1m(retention: timedelta) -> int:
+    """Deletes 1-minute buckets older than the retention window, but only ones the 1-hour rollup already covers."""
+    with engine.connect() as connection:
+        rollup_end = get_rollup_end(connection, FarmingRollup1h)
+    if rollup_end is None:
+        return 0
+    return prune_table(FarmingRollup1m.bucket, min(datetime.now() - retention, rollup_end))
+
+
+class RollupEngine:
+    """Downsamples farming history into 1-minute and 1-hour buckets and expires old data in the background.
+
+    Buckets are only rolled up once the persister has written all events of their time range, as a bucket is never
+    aggregated again and a late event would be lost with the raw events.
+    """
+    get_flushed_ts: Callable[[], Optional[datetime]]
+    retention: timedelta
+    rollup_1m_retention: timedelta
+    refresh_interval_seconds: int
+
+    def __init__(self, get_flushed_ts: Callable[[], Optional[datetime]], retention_days: int, rollup_1m_retention_days: int,
+                 refresh_interval_seconds: int) -> None:
+        self.log = logging.getLogger(__name__)
+        self.get_flushed_ts = get_flushed_ts
+        self.retention = timedelta(days=retention_days)
+        self.rollup_1m_retention = timedelta(days=rollup_1m_retention_days)
+        if self.rollup_1m_retention < MIN_ROLLUP_1M_RETENTION:
+            raise ValueError(f"The 1-minute rollup retention must be at least {MIN_ROLLUP_1M_RETENTION.days} day")
+        self.refresh_interval_seconds = refresh_interval_seconds
+
+    def run(self) -> None:
+        flushed_ts = self.get_flushed_ts()
+        if flushed_ts is not None:
+            until = flushed_ts - ROLLUP_DELAY
+            for model in RESOLUTIONS:
+                row_count = rollup(model, until)
+                if row_count > 0:
+                    self.log.debug(f"Added {row_count} rows to {model.__tablename__}")
+        row_count = prune(self.retention)
+        if row_count > 0:
+            self.log.info(f"Pruned {row_count} raw events older than {self.retention.days} days")
+        row_count = prune_rollup_1m(self.rollup_1m_retention)
+        if row_count > 0:
+            self.log.info(f"Pruned {row_count} 1-minute buckets older than {self.rollup_1m_retention.days} days")
+
+    async def task(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.run)
+            except Exception as e:
+                self.log.warning(f"Error while rolling up history. Trying again... {type(e).__name__}: {e}")
+            await asyncio.sleep(self.refresh_interval_seconds)
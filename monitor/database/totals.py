@@ -0,0 +1,58 @@
+import logging
+from typing import List
+
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.expression import delete, insert, select, update
+from sqlalchemy.sql.functions import func
+
+from monitor.database import engine
+from monitor.database.aggregates import FarmingRollup1h, FarmingTotals
+from monitor.database.events import FarmingInfoEvent, GoldEvent, SignagePointEvent
+from monitor.database.rollups import RESOLUTIONS
+
+TOTALS_ID = 1
+
+
+def increment_totals(connection: Connection, events: List[GoldEvent]) -> None:
+    farming_infos = [event for event in events if isinstance(event, FarmingInfoEvent)]
+    signage_points = sum(1 for event in events if isinstance(event, SignagePointEvent))
+    if not farming_infos and signage_points == 0:
+        return
+    connection.execute(
+        update(FarmingTotals).where(FarmingTotals.id == TOTALS_ID).values(
+            challenges=FarmingTotals.challenges + len(farming_infos),
+            signage_points=FarmingTotals.signage_points + signage_points,
+            passed_filter=FarmingTotals.passed_filter + sum(event.passed_filter for event in farming_infos),
+            proofs=FarmingTotals.proofs + sum(event.proofs for event in farming_infos)))
+
+
+def rebuild_totals(connection: Connection) -> None:
+    # Raw events may already be pruned, so everything up to the end of the hourly rollups is taken from there
+    challenges, signage_points, passed_filter, proofs, rollup_end = connection.execute(
+        select(func.coalesce(func.sum(FarmingRollup1h.challenges), 0),
+               func.coalesce(func.sum(FarmingRollup1h.signage_points), 0),
+               func.coalesce(func.sum(FarmingRollup1h.passed_filter), 0), func.coalesce(func.sum(FarmingRollup1h.proofs), 0),
+               func.max(FarmingRollup1h.bucket))).one()
+    farming_info_query = select(func.count(FarmingInfoEvent.id), func.coalesce(func.sum(FarmingInfoEvent.passed_filter), 0),
+                                func.coalesce(func.sum(FarmingInfoEvent.proofs), 0))
+    signage_point_query = select(func.count(SignagePointEvent.id))
+    if rollup_end is not None:
+        rollup_end += RESOLUTIONS[FarmingRollup1h]
+        farming_info_query = farming_info_query.where(FarmingInfoEvent.ts >= rollup_end)
+        signage_point_query = signage_point_query.where(SignagePointEvent.ts >= rollup_end)
+    raw_challenges, raw_passed_filter, raw_proofs = connection.execute(farming_info_query).one()
+    raw_signage_points = connection.execute(signage_point_query).scalar()
+    connection.execute(delete(FarmingTotals))
+    connection.execute(
+        insert(FarmingTotals).values(id=TOTALS_ID,
+                                     challenges=challenges + raw_challenges,
+                                     signage_points=signage_points + raw_signage_points,
+                                     passed_filter=passed_filter + raw_passed_filter,
+                                     proofs=proofs + raw_proofs))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    with engine.begin() as connection:
+        rebuild_totals(connection)
+    logging.info("Rebuilt farming totals from history")
@@ -0,0 +1,24 @@
+from typing import Dict
+
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.expression import and_, select
+from sqlalchemy.sql.functions import func
+
+from monitor.database.events import WalletTransactionEvent
+from monitor.transactions import TransactionCursor
+
+
+def load_transaction_cursors(connection: Connection) -> Dict[int, TransactionCursor]:
+    """Restores the cursor of every wallet from the highest confirmed transactions in the ledger."""
+    heights = select(WalletTransactionEvent.wallet_id,
+                     func.max(WalletTransactionEvent.height).label("height")).group_by(
+                         WalletTransactionEvent.wallet_id).subquery()
+    result = connection.execute(
+        select(WalletTransactionEvent.wallet_id, WalletTransactionEvent.height, WalletTransactionEvent.name).join(
+            heights,
+            and_(WalletTransactionEvent.wallet_id == heights.c.wallet_id,
+                 WalletTransactionEvent.height == heights.c.height)))
+    cursors = {}
+    for wallet_id, height, name in result:
+        cursors.setdefault(wallet_id, TransactionCursor(height)).names.add(name)
+    return cursors
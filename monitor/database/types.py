@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+
+class Timestamp(TypeDecorator):
+    """Naive local datetime stored as integer milliseconds since the epoch."""
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return round(value.timestamp() * 1000)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return datetime.fromtimestamp(value / 1000)
+
+
+class Hash32(TypeDecorator):
+    """0x-prefixed hex string stored as raw bytes."""
+    impl = LargeBinary(32)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return "0x" + value.hex() if value else ""
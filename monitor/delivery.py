@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from apprise import Apprise
+
+from monitor.exporter import GoldExporter
+
+# Time given to the workers on shutdown to deliver the messages that are still queued
+DRAIN_TIMEOUT_SECONDS = 10
+
+
+class Message:
+    """Notification waiting to be delivered to a destination."""
+    destination: str
+    title: str
+    body: str
+    key: Optional[str]
+    created: float
+    attempts: int
+
+    def __init__(self, destination: str, title: str, body: str, key: Optional[str]) -> None:
+        self.destination = destination
+        self.title = title
+        self.body = body
+        self.key = key
+        self.created = time.monotonic()
+        self.attempts = 0
+
+
+class Outbox:
+    """Destination handed to the notifications, which queues messages instead of sending them right away."""
+
+    def __init__(self, delivery: "DeliveryQueue", destination: str) -> None:
+        self.delivery = delivery
+        self.destination = destination
+
+    def notify(self, title: str, body: str, key: Optional[str] = None) -> bool:
+        self.delivery.submit(self.destination, title, body, key)
+        return True
+
+
+class DeliveryQueue:
+    """Delivers notifications from concurrent workers, so a slow or failing service doesn't hold back other alerts.
+
+    Failed sends are retried with exponential backoff, up to `max_retries` times. Each destination is sent at most
+    one message per `rate_limit_seconds`. A message queued with the same coalescing key as one that is still waiting
+    for delivery replaces its content, so a flapping alert is only delivered in its latest state. On shutdown, queued
+    messages and messages waiting for a retry are delivered without further backoff for up to
+    `DRAIN_TIMEOUT_SECONDS`. The ones left after that are counted as dropped before the workers are cancelled.
+    """
+    destinations: Dict[str, Apprise]
+    pending: Dict[Tuple[str, str], Message]
+    next_send: Dict[str, float]
+    retries: Dict[Message, asyncio.TimerHandle]
+    workers: List[asyncio.Task]
+
+    def __init__(self, destinations: Dict[str, Apprise], worker_count: int, max_retries: int, backoff_seconds: float,
+                 max_backoff_seconds: float, rate_limit_seconds: float) -> None:
+        self.log = logging.getLogger(__name__)
+        self.destinations = destinations
+        self.worker_count = worker_count
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.rate_limit_seconds = rate_limit_seconds
+        self.pending = {}
+        self.next_send = {}
+        self.retries = {}
+        self.stopping = False
+        self.queue = None
+        self.rate_limits = None
+        self.workers = []
+
+    def outbox(self, destination: str) -> Outbox:
+        return Outbox(self, destination)
+
+    def submit(self, destination: str, title: str, body: str, key: Optional[str] = None) -> None:
+        if key is not None:
+            message = self.pending.get((destination, key))
+            if message is not None:
+                message.title = title
+                message.body = body
+                GoldExporter.notification_coalesced_counter.labels(destination).inc()
+                return
+        message = Message(destination, title, body, key)
+        if key is not None:
+            self.pending[(destination, key)] = message
+        self.queue.put_nowait(message)
+
+    async def send(self, message: Message) -> bool:
+        async with self.rate_limits[message.destination]:
+            await asyncio.sleep(max(0, self.next_send.get(message.destination, 0) - time.monotonic()))
+            self.next_send[message.destination] = time.monotonic() + self.rate_limit_seconds
+        start = time.monotonic()
+        try:
+            return await self.destinations[message.destination].async_notify(title=message.title, body=message.body)
+        except Exception as e:
+            self.log.warning(f"Failed to send notification '{message.title}'. {type(e).__name__}: {e}")
+            return False
+        finally:
+            GoldExporter.notification_send_duration.labels(message.destination).observe(time.monotonic() - start)
+
+    def retry(self, message: Message) -> None:
+        if message.attempts > self.max_retries:
+            GoldExporter.notification_dropped_counter.labels(message.destination).inc()
+            self.log.warning(f"Giving up on notification '{message.title}' after {message.attempts} attempts")
+            return
+        if message.key is not None:
+            if (message.destination, message.key) in self.pending:
+                # Superseded by a newer message while it was sent
+                return
+            self.pending[(message.destination, message.key)] = message
+        if self.stopping:
+            self.queue.put_nowait(message)
+            return
+        delay = min(self.backoff_seconds * 2**(message.attempts - 1), self.max_backoff_seconds)
+        self.retries[message] = asyncio.get_running_loop().call_later(delay, self.requeue, message)
+
+    def requeue(self, message: Message) -> None:
+        del self.retries[message]
+        self.queue.put_nowait(message)
+
+    def drop(self, message: Message) -> None:
+        GoldExporter.notification_dropped_counter.labels(message.destination).inc()
+        self.log.warning(f"Dropping notification '{message.title}' that wasn't delivered on shutdown")
+
+    async def worker(self) -> None:
+        while True:
+            message = await self.queue.get()
+            # Once a message is being sent, its content can't change anymore, so newer ones are queued separately
+            if self.pending.get((message.destination, message.key)) is message:
+                del self.pending[(message.destination, message.key)]
+            message.attempts += 1
+            try:
+                if await self.send(message):
+                    GoldExporter.notification_delivery_latency.labels(message.destination).observe(time.monotonic() -
+                                                                                                   message.created)
+                else:
+                    GoldExporter.notification_failures_counter.labels(message.destination).inc()
+                    self.retry(message)
+            finally:
+                self.queue.task_done()
+
+    def start(self) -> None:
+        self.queue = asyncio.Queue()
+        self.rate_limits = {destination: asyncio.Lock() for destination in self.destinations}
+        GoldExporter.notification_queue_depth_gauge.set_function(self.queue.qsize)
+        self.workers = [asyncio.create_task(self.worker()) for _ in range(self.worker_count)]
+
+    async def stop(self) -> None:
+        if self.queue is not None:
+            self.stopping = True
+            # Messages waiting for a retry would otherwise be lost with their timers
+            for message, handle in list(self.retries.items()):
+                handle.cancel()
+                self.requeue(message)
+            try:
+                await asyncio.wait_for(self.queue.join(), DRAIN_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+        for worker in self.workers:
+            worker.cancel()
+        if self.queue is not None:
+            while not self.queue.empty():
+                self.drop(self.queue.get_nowait())
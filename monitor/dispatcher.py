@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from itertools import count
+from typing import Callable, Dict, List
+
+from monitor.database.events import GoldEvent
+from monitor.exporter import GoldExporter
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+OVERFLOW_POLICIES = (BLOCK, DROP_OLDEST, COALESCE)
+
+
+class Sink:
+    """Bounded queue and task feeding events to a single consumer.
+
+    When the queue is full, the overflow policy decides whether the dispatcher waits (block), the oldest queued
+    event is discarded (drop_oldest) or a queued event of the same type and host is replaced by the new one
+    (coalesce). If no such event is queued, coalesce falls back to discarding the oldest event.
+    """
+    name: str
+    handler: Callable
+    max_size: int
+    overflow: str
+
+    def __init__(self, name: str, handler: Callable, max_size: int, overflow: str) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}' for sink '{name}'. Use one of {OVERFLOW_POLICIES}")
+        self.log = logging.getLogger(__name__)
+        self.name = name
+        self.handler = handler
+        self.max_size = max_size
+        self.overflow = overflow
+        self.pending = OrderedDict()
+        self.latest = {}
+        self.sequence = count()
+        self.not_empty = asyncio.Event()
+        self.not_full = asyncio.Event()
+        self.idle = asyncio.Event()
+        self.idle.set()
+
+    @staticmethod
+    def coalesce_key(event: GoldEvent):
+        return type(event), getattr(event, "host", None), getattr(event, "p2_singleton_puzzle_hash", None)
+
+    def coalesce(self, event: GoldEvent) -> bool:
+        """Replaces the latest queued event of the same type and host, returns False if there is none."""
+        sequence = self.latest.get(self.coalesce_key(event))
+        if sequence not in self.pending:
+            return False
+        self.pending[sequence] = event
+        GoldExporter.sink_coalesced_counter.labels(self.name).inc()
+        return True
+
+    async def put(self, event: GoldEvent) -> None:
+        if len(self.pending) >= self.max_size and self.overflow == COALESCE and self.coalesce(event):
+            return
+        while len(self.pending) >= self.max_size:
+            if self.overflow == BLOCK:
+                self.not_full.clear()
+                await self.not_full.wait()
+            else:
+                self.pending.popitem(last=False)
+                GoldExporter.sink_dropped_counter.labels(self.name).inc()
+        sequence = next(self.sequence)
+        self.pending[sequence] = event
+        if self.overflow == COALESCE:
+            self.latest[self.coalesce_key(event)] = sequence
+        self.idle.clear()
+        self.not_empty.set()
+        GoldExporter.sink_queue_depth_gauge.labels(self.name).set(len(self.pending))
+
+    async def task(self) -> None:
+        while True:
+            if not self.pending:
+                self.idle.set()
+                self.not_empty.clear()
+                await self.not_empty.wait()
+                continue
+            _, event = self.pending.popitem(last=False)
+            self.not_full.set()
+            GoldExporter.sink_queue_depth_gauge.labels(self.name).set(len(self.pending))
+            GoldExporter.sink_lag_gauge.labels(self.name).set((datetime.now() - event.ts).total_seconds())
+            try:
+                result = self.handler(event)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                self.log.warning(f"Sink '{self.name}' failed to process {type(event).__name__}. {type(e).__name__}: {e}")
+
+
+class Dispatcher:
+    """Fans events out to independent sinks so a slow consumer doesn't hold back the others."""
+    sinks: List[Sink]
+    tasks: List[asyncio.Task]
+
+    def __init__(self, sink_config: Dict[str, Dict]) -> None:
+        self.sink_config = sink_config
+        self.sinks = []
+        self.tasks = []
+
+    def add_sink(self, name: str, handler: Callable) -> None:
+        config = self.sink_config[name]
+        self.sinks.append(Sink(name, handler, config["max_size"], config["overflow"]))
+
+    def start(self) -> None:
+        self.tasks = [asyncio.create_task(sink.task()) for sink in self.sinks]
+
+    async def dispatch(self, event: GoldEvent) -> None:
+        for sink in self.sinks:
+            await sink.put(event)
+
+    async def close(self) -> None:
+        for sink in self.sinks:
+            await sink.idle.wait()
+        for task in self.tasks:
+            task.cancel()
@@ -1,8 +1,66 @@
-from prometheus_client import Counter, Gauge, Histogram, start_http_server
+import asyncio
+import gzip
+import hashlib
+from datetime import datetime
+from time import monotonic
+from typing import Dict, Optional
+
+from aiohttp import web
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.openmetrics import exposition as openmetrics
+from sqlalchemy.orm import Session
 
 from monitor.database.events import (BlockchainStateEvent, GoldEvent, ConnectionsEvent, FarmingInfoEvent,
                                      HarvesterPlotsEvent, PoolStateEvent, PriceEvent, SignagePointEvent, WalletBalanceEvent)
-from monitor.database.queries import get_signage_point_ts
+from monitor.database.queries import get_farming_totals
+from monitor.signage_points import SignagePointIndex
+
+EVENT_LOOP_LAG_INTERVAL = 1
+GZIP_LEVEL = 6
+
+
+def get_encoding_weights(accept_encoding: str) -> Dict[str, float]:
+    """Parses an Accept-Encoding header into the quality value of each content coding."""
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.lower()] = weight
+    return weights
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether gzip is acceptable and weighted at least as high as the uncompressed body, e.g. not for `gzip;q=0`."""
+    weights = get_encoding_weights(accept_encoding)
+    gzip_weight = weights.get("gzip", weights.get("x-gzip", weights.get("*", 0.0)))
+    # The uncompressed body is always acceptable, but only preferred if weighted explicitly
+    identity_weight = weights.get("identity", weights.get("*", 0.0))
+    return gzip_weight > 0 and gzip_weight >= identity_weight
+
+
+class RenderedMetrics:
+    """Exposition of all metrics in one format, rendered once and served to every scrape until it expires."""
+    content_type: str
+    body: bytes
+    gzip_body: bytes
+    etag: str
+    ts: float
+
+    def __init__(self, content_type: str, body: bytes) -> None:
+        self.content_type = content_type
+        self.body = body
+        self.gzip_body = gzip.compress(body, GZIP_LEVEL)
+        self.etag = f'"{hashlib.md5(body).hexdigest()}"'
+        self.ts = monotonic()
 
 
 class GoldExporter:
@@ -21,6 +79,7 @@ class GoldExporter:
     # Harvester metrics
     plot_count_gauge = Gauge('gold_plot_count', 'Plot count being farmed by harvester', ["host", "type"])
     plot_size_gauge = Gauge('gold_plot_size', 'Size of plots being farmed by harvester', ["host", "type"])
+    duplicate_plots_gauge = Gauge('gold_duplicate_plots', 'Plots farmed by both harvesters', ["host", "other_host"])
 
     # Farmer metrics
     signage_point_counter = Counter('gold_signage_points', 'Received signage points')
@@ -28,6 +87,12 @@ class GoldExporter:
     challenges_counter = Counter('gold_block_challenges', 'Attempted block challenges')
     passed_filter_counter = Counter('gold_plots_passed_filter', 'Plots passed filter')
     proofs_found_counter = Counter('gold_proofs_found', 'Proofs found')
+    signage_points_lifetime_gauge = Gauge('gold_signage_points_lifetime', 'Received signage points over all runs')
+    challenges_lifetime_gauge = Gauge('gold_block_challenges_lifetime', 'Attempted block challenges over all runs')
+    passed_filter_lifetime_gauge = Gauge('gold_plots_passed_filter_lifetime', 'Plots passed filter over all runs')
+    proofs_found_lifetime_gauge = Gauge('gold_proofs_found_lifetime', 'Proofs found over all runs')
+    blocks_won_gauge = Gauge('gold_blocks_won', 'Blocks won by this farmer')
+    block_height_gauge = Gauge('gold_block_ingested_height', 'Height up to which blocks have been ingested')
     lookup_time = Histogram('gold_lookup_time_seconds',
                             'Plot lookup time',
                             buckets=(.01, .05, .1, .25, .5, .75, 1.0, 1.25, 1.5, 1.75, 2.0, 2.25, 2.5, 2.75, 3.0, 3.25, 3.5,
@@ -56,10 +121,119 @@ class GoldExporter:
     price_btc_satoshi_gauge = Gauge('gold_price_btc_satoshi', 'Current gold price in BTC satoshi')
     price_eth_gwei_gauge = Gauge('gold_price_eth_gwei', 'Current gold price in ETH gwei')
 
-    last_signage_point: SignagePointEvent = None
+    # Monitor metrics
+    persist_flush_size = Histogram('gold_monitor_persist_flush_size',
+                                   'Number of events written per DB transaction',
+                                   buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, float("inf")))
+    persist_flush_duration = Histogram('gold_monitor_persist_flush_duration_seconds',
+                                       'Time spent writing a batch of events to the DB')
+    sink_queue_depth_gauge = Gauge('gold_monitor_sink_queue_depth', 'Events waiting to be processed by a sink', ['sink'])
+    sink_lag_gauge = Gauge('gold_monitor_sink_lag_seconds', 'Age of the last event processed by a sink', ['sink'])
+    sink_dropped_counter = Counter('gold_monitor_sink_dropped_events', 'Events dropped by a full sink queue', ['sink'])
+    sink_coalesced_counter = Counter('gold_monitor_sink_coalesced_events',
+                                     'Events replaced by a newer one of the same type and host in a full sink queue',
+                                     ['sink'])
+    event_latency = Histogram('gold_monitor_event_latency_seconds',
+                              'Time from collecting an event until it reached a pipeline stage', ['type', 'stage'],
+                              buckets=(.001, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf")))
+    event_queue_depth_gauge = Gauge('gold_monitor_event_queue_depth', 'Events waiting in the aggregator queue')
+    persister_queue_depth_gauge = Gauge('gold_monitor_persister_queue_depth', 'Events waiting to be written to the DB')
+    rpc_duration = Histogram('gold_monitor_rpc_duration_seconds', 'Duration of RPC collector tasks', ['method'])
+    rpc_errors_counter = Counter('gold_monitor_rpc_errors', 'Failed RPC collector tasks', ['method'])
+    rpc_skipped_ticks_counter = Counter('gold_monitor_rpc_skipped_ticks', 'RPC collector ticks skipped due to overruns',
+                                        ['method'])
+    event_loop_lag_gauge = Gauge('gold_monitor_event_loop_lag_seconds', 'Delay of scheduled callbacks on the event loop')
+    notification_queue_depth_gauge = Gauge('gold_monitor_notification_queue_depth', 'Notifications waiting to be delivered')
+    notification_send_duration = Histogram('gold_monitor_notification_send_duration_seconds',
+                                           'Duration of a single notification send', ['destination'])
+    notification_delivery_latency = Histogram('gold_monitor_notification_delivery_latency_seconds',
+                                              'Time from queuing a notification until it was delivered', ['destination'],
+                                              buckets=(.1, .25, .5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, float("inf")))
+    notification_failures_counter = Counter('gold_monitor_notification_failures', 'Failed notification sends',
+                                            ['destination'])
+    notification_dropped_counter = Counter('gold_monitor_notification_dropped',
+                                           'Notifications given up after all retries or on shutdown', ['destination'])
+    notification_coalesced_counter = Counter('gold_monitor_notification_coalesced',
+                                             'Notifications replaced by a newer one before delivery', ['destination'])
+    metrics_render_duration = Histogram('gold_monitor_metrics_render_duration_seconds',
+                                        'Time spent rendering the metrics exposition', ['format'])
+    metrics_requests_counter = Counter('gold_monitor_metrics_requests', 'Scrapes of the metrics endpoint', ['response'])
+
+    rendered: Dict[str, RenderedMetrics]
+    runner: Optional[web.AppRunner]
+
+    def __init__(self, port: int, signage_points: SignagePointIndex, render_interval_seconds: float) -> None:
+        self.port = port
+        self.signage_points = signage_points
+        self.render_interval = render_interval_seconds
+        self.rendered = {}
+        self.runner = None
 
-    def __init__(self, port: int) -> None:
-        start_http_server(port)
+    async def start(self) -> None:
+        """Serves /metrics from the event loop, so scrapes don't need a thread of their own."""
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        app.router.add_get("/", self.handle_metrics)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, port=self.port).start()
+
+    async def close(self) -> None:
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    def render(self, openmetrics_format: bool) -> RenderedMetrics:
+        """Returns the cached exposition, rendering it again at most once per render interval."""
+        name = "openmetrics" if openmetrics_format else "text"
+        rendered = self.rendered.get(name)
+        if rendered is None or monotonic() - rendered.ts >= self.render_interval:
+            start = monotonic()
+            if openmetrics_format:
+                rendered = RenderedMetrics(openmetrics.CONTENT_TYPE_LATEST, openmetrics.generate_latest(REGISTRY))
+            else:
+                rendered = RenderedMetrics(CONTENT_TYPE_LATEST, generate_latest(REGISTRY))
+            self.rendered[name] = rendered
+            self.metrics_render_duration.labels(name).observe(monotonic() - start)
+        return rendered
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        rendered = self.render("application/openmetrics-text" in request.headers.get("Accept", ""))
+        headers = {"ETag": rendered.etag, "Vary": "Accept, Accept-Encoding"}
+        if_none_match = request.headers.get("If-None-Match", "")
+        etags = {etag.strip().replace("W/", "", 1) for etag in if_none_match.split(",")}
+        if "*" in etags or rendered.etag in etags:
+            self.metrics_requests_counter.labels("not_modified").inc()
+            return web.Response(status=304, headers=headers)
+        if accepts_gzip(request.headers.get("Accept-Encoding", "")):
+            headers["Content-Encoding"] = "gzip"
+            body = rendered.gzip_body
+        else:
+            body = rendered.body
+        headers["Content-Type"] = rendered.content_type
+        self.metrics_requests_counter.labels("ok").inc()
+        return web.Response(body=body, headers=headers)
+
+    @classmethod
+    def load(cls, db_session: Session) -> None:
+        """Seeds the lifetime gauges with the persisted totals, so they don't start over at zero on a restart.
+
+        The counters still start at zero, as Prometheus expects. Must be called before the exporter is started, so the
+        lifetime gauges are never scraped before they are seeded.
+        """
+        totals = get_farming_totals(db_session)
+        if totals is None:
+            return
+        cls.signage_points_lifetime_gauge.set(totals.signage_points)
+        cls.challenges_lifetime_gauge.set(totals.challenges)
+        cls.passed_filter_lifetime_gauge.set(totals.passed_filter)
+        cls.proofs_found_lifetime_gauge.set(totals.proofs)
+
+    async def event_loop_lag_task(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(EVENT_LOOP_LAG_INTERVAL)
+            self.event_loop_lag_gauge.set(max(0, loop.time() - start - EVENT_LOOP_LAG_INTERVAL))
 
     def process_event(self, event: GoldEvent) -> None:
         if isinstance(event, HarvesterPlotsEvent):
@@ -78,6 +252,10 @@ class GoldExporter:
             self.update_pool_state_metrics(event)
         elif isinstance(event, PriceEvent):
             self.update_price_metrics(event)
+        self.update_event_metrics(event)
+
+    def update_event_metrics(self, event: GoldEvent) -> None:
+        self.event_latency.labels(type(event).__name__, "exported").observe((datetime.now() - event.ts).total_seconds())
 
     def update_harvester_metrics(self, event: HarvesterPlotsEvent) -> None:
         self.plot_count_gauge.labels(event.host, "OG").set(event.plot_count)
@@ -89,14 +267,12 @@ class GoldExporter:
         self.challenges_counter.inc()
         self.passed_filter_counter.inc(event.passed_filter)
         self.proofs_found_counter.inc(event.proofs)
-        if self.last_signage_point is None:
-            return
-        if self.last_signage_point.signage_point == event.signage_point:
-            signage_point_ts = self.last_signage_point.ts
-        else:
-            signage_point_ts = get_signage_point_ts(event.signage_point)
-        lookup_time = event.ts - signage_point_ts
-        self.lookup_time.observe(lookup_time.total_seconds())
+        self.challenges_lifetime_gauge.inc()
+        self.passed_filter_lifetime_gauge.inc(event.passed_filter)
+        self.proofs_found_lifetime_gauge.inc(event.proofs)
+        lookup_time = self.signage_points.get_lookup_time(event)
+        if lookup_time is not None:
+            self.lookup_time.observe(lookup_time.total_seconds())
 
     def update_connection_metrics(self, event: ConnectionsEvent) -> None:
         self.connections_gauge.labels("Full Node").set(event.full_node_count)
@@ -106,18 +282,18 @@ class GoldExporter:
     def update_blockchain_state_metrics(self, event: BlockchainStateEvent) -> None:
         self.network_space_gauge.set(int(event.space))
         self.diffculty_gauge.set(event.diffculty)
-        self.height_gauge.set(int(event.peak_height))
+        self.height_gauge.set(event.peak_height)
         self.sync_gauge.set(event.synced)
         self.mempool_size_gauge.set(event.mempool_size)
 
     def update_wallet_balance_metrics(self, event: WalletBalanceEvent) -> None:
-        self.total_balance_gauge.set(int(event.confirmed))
-        self.total_farmed_gauge.set(int(event.farmed))
+        self.total_balance_gauge.set(event.confirmed)
+        self.total_farmed_gauge.set(event.farmed)
 
     def update_signage_point_metrics(self, event: SignagePointEvent) -> None:
         self.signage_point_counter.inc()
+        self.signage_points_lifetime_gauge.inc()
         self.signage_point_index_gauge.set(event.signage_point_index)
-        self.last_signage_point = event
 
     def update_pool_state_metrics(self, event: PoolStateEvent) -> None:
         p2 = event.p2_singleton_puzzle_hash
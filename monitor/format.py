@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from chia.util.misc import format_bytes, format_minutes
 
 
@@ -25,9 +27,9 @@ def format_plot_size(plot_size: int) -> str:
     return f"🧺 Plot Size: {format_bytes(plot_size)}"
 
 
-def format_plot_delta_24h(count_delta: int, size_delta: int) -> str:
+def format_plot_delta_24h(count_delta: int, size_delta: int, period: str = "24h") -> str:
     size_prefix = "+" if size_delta > 0 else "-"
-    return f"🚜 Plot Change 24h: {count_delta:+} ({size_prefix}{format_bytes(abs(size_delta))})"
+    return f"🚜 Plot Change {period}: {count_delta:+} ({size_prefix}{format_bytes(abs(size_delta))})"
 
 
 def format_balance(balance: int) -> str:
@@ -38,6 +40,10 @@ def format_farmed(balance: int) -> str:
     return f"💸 Total Farmed: {balance/1e12:.5f} GL"
 
 
+def format_payment(amount: int) -> str:
+    return f"🌱 +{amount/1e12:.5f} GL"
+
+
 def format_space(space: int) -> str:
     return f"💾 Current Netspace: {format_bytes(space)}"
 
@@ -59,6 +65,22 @@ def format_full_node_count(full_node_count: int, node_type="Full Node") -> str:
     return f"📶 {node_type} Peer Count: {full_node_count}"
 
 
+def format_plot_delta(plots_added: int, plots_removed: int) -> str:
+    return f"🔀 Plot Changes: +{plots_added} / -{plots_removed}"
+
+
+def format_lost_directory(hostname: str, directory: str, plot_count: int) -> str:
+    return f"📁 {hostname}:{directory} ({plot_count} plots)"
+
+
+def format_lost_plot(hostname: str, filename: str) -> str:
+    return f"🌾 {hostname}:{filename}"
+
+
+def format_stale_harvester(hostname: str, plot_count: int, last_seen: datetime) -> str:
+    return f"🔌 {hostname}: {plot_count} plots, last seen {last_seen:%Y-%m-%d %H:%M:%S}"
+
+
 def format_hostname(hostname: str, fix_indent=False) -> str:
     indent = " " * (1 if fix_indent else 0)
     return f"🖥️ {indent}Host: {hostname}"
@@ -96,6 +118,22 @@ def format_proofs(proofs: int) -> str:
     return f"✅ Total Proofs found: {proofs}"
 
 
+def format_period_proofs(proofs: int, period: str) -> str:
+    return f"✅ Proofs found {period}: {proofs}"
+
+
+def format_period_farmed(amount: int, period: str) -> str:
+    return f"💸 Farmed {period}: {amount/1e12:.5f} GL"
+
+
+def format_period_received(amount: int, period: str) -> str:
+    return f"🏦 Received {period}: {amount/1e12:.5f} GL"
+
+
+def format_payouts_to_address(puzzle_hash: str, payouts: int, amount: int) -> str:
+    return f"  📬 To {puzzle_hash[:12]}…: {payouts} payouts, {amount/1e12:.5f} GL"
+
+
 def format_expected_time_to_win(minutes: int) -> str:
     return f"🕰️ Time To Win: {format_minutes(minutes)}"
 
@@ -2,15 +2,14 @@ import logging
 
 from monitor.database.events import (BlockchainStateEvent, GoldEvent, ConnectionsEvent, FarmingInfoEvent,
                                      HarvesterPlotsEvent, PoolStateEvent, PriceEvent, SignagePointEvent, WalletBalanceEvent)
-from monitor.database.queries import get_signage_point_ts
 from monitor.format import *
+from monitor.signage_points import SignagePointIndex
 
 
 class GoldLogger:
-    last_signage_point: SignagePointEvent = None
-
-    def __init__(self) -> None:
+    def __init__(self, signage_points: SignagePointIndex) -> None:
         self.log = logging.getLogger(__name__)
+        self.signage_points = signage_points
 
     def process_event(self, event: GoldEvent) -> None:
         if isinstance(event, HarvesterPlotsEvent):
@@ -36,6 +35,8 @@ class GoldLogger:
         self.log.info(format_portable_plot_count(event.portable_plot_count))
         self.log.info(format_og_plot_size(event.plot_size))
         self.log.info(format_portable_plot_size(event.portable_plot_size))
+        if event.plots_added or event.plots_removed:
+            self.log.info(format_plot_delta(event.plots_added, event.plots_removed))
         self.log.info(format_hostname(event.host, fix_indent=True))
 
     def update_farmer_metrics(self, event: FarmingInfoEvent):
@@ -45,15 +46,9 @@ class GoldLogger:
         self.log.info(format_plot_count(event.total_plots))
         self.log.info(format_passed_filter(event.passed_filter))
         self.log.info(format_proofs(event.proofs))
-        self.log.info(format_proofs(event.proofs))
-        if self.last_signage_point is None:
-            return
-        if self.last_signage_point.signage_point == event.signage_point:
-            signage_point_ts = self.last_signage_point.ts
-        else:
-            signage_point_ts = get_signage_point_ts(event.signage_point)
-        lookup_time = event.ts - signage_point_ts
-        self.log.info(format_lookup_time(lookup_time.total_seconds(), fix_indent=True))
+        lookup_time = self.signage_points.get_lookup_time(event)
+        if lookup_time is not None:
+            self.log.info(format_lookup_time(lookup_time.total_seconds(), fix_indent=True))
 
     def update_connection_metrics(self, event: ConnectionsEvent) -> None:
         self.log.info("-" * 64)
@@ -65,21 +60,20 @@ class GoldLogger:
         self.log.info("-" * 64)
         self.log.info(format_space(int(event.space)))
         self.log.info(format_diffculty(event.diffculty))
-        self.log.info(format_peak_height(int(event.peak_height), fix_indent=True))
+        self.log.info(format_peak_height(event.peak_height, fix_indent=True))
         self.log.info(format_synced(event.synced))
         self.log.info(format_mempool_size(event.mempool_size))
 
     def update_wallet_balance_metrics(self, event: WalletBalanceEvent) -> None:
         self.log.info("-" * 64)
-        self.log.info(format_balance(int(event.confirmed)))
-        self.log.info(format_farmed(int(event.farmed)))
+        self.log.info(format_balance(event.confirmed))
+        self.log.info(format_farmed(event.farmed))
 
     def update_signage_point_metrics(self, event: SignagePointEvent) -> None:
         self.log.info("-" * 64)
         self.log.info(format_signage_point_index(event.signage_point_index))
         self.log.info(format_challenge_hash(event.challenge_hash))
         self.log.info(format_signage_point(event.signage_point))
-        self.last_signage_point = event
 
     def update_pool_state_metrics(self, event: PoolStateEvent) -> None:
         self.log.info("-" * 64)
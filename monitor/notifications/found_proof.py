@@ -1,22 +1,25 @@
-from monitor.database import session
-from monitor.database.queries import get_proofs_found
+from monitor.database.events import FarmingInfoEvent
 from monitor.format import *
 from monitor.notifications.notification import Notification
 
 
 class FoundProofNotification(Notification):
-    last_proofs_found: int = None
+    """Alerts once for every farming info event with proofs, even if consecutive ones have proofs."""
+    events = (FarmingInfoEvent, )
+    proofs: int = 0
+
+    def update(self, event: FarmingInfoEvent) -> None:
+        if isinstance(event, FarmingInfoEvent):
+            self.proofs = event.proofs
 
     def condition(self) -> bool:
-        with session() as db_session:
-            proofs_found = get_proofs_found(db_session)
-        if proofs_found is not None and self.last_proofs_found is not None and proofs_found > self.last_proofs_found:
-            self.last_proofs_found = proofs_found
-            return True
-        else:
-            self.last_proofs_found = proofs_found
-            return False
+        return self.proofs > 0
+
+    def trigger(self) -> bool:
+        # Not coalesced, every proof is a separate find
+        return self.outbox.notify(title='** 🤑 Proof found! 🤑 **', body="Your farm found a new partial or full proof")
 
-    def trigger(self) -> None:
-        return self.apobj.notify(title='** 🤑 Proof found! 🤑 **',
-                                 body="Your farm found a new partial or full proof")
+    def run(self) -> None:
+        # Each event is evaluated once, so there is no firing state to latch or recover from
+        if self.condition():
+            self.trigger()
@@ -1,36 +1,84 @@
-from apprise.Apprise import Apprise
-from monitor.database import session
-from monitor.database.queries import get_plot_count
+import os
+from collections import defaultdict
+from typing import Dict, Set, Tuple
+
+from monitor.delivery import Outbox
+from monitor.database.events import ConnectionsEvent, GoldEvent, HarvesterPlotsEvent
 from monitor.format import *
 from monitor.notifications.notification import Notification
+from monitor.state import GoldState
+
+
+MAX_LISTED_PLOTS = 10
 
 
 class LostPlotsNotification(Notification):
+    # Connection events are polled independently, so a harvester that stopped reporting is noticed as well
+    events = (HarvesterPlotsEvent, ConnectionsEvent)
     last_plot_count: int
     highest_plot_count: int
     alert_threshold: int
+    removed_plots: Dict[str, Tuple[str, str]]
+    added_plot_ids: Set[str]
 
-    def __init__(self, apobj: Apprise, alert_threshold: int) -> None:
-        super().__init__(apobj)
+    def __init__(self, outbox: Outbox, state: GoldState, alert_threshold: int) -> None:
+        super().__init__(outbox, state)
         self.last_plot_count = None
         self.highest_plot_count = None
         self.alert_threshold = alert_threshold
+        self.removed_plots = {}
+        self.added_plot_ids = set()
+
+    def update(self, event: GoldEvent) -> None:
+        """Keeps track of the plots removed since the highest plot count, unless another harvester farms them."""
+        if isinstance(event, HarvesterPlotsEvent):
+            for plot in event.removed_plots:
+                self.removed_plots[plot["plot_id"]] = (event.host, plot["filename"])
+            self.added_plot_ids.update(plot["plot_id"] for plot in event.added_plots)
 
     def condition(self) -> bool:
-        with session() as db_session:
-            self.last_plot_count = get_plot_count(db_session)
+        self.last_plot_count = self.state.get_plot_count()
+        if self.last_plot_count is None:
+            if not self.state.get_stale_harvesters():
+                # No harvester reported yet, keep the baseline until one does
+                return self.firing
+            # Every harvester stopped reporting, so none of their plots are farmed
+            self.last_plot_count = 0
 
-        if self.last_plot_count is not None and self.highest_plot_count is not None and self.last_plot_count < self.highest_plot_count - self.alert_threshold:
+        if self.highest_plot_count is not None and self.last_plot_count < self.highest_plot_count - self.alert_threshold:
             return True
         else:
             self.highest_plot_count = self.last_plot_count
+            self.removed_plots.clear()
+            self.added_plot_ids.clear()
             return False
 
-    def trigger(self) -> None:
-        return self.apobj.notify(title='** 🚨 Farmer Lost Plots! 🚨 **',
-                                 body="It seems like your farmer lost some plots\n" +
-                                 f"Expected: {self.highest_plot_count}, Found: {self.last_plot_count}\n")
+    def trigger(self) -> bool:
+        lost_plots = sorted(plot for plot_id, plot in self.removed_plots.items() if plot_id not in self.added_plot_ids)
+        directories = defaultdict(int)
+        for host, filename in lost_plots:
+            directories[(host, os.path.dirname(filename))] += 1
+        body = [
+            "It seems like your farmer lost some plots",
+            f"Expected: {self.highest_plot_count}, Found: {self.last_plot_count}"
+        ]
+        stale_harvesters = self.state.get_stale_harvesters()
+        if stale_harvesters:
+            body.append("Harvesters not reporting:")
+            body.extend(
+                format_stale_harvester(event.host, event.plot_count + event.portable_plot_count, event.ts)
+                for event in sorted(stale_harvesters, key=lambda event: event.host))
+        if directories:
+            body.append("Missing directories:")
+            body.extend(
+                format_lost_directory(host, directory, count) for (host, directory), count in directories.items())
+            body.append("Missing plots:")
+            body.extend(format_lost_plot(host, filename) for host, filename in lost_plots[:MAX_LISTED_PLOTS])
+            if len(lost_plots) > MAX_LISTED_PLOTS:
+                body.append(f"... and {len(lost_plots) - MAX_LISTED_PLOTS} more")
+        return self.outbox.notify(title='** 🚨 Farmer Lost Plots! 🚨 **', body="\n".join(body) + "\n", key="plots")
 
-    def recover(self) -> None:
-        return self.apobj.notify(title='** ✅ Farmer Plots recoverd! ✅ **',
-                                 body="Your farmer's plot count has recovered to its previous value")
+    def recover(self) -> bool:
+        return self.outbox.notify(title='** ✅ Farmer Plots recoverd! ✅ **',
+                                  body="Your farmer's plot count has recovered to its previous value",
+                                  key="plots")
@@ -1,20 +1,22 @@
-from monitor.database import session
-from monitor.database.queries import get_sync_status
+from monitor.database.events import BlockchainStateEvent
 from monitor.format import *
 from monitor.notifications.notification import Notification
 
 
 class LostSyncNotification(Notification):
+    events = (BlockchainStateEvent, )
+
     def condition(self) -> bool:
-        with session() as db_session:
-            sync_status = get_sync_status(db_session)
+        sync_status = self.state.get_sync_status()
         return sync_status is not None and not sync_status
 
-    def trigger(self) -> None:
-        return self.apobj.notify(
+    def trigger(self) -> bool:
+        return self.outbox.notify(
             title='** 🚨 Farmer Lost Sync! 🚨 **',
-            body="It seems like your farmer lost its connection to the Gold Network")
+            body="It seems like your farmer lost its connection to the Gold Network",
+            key="sync")
 
-    def recover(self) -> None:
-        return self.apobj.notify(title='** ✅ Farmer Synced! ✅ **',
-                                 body="Your farmer is successfully synced to the Gold Network again")
+    def recover(self) -> bool:
+        return self.outbox.notify(title='** ✅ Farmer Synced! ✅ **',
+                                  body="Your farmer is successfully synced to the Gold Network again",
+                                  key="sync")
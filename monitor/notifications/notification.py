@@ -1,16 +1,39 @@
 import logging
+from datetime import datetime
+from typing import Optional, Tuple, Type
 
-from apprise import Apprise
+from monitor.delivery import Outbox
+from monitor.database.events import GoldEvent
+from monitor.state import GoldState
 
 
 class Notification:
-    apobj: Apprise
+    """Alert or status message, evaluated whenever one of its `events` arrives.
+
+    Notifications take everything they need from the in-memory state, or keep track of it themselves in `update`,
+    which sees every event. Only timed notifications may read the DB, in `prepare`, which runs in the executor.
+    """
+    outbox: Outbox
+    state: GoldState
     firing: bool = False
+    events: Tuple[Type[GoldEvent], ...] = ()
 
-    def __init__(self, apobj: Apprise) -> None:
-        self.apobj = apobj
+    def __init__(self, outbox: Outbox, state: GoldState) -> None:
+        self.outbox = outbox
+        self.state = state
         self.log = logging.getLogger(__name__)
 
+    def update(self, event: GoldEvent) -> None:
+        pass
+
+    def next_run(self) -> Optional[datetime]:
+        """Time at which a timed notification is due, None for notifications driven by events only."""
+        return None
+
+    async def prepare(self) -> None:
+        """Loads what a timed notification needs before it runs, e.g. from the DB, without blocking the event loop."""
+        pass
+
     def condition(self) -> bool:
         raise NotImplementedError
 
@@ -1,25 +1,27 @@
-from monitor.database import session
-from monitor.database.queries import get_current_balance, get_last_payment
+from monitor.database.events import WalletTransactionEvent
 from monitor.format import *
 from monitor.notifications.notification import Notification
 
 
 class PaymentNotification(Notification):
-    last_mojos: int = None
+    """Alerts once for every payment in the wallet transaction ledger, even if several arrive between runs."""
+    events = (WalletTransactionEvent, )
+
+    def __init__(self, outbox, state) -> None:
+        super().__init__(outbox, state)
+        self.payments = []
+        state.subscribe_payments()
 
     def condition(self) -> bool:
-        with session() as db_session:
-            current_mojos = get_current_balance(db_session)
-        if current_mojos is not None and self.last_mojos is not None and current_mojos > self.last_mojos:
-            self.last_mojos = current_mojos
-            return True
-        else:
-            self.last_mojos = current_mojos
-            return False
+        self.payments.extend(self.state.pop_payments())
+        return len(self.payments) > 0
+
+    def trigger(self) -> bool:
+        return self.outbox.notify(title='** 🤑 Payment received! 🤑 **',
+                                  body="Your wallet received a new payment\n" + \
+                                      "\n".join(format_payment(payment.amount) for payment in self.payments))
 
-    def trigger(self) -> None:
-        with session() as db_session:
-            last_payment_mojos = get_last_payment(db_session)
-        return self.apobj.notify(title='** 🤑 Payment received! 🤑 **',
-                                 body="Your wallet received a new payment\n" + \
-                                     f"🌱 +{last_payment_mojos/1e12:.5f} GL")
+    def run(self) -> None:
+        # Every batch of payments is queued, instead of firing only once until the condition recovers
+        if self.condition() and self.trigger():
+            self.payments = []
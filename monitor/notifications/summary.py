@@ -1,87 +1,143 @@
+import asyncio
 from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy.engine import Row
 
-from apprise import Apprise
 from monitor.database import session
-from monitor.database.queries import (get_blockchain_state, get_connections, get_farming_start,
-                                      get_og_plot_count, get_og_plot_size, get_passed_filters_per_minute,
-                                      get_plot_delta, get_portable_plot_count, get_portable_plot_size,
-                                      get_proofs_found, get_signage_points_per_minute,
-                                      get_wallet_balance)
+from monitor.database.queries import get_payouts, get_summary_start, get_summary_window
+from monitor.delivery import Outbox
 from monitor.format import *
 from monitor.notifications.notification import Notification
+from monitor.state import GoldState
 
 SECONDS_PER_BLOCK = (24 * 3600) / 4608
+PLOT_DELTA_PERIOD = timedelta(hours=24)
 
 
 class SummaryNotification(Notification):
+    """Farm status sent on a timer.
+
+    The report is built from one consistent snapshot of the in-memory state, plus a single query for everything
+    that covers the summary period, which is served by the rollups and the plot inventory. That way a daily or
+    weekly report costs the same as an hourly one. The query runs in `prepare`, off the event loop.
+    """
     summary_interval: timedelta
     startup_delay: timedelta
     last_summary_ts: datetime
+    title: str
+    period: Optional[str]
+    window: Optional[Row]
+    window_start: Optional[datetime]
+    payouts: List[Tuple[str, int, int]]
 
-    def __init__(self, apobj: Apprise, summary_interval_minutes: int) -> None:
-        super().__init__(apobj)
+    def __init__(self,
+                 outbox: Outbox,
+                 state: GoldState,
+                 summary_interval_minutes: int,
+                 title: str = "Farm Status",
+                 period: Optional[str] = None) -> None:
+        super().__init__(outbox, state)
         self.startup_delay = timedelta(seconds=30)
         self.summary_interval = timedelta(minutes=summary_interval_minutes)
         self.last_summary_ts: datetime = datetime.now() - self.summary_interval + self.startup_delay
+        self.title = title
+        self.period = period
+        self.window = None
+        self.window_start = None
+        self.payouts = []
+
+    def next_run(self) -> Optional[datetime]:
+        return self.last_summary_ts + self.summary_interval
 
     def condition(self) -> bool:
-        if datetime.now() - self.last_summary_ts > self.summary_interval:
+        if datetime.now() - self.last_summary_ts >= self.summary_interval:
             return True
         else:
             return False
 
-    def trigger(self) -> None:
+    def get_window(self, start: datetime, plot_start: datetime) -> Tuple[Row, List[Tuple[str, int, int]]]:
         with session() as db_session:
-            last_state = get_blockchain_state(db_session)
-            last_balance = get_wallet_balance(db_session)
-            last_connections = get_connections(db_session)
-            proofs_found = get_proofs_found(db_session)
-            farming_start = get_farming_start(db_session)
-            last_og_plot_count = get_og_plot_count(db_session)
-            last_portable_plot_count = get_portable_plot_count(db_session)
-            last_og_plot_size = get_og_plot_size(db_session)
-            last_portable_plot_size = get_portable_plot_size(db_session)
-            plot_count_delta, plot_size_delta = get_plot_delta(db_session)
-
-            signage_points_per_min = None
-            passed_filters_per_min = None
-            if farming_start is not None:
-                farming_since: timedelta = datetime.now() - farming_start
-                interval = min(farming_since, self.summary_interval)
-                if interval.seconds > 0:
-                    signage_points_per_min = get_signage_points_per_minute(db_session, interval)
-                    passed_filters_per_min = get_passed_filters_per_minute(db_session, interval)
-
-        if all(v is not None for v in [
-                last_og_plot_count, last_portable_plot_count, last_og_plot_size, last_portable_plot_size,
-                last_balance, last_state, last_connections, proofs_found, signage_points_per_min,
-                passed_filters_per_min
+            window = get_summary_window(db_session, start, plot_start)
+            payouts = get_payouts(db_session, start) if self.period is not None else []
+            return window, payouts
+
+    async def prepare(self) -> None:
+        self.window = None
+        farming_start = self.state.get_snapshot().farming_start
+        if not self.condition() or farming_start is None:
+            return
+        now = datetime.now()
+        start = get_summary_start(max(farming_start, now - self.summary_interval))
+        plot_start = now - max(self.summary_interval, PLOT_DELTA_PERIOD)
+        loop = asyncio.get_running_loop()
+        self.window, self.payouts = await loop.run_in_executor(None, self.get_window, start, plot_start)
+        self.window_start = start
+
+    def trigger(self) -> bool:
+        window = self.window
+        if window is None:
+            return False
+        snapshot = self.state.get_snapshot()
+        last_state = snapshot.blockchain_state
+        last_balance = snapshot.wallet_balance
+        last_connections = snapshot.connections
+        last_og_plot_count = snapshot.sum_harvesters("plot_count")
+        last_portable_plot_count = snapshot.sum_harvesters("portable_plot_count")
+        last_og_plot_size = snapshot.sum_harvesters("plot_size")
+        last_portable_plot_size = snapshot.sum_harvesters("portable_plot_size")
+        if any(v is None for v in [
+                last_og_plot_count, last_portable_plot_count, last_og_plot_size, last_portable_plot_size, last_balance,
+                last_state, last_connections, snapshot.proofs_found
         ]):
-            proportion = (last_og_plot_size + last_portable_plot_size) / int(last_state.space)
-            try:
-                expected_minutes_to_win = int((SECONDS_PER_BLOCK / 60) / proportion)
-            except ZeroDivisionError:
-                expected_minutes_to_win = 0
-            summary = "\n".join([
-                format_og_plot_count(last_og_plot_count),
-                format_portable_plot_count(last_portable_plot_count),
-                format_og_plot_size(last_og_plot_size),
-                format_portable_plot_size(last_portable_plot_size),
-                format_plot_delta_24h(plot_count_delta, plot_size_delta),
-                format_signage_points_per_min(signage_points_per_min),
-                format_passed_filter_per_min(passed_filters_per_min),
-                format_proofs(proofs_found),
-                format_balance(int(last_balance.confirmed)),
-                format_expected_time_to_win(expected_minutes_to_win),
-                format_space(int(last_state.space)),
-                format_peak_height(last_state.peak_height),
-                format_mempool_size(last_state.mempool_size),
-                format_full_node_count(last_connections.full_node_count),
-                format_synced(last_state.synced),
-            ])
-            sent = self.apobj.notify(title='** 👨‍🌾 Farm Status 👩‍🌾 **', body=summary)
-            if sent:
-                self.last_summary_ts = datetime.now()
-                return True
+            return False
+
+        plot_delta_period = max(self.summary_interval, PLOT_DELTA_PERIOD)
+        minutes = (datetime.now() - self.window_start).total_seconds() / 60
+        if minutes <= 0:
+            return False
+
+        proportion = (last_og_plot_size + last_portable_plot_size) / int(last_state.space)
+        try:
+            expected_minutes_to_win = int((SECONDS_PER_BLOCK / 60) / proportion)
+        except ZeroDivisionError:
+            expected_minutes_to_win = 0
+        lines = [
+            format_og_plot_count(last_og_plot_count),
+            format_portable_plot_count(last_portable_plot_count),
+            format_og_plot_size(last_og_plot_size),
+            format_portable_plot_size(last_portable_plot_size),
+            format_plot_delta_24h(window.plots_added - window.plots_removed,
+                                  window.plot_size_added - window.plot_size_removed,
+                                  self.period if plot_delta_period > PLOT_DELTA_PERIOD else "24h"),
+            format_signage_points_per_min(window.signage_points / minutes),
+            format_passed_filter_per_min(window.passed_filter / minutes),
+            format_proofs(snapshot.proofs_found),
+        ]
+        if self.period is not None:
+            lines.append(format_period_proofs(window.proofs, self.period))
+            lines.append(format_period_farmed(window.farmed, self.period))
+            lines.append(format_period_received(window.received, self.period))
+            lines.extend(format_payouts_to_address(*payout) for payout in self.payouts)
+        lines.extend([
+            format_balance(last_balance.confirmed),
+            format_expected_time_to_win(expected_minutes_to_win),
+            format_space(int(last_state.space)),
+            format_peak_height(last_state.peak_height),
+            format_mempool_size(last_state.mempool_size),
+            format_full_node_count(last_connections.full_node_count),
+            format_synced(last_state.synced),
+        ])
+        sent = self.outbox.notify(title=f'** 👨‍🌾 {self.title} 👩‍🌾 **',
+                                  body="\n".join(lines),
+                                  key=f"summary:{self.summary_interval}")
+        if sent:
+            self.last_summary_ts = datetime.now()
+            return True
 
         return False
+
+    def run(self) -> None:
+        # A status is no alert, so it never fires and recovers, but is sent whenever it is due
+        if self.condition():
+            self.trigger()
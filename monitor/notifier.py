@@ -1,55 +1,136 @@
+import asyncio
 import logging
-from threading import Thread
-from time import sleep
+from datetime import datetime
+from typing import Dict, List, Optional
 
 from apprise import Apprise, AppriseAsset
-from sqlalchemy.exc import OperationalError
 
-from monitor.notifications import (FoundProofNotification, LostPlotsNotification, LostSyncNotification,
+from monitor.database.events import GoldEvent
+from monitor.delivery import DeliveryQueue
+from monitor.notifications import (FoundProofNotification, LostPlotsNotification, LostSyncNotification, Notification,
                                    PaymentNotification, SummaryNotification)
+from monitor.rules import Rule, RuleEngine
+from monitor.signage_points import SignagePointIndex
+from monitor.state import GoldState
+
+RULE_TICK_INTERVAL = 1
+DAILY_SUMMARY_MINUTES = 24 * 60
+WEEKLY_SUMMARY_MINUTES = 7 * 24 * 60
 
 
 class Notifier:
-    asset = AppriseAsset(async_mode=False)
+    """Evaluates notifications as soon as a relevant event arrives from the dispatcher.
+
+    Timed notifications, like the farm summary, are run by a timer task each. A timed notification that wasn't
+    ready to be sent is retried every `retry_interval` seconds. Messages are handed to the delivery queue, so
+    evaluating notifications never waits for a notification service. The alert rules from the config are
+    evaluated along with the built-in notifications.
+    """
+    # Sends notifications in the default executor, so they don't block the event loop
+    asset = AppriseAsset(async_mode=True)
     status_apobj = Apprise(asset=asset)
     alert_apobj = Apprise(asset=asset)
-    refresh_interval: int
-    stopped = False
+    retry_interval: int
+    timers: List[asyncio.Task]
 
-    def __init__(self, status_url: str, alert_url: str, status_interval_minutes: int,
-                 lost_plots_alert_threshold: int, disable_proof_found_alert: bool,
-                 refresh_interval_seconds: int) -> None:
+    def __init__(self, state: GoldState, status_url: str, alert_url: str, status_interval_minutes: int, daily_summary: bool,
+                 weekly_summary: bool, lost_plots_alert_threshold: int, disable_proof_found_alert: bool,
+                 retry_interval_seconds: int, delivery_workers: int, delivery_max_retries: int,
+                 delivery_backoff_seconds: float, delivery_max_backoff_seconds: float, delivery_rate_limit_seconds: float,
+                 rules_config: List[Dict], signage_points: SignagePointIndex) -> None:
         self.log = logging.getLogger(__name__)
+        self.state = state
         self.status_apobj.add(status_url)
         self.alert_apobj.add(alert_url)
-        self.refresh_interval = refresh_interval_seconds
+        self.retry_interval = retry_interval_seconds
+        self.timers = []
+        destinations = {"status": self.status_apobj, "alert": self.alert_apobj}
+        self.delivery = DeliveryQueue(destinations, delivery_workers, delivery_max_retries, delivery_backoff_seconds,
+                                      delivery_max_backoff_seconds, delivery_rate_limit_seconds)
+        status_outbox = self.delivery.outbox("status")
+        alert_outbox = self.delivery.outbox("alert")
         self.notifications = [
-            LostSyncNotification(self.alert_apobj),
-            LostPlotsNotification(self.alert_apobj, lost_plots_alert_threshold),
-            PaymentNotification(self.alert_apobj),
-            SummaryNotification(self.status_apobj, status_interval_minutes),
+            LostSyncNotification(alert_outbox, state),
+            LostPlotsNotification(alert_outbox, state, lost_plots_alert_threshold),
+            PaymentNotification(alert_outbox, state),
+            SummaryNotification(status_outbox, state, status_interval_minutes),
         ]
+        if daily_summary:
+            self.notifications.append(
+                SummaryNotification(status_outbox, state, DAILY_SUMMARY_MINUTES, "Daily Farm Report", "24h"))
+        if weekly_summary:
+            self.notifications.append(
+                SummaryNotification(status_outbox, state, WEEKLY_SUMMARY_MINUTES, "Weekly Farm Report", "7d"))
         if not disable_proof_found_alert:
-            self.notifications.append(FoundProofNotification(self.status_apobj))
+            self.notifications.append(FoundProofNotification(status_outbox, state))
+        self.rules = RuleEngine(rules_config, signage_points)
+        for rule in self.rules.rules:
+            if rule.destination not in destinations:
+                raise ValueError(f"Unknown destination '{rule.destination}' in alert rule '{rule.name}'. "
+                                 f"Use one of {list(destinations)}")
+        self.rule_outboxes = {destination: self.delivery.outbox(destination) for destination in destinations}
+
+    def process_event(self, event: GoldEvent) -> None:
+        self.state.process_event(event)
+        for notification in self.notifications:
+            notification.update(event)
+            if isinstance(event, notification.events):
+                self.run(notification)
+        try:
+            changes = self.rules.process_event(event)
+        except Exception as e:
+            self.log.warning(f"Failed to evaluate alert rules for {type(event).__name__}. {type(e).__name__}: {e}")
+            return
+        for rule, group, firing, value in changes:
+            self.notify_rule(rule, group, firing, value)
 
-    def task(self) -> None:
+    def notify_rule(self, rule: Rule, group: Optional[str], firing: bool, value: Optional[float]) -> None:
+        title = f"** 🚨 {rule.name} 🚨 **" if firing else f"** ✅ {rule.name} resolved ✅ **"
+        self.rule_outboxes[rule.destination].notify(title=title,
+                                                    body=rule.describe(group, value),
+                                                    key=f"rule:{rule.name}:{group}")
+
+    async def rule_task(self) -> None:
         while True:
+            await asyncio.sleep(RULE_TICK_INTERVAL)
             try:
-                for notification in self.notifications:
-                    notification.run()
-                sleep(self.refresh_interval)
-            except OperationalError:
-                logging.exception(
-                    f"Failed to retrieve event from DB. Please initialize DB using: 'pipenv run alembic upgrade head'"
-                )
-                break
-            if self.stopped:
-                break
+                for rule, group, firing, value in self.rules.tick(datetime.now()):
+                    self.notify_rule(rule, group, firing, value)
+            except Exception as e:
+                self.log.warning(f"Failed to evaluate alert rules. {type(e).__name__}: {e}")
+
+    def run(self, notification: Notification) -> None:
+        try:
+            notification.run()
+        except Exception as e:
+            self.log.warning(f"Failed to run {type(notification).__name__}. {type(e).__name__}: {e}")
+
+    async def prepare(self, notification: Notification) -> None:
+        try:
+            await notification.prepare()
+        except Exception as e:
+            self.log.warning(f"Failed to prepare {type(notification).__name__}. {type(e).__name__}: {e}")
+
+    async def timer(self, notification: Notification) -> None:
+        while True:
+            delay = (notification.next_run() - datetime.now()).total_seconds()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.prepare(notification)
+            self.run(notification)
+            if notification.next_run() <= datetime.now():
+                await asyncio.sleep(self.retry_interval)
 
     def start(self) -> None:
-        self.thread = Thread(target=self.task)
-        self.thread.start()
+        self.delivery.start()
+        self.timers = [
+            asyncio.create_task(self.timer(notification)) for notification in self.notifications
+            if notification.next_run() is not None
+        ]
+        if self.rules.rules:
+            self.timers.append(asyncio.create_task(self.rule_task()))
 
-    def stop(self) -> None:
-        self.stopped = True
-        self.thread.join()
+    async def stop(self) -> None:
+        for timer in self.timers:
+            timer.cancel()
+        await self.delivery.stop()
@@ -0,0 +1,69 @@
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Tuple
+
+PARTIALS_WINDOW = timedelta(hours=24)
+
+
+class PartialWindow:
+    """Running sum of the points of all partials within the last 24 hours.
+
+    The farmer reports every partial of the last 24 hours on each poll, in the order they were submitted. Only
+    entries newer than the high-water mark are added, so each partial is processed exactly once.
+    """
+    partials: Deque[Tuple[datetime, int]]
+    points: int
+    cursor: Optional[datetime]
+
+    def __init__(self) -> None:
+        self.partials = deque()
+        self.points = 0
+        self.cursor = None
+
+    def add(self, ts: datetime, points: int) -> None:
+        self.partials.append((ts, points))
+        self.points += points
+        if self.cursor is None or ts > self.cursor:
+            self.cursor = ts
+
+    def update(self, partials: List) -> List[Tuple[datetime, int]]:
+        """Adds all partials after the high-water mark and returns them."""
+        new_partials = []
+        for timestamp, points in reversed(partials):
+            # Rounded to milliseconds like the timestamps in the DB
+            ts = datetime.fromtimestamp(round(float(timestamp) * 1000) / 1000)
+            if self.cursor is not None and ts <= self.cursor:
+                break
+            new_partials.append((ts, points))
+        new_partials.reverse()
+        for ts, points in new_partials:
+            self.add(ts, points)
+        return new_partials
+
+    def total(self, now: datetime) -> int:
+        cutoff = now - PARTIALS_WINDOW
+        while self.partials and self.partials[0][0] < cutoff:
+            self.points -= self.partials.popleft()[1]
+        return self.points
+
+
+class PoolPartials:
+    """Found and acknowledged partials of a single pool launcher."""
+    found: PartialWindow
+    acknowledged: PartialWindow
+
+    def __init__(self) -> None:
+        self.found = PartialWindow()
+        self.acknowledged = PartialWindow()
+
+    def update(self, points_found_24h: List, points_acknowledged_24h: List) -> List[Dict]:
+        """Processes the partial lists reported by the farmer and returns the new partials."""
+        return [{
+            "ts": ts,
+            "points": points,
+            "acknowledged": False
+        } for ts, points in self.found.update(points_found_24h)] + [{
+            "ts": ts,
+            "points": points,
+            "acknowledged": True
+        } for ts, points in self.acknowledged.update(points_acknowledged_24h)]
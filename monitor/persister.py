@@ -0,0 +1,145 @@
+import logging
+import queue
+from collections import defaultdict
+from datetime import datetime
+from threading import Event, Thread
+from time import monotonic
+from typing import Dict, List, Optional
+
+from sqlalchemy import Table
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql.expression import insert
+
+from monitor.database import GoldEvent, engine
+from monitor.database.harvesters import upsert_harvesters
+from monitor.database.inventory import apply_plot_changes
+from monitor.database.partials import insert_partials
+from monitor.database.totals import increment_totals
+from monitor.exporter import GoldExporter
+
+STOP = object()
+# Backoff between attempts to write a batch while another writer holds the DB lock
+LOCKED_BACKOFF_SECONDS = 1
+MAX_LOCKED_BACKOFF_SECONDS = 60
+
+
+def is_locked(error: OperationalError) -> bool:
+    message = str(error.orig)
+    return "locked" in message or "busy" in message
+
+
+class GoldPersister:
+    """Write-behind persistence stage for the aggregator.
+
+    Events are buffered in a thread-safe queue and written from a worker thread, one transaction per
+    `batch_size` events or `flush_interval_ms` milliseconds, whichever comes first. A batch that can't be written
+    is logged and dropped, unless the DB itself is unusable, in which case the persister fails. While another writer
+    holds the lock beyond the busy timeout, the batch is retried with backoff and new events wait in the queue.
+    `flushed_ts` is the last time the worker had written every event it received, so consumers of the history, like
+    the rollups, know up to which time it is complete.
+    """
+    batch_size: int
+    flush_interval: float
+    failed: bool = False
+    flushed_ts: Optional[datetime] = None
+
+    def __init__(self, batch_size: int, flush_interval_ms: int) -> None:
+        self.log = logging.getLogger(__name__)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.queue = queue.Queue()
+        self.thread = None
+        self.stopping = Event()
+        GoldExporter.persister_queue_depth_gauge.set_function(self.queue.qsize)
+
+    def process_event(self, event: GoldEvent) -> None:
+        # Nobody drains the queue anymore once the worker gave up
+        if not self.failed:
+            self.queue.put(event)
+
+    def flush(self, batch: List[GoldEvent]) -> None:
+        rows: Dict[Table, List[Dict]] = defaultdict(list)
+        for event in batch:
+            table = event.__table__
+            rows[table].append({
+                column.key: getattr(event, column.key)
+                for column in table.columns if not column.primary_key or getattr(event, column.key) is not None
+            })
+        start = monotonic()
+        with engine.begin() as connection:
+            for table, values in rows.items():
+                connection.execute(insert(table), values)
+            increment_totals(connection, batch)
+            apply_plot_changes(connection, batch)
+            upsert_harvesters(connection, batch)
+            insert_partials(connection, batch)
+        GoldExporter.persist_flush_duration.observe(monotonic() - start)
+        GoldExporter.persist_flush_size.observe(len(batch))
+        now = datetime.now()
+        for event in batch:
+            GoldExporter.event_latency.labels(type(event).__name__, "persisted").observe((now - event.ts).total_seconds())
+
+    def flush_locked(self, batch: List[GoldEvent]) -> None:
+        """Flushes the batch, retrying with backoff as long as the DB is locked by another writer.
+
+        Once the persister is stopping, a batch that still can't be written is given up, so shutdown doesn't hang.
+        """
+        backoff = LOCKED_BACKOFF_SECONDS
+        while True:
+            try:
+                self.flush(batch)
+                return
+            except OperationalError as e:
+                if not is_locked(e) or self.stopping.is_set():
+                    raise
+                self.log.warning(f"DB is locked, retrying batch of {len(batch)} events in {backoff}s. {e.orig}")
+            self.stopping.wait(backoff)
+            backoff = min(2 * backoff, MAX_LOCKED_BACKOFF_SECONDS)
+
+    def task(self) -> None:
+        batch = []
+        deadline = None
+        stopped = False
+        while not stopped:
+            # Taken before checking the queue, so an event put in the meantime is never counted as written
+            now = datetime.now()
+            if not batch and self.queue.empty():
+                self.flushed_ts = now
+            timeout = None if deadline is None else max(0, deadline - monotonic())
+            try:
+                event = self.queue.get(timeout=timeout)
+                if event is STOP:
+                    stopped = True
+                else:
+                    batch.append(event)
+                    if deadline is None:
+                        deadline = monotonic() + self.flush_interval
+            except queue.Empty:
+                pass
+            if batch and (stopped or len(batch) >= self.batch_size or monotonic() >= deadline):
+                try:
+                    self.flush_locked(batch)
+                except OperationalError as e:
+                    if is_locked(e):
+                        self.log.error(f"DB is still locked on shutdown. Dropping batch of {len(batch)} events.")
+                        break
+                    logging.exception(
+                        f"Failed to persist event to DB. Please initialize DB using: 'pipenv run alembic upgrade head'")
+                    self.failed = True
+                    break
+                except Exception:
+                    # A batch the DB rejects, e.g. for a constraint, would fail again, so it is dropped
+                    self.log.exception(f"Failed to persist batch of {len(batch)} events. Dropping it.")
+                batch = []
+                deadline = None
+
+    def start(self) -> None:
+        self.thread = Thread(target=self.task, name="persister", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        if self.thread is None:
+            return
+        self.queue.put(STOP)
+        self.stopping.set()
+        self.thread.join()
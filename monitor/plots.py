@@ -0,0 +1,111 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+PLOT_FIELDS = ("plot_id", "filename", "file_size", "size", "pool_contract_puzzle_hash")
+
+
+class PlotIndex:
+    """Plots farmed by a single harvester, keyed by plot_id.
+
+    Snapshots of the harvester's plot list are diffed against the index, so counts and sizes are maintained
+    incrementally and only added or removed plots need to be looked at. The index is seeded from the plot
+    inventory in the DB, so plots that changed while the monitor wasn't running are picked up as well.
+    """
+    plots: Dict[str, Dict]
+    synced: bool
+
+    def __init__(self) -> None:
+        self.plots = {}
+        self.synced = False
+        self.og_plot_count = 0
+        self.og_plot_size = 0
+        self.portable_plot_count = 0
+        self.portable_plot_size = 0
+
+    def __len__(self) -> int:
+        return len(self.plots)
+
+    @property
+    def total_size(self) -> int:
+        return self.og_plot_size + self.portable_plot_size
+
+    def matches(self, plot_count: int, total_size: int) -> bool:
+        return self.synced and len(self.plots) == plot_count and self.total_size == total_size
+
+    def update(self, plots: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Replaces the index with a new snapshot and returns the added and removed plots."""
+        snapshot = {plot["plot_id"]: plot for plot in plots}
+        removed = [self.plots[plot_id] for plot_id in self.plots.keys() - snapshot.keys()]
+        for plot in removed:
+            self.remove(plot)
+        added = [self.add(snapshot[plot_id]) for plot_id in snapshot.keys() - self.plots.keys()]
+        self.synced = True
+        return added, removed
+
+    def add(self, plot: Dict) -> Dict:
+        plot = {field: plot[field] for field in PLOT_FIELDS}
+        self.plots[plot["plot_id"]] = plot
+        if plot["pool_contract_puzzle_hash"] is None:
+            self.og_plot_count += 1
+            self.og_plot_size += plot["file_size"]
+        else:
+            self.portable_plot_count += 1
+            self.portable_plot_size += plot["file_size"]
+        return plot
+
+    def remove(self, plot: Dict) -> None:
+        del self.plots[plot["plot_id"]]
+        if plot["pool_contract_puzzle_hash"] is None:
+            self.og_plot_count -= 1
+            self.og_plot_size -= plot["file_size"]
+        else:
+            self.portable_plot_count -= 1
+            self.portable_plot_size -= plot["file_size"]
+
+
+class DuplicatePlotIndex:
+    """Hosts farming each plot_id across all harvesters.
+
+    It is fed with the added and removed plots of every harvester, so the number of plots shared by each pair of
+    hosts is maintained without rescanning the full plot lists. Only hosts currently connected to the farmer are
+    indexed, so a plot moved away from a harvester that is gone isn't reported as a duplicate.
+    """
+    filenames: Dict[str, Dict[str, str]]
+    pair_counts: Dict[Tuple[str, str], int]
+    hosts: Set[str]
+
+    def __init__(self) -> None:
+        self.filenames = {}
+        self.pair_counts = defaultdict(int)
+        self.hosts = set()
+
+    def add(self, host: str, plots: Iterable[Dict]) -> List[Tuple[Dict, str, str]]:
+        """Adds plots farmed by a host and returns each new duplicate with the other host and its filename."""
+        self.hosts.add(host)
+        duplicates = []
+        for plot in plots:
+            filenames = self.filenames.setdefault(plot["plot_id"], {})
+            for other_host, other_filename in filenames.items():
+                if other_host != host:
+                    self.pair_counts[tuple(sorted((host, other_host)))] += 1
+                    duplicates.append((plot, other_host, other_filename))
+            filenames[host] = plot["filename"]
+        return duplicates
+
+    def remove(self, host: str, plots: Iterable[Dict]) -> None:
+        for plot in plots:
+            filenames = self.filenames.get(plot["plot_id"], {})
+            if filenames.pop(host, None) is None:
+                continue
+            for other_host in filenames:
+                pair = tuple(sorted((host, other_host)))
+                self.pair_counts[pair] -= 1
+                if self.pair_counts[pair] == 0:
+                    del self.pair_counts[pair]
+            if not filenames:
+                del self.filenames[plot["plot_id"]]
+
+    def evict(self, host: str, plots: Iterable[Dict]) -> None:
+        """Removes all plots of a host that isn't connected anymore."""
+        self.remove(host, plots)
+        self.hosts.discard(host)
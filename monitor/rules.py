@@ -0,0 +1,367 @@
+import math
+import operator
+import re
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Type
+
+from sqlalchemy import Boolean, Integer
+
+from monitor.database.events import (BlockchainStateEvent, ConnectionsEvent, FarmingInfoEvent, GoldEvent,
+                                     HarvesterPlotsEvent, PoolStateEvent, PriceEvent, SignagePointEvent, WalletBalanceEvent,
+                                     WalletTransactionEvent)
+from monitor.signage_points import SignagePointIndex
+
+EVENT_TYPES: Dict[str, Type[GoldEvent]] = {
+    event_type.__name__: event_type
+    for event_type in (BlockchainStateEvent, ConnectionsEvent, FarmingInfoEvent, HarvesterPlotsEvent, PoolStateEvent,
+                       PriceEvent, SignagePointEvent, WalletBalanceEvent, WalletTransactionEvent)
+}
+# Values computed from an event rather than read from one of its columns, by the event type they apply to
+DERIVED_VALUES: Dict[str, Type[GoldEvent]] = {"lookup_time": FarmingInfoEvent}
+OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "==": operator.eq, "!=": operator.ne}
+QUANTILE_PATTERN = re.compile(r"^p(\d{1,2})$")
+# Log-scale buckets starting at 1e-3, each 25% wider than the previous one and unbounded, so e.g. plot sizes in bytes
+# or balances in mojos aren't clamped. Bucket -1 holds all values up to 0.
+QUANTILE_MIN = 1e-3
+QUANTILE_GROWTH = 1.25
+
+
+class Aggregate:
+    """Incrementally maintained value of a rule, updated in amortized O(1) per event."""
+
+    def add(self, ts: datetime, value: float) -> None:
+        raise NotImplementedError
+
+    def value(self, now: datetime) -> Optional[float]:
+        raise NotImplementedError
+
+
+class Last(Aggregate):
+
+    def __init__(self) -> None:
+        self.last = None
+
+    def add(self, ts: datetime, value: float) -> None:
+        self.last = value
+
+    def value(self, now: datetime) -> Optional[float]:
+        return self.last
+
+
+class Age(Aggregate):
+    """Seconds since the last event, e.g. to notice a harvester that stopped reporting."""
+
+    def __init__(self) -> None:
+        self.last_ts = None
+
+    def add(self, ts: datetime, value: float) -> None:
+        self.last_ts = ts
+
+    def value(self, now: datetime) -> Optional[float]:
+        return (now - self.last_ts).total_seconds() if self.last_ts is not None else None
+
+
+class Window(Aggregate):
+    """Sum, count, average or rate per second of the values within a sliding window."""
+    values: Deque[Tuple[datetime, float]]
+
+    def __init__(self, length: timedelta, kind: str) -> None:
+        self.length = length
+        self.kind = kind
+        self.values = deque()
+        self.total = 0
+        self.first_ts = None
+
+    def add(self, ts: datetime, value: float) -> None:
+        self.values.append((ts, value))
+        self.total += value
+        if self.first_ts is None:
+            self.first_ts = ts
+
+    def expire(self, now: datetime) -> None:
+        cutoff = now - self.length
+        while self.values and self.values[0][0] < cutoff:
+            self.total -= self.values.popleft()[1]
+
+    def value(self, now: datetime) -> Optional[float]:
+        self.expire(now)
+        if self.kind == "sum":
+            return self.total
+        if self.kind == "count":
+            return len(self.values)
+        if self.kind == "avg":
+            return self.total / len(self.values) if self.values else None
+        # A rate over a window that isn't covered yet would be too low
+        if self.first_ts is None or now - self.first_ts < self.length:
+            return None
+        return self.total / self.length.total_seconds()
+
+
+class Extreme(Aggregate):
+    """Minimum or maximum within a sliding window, kept in a monotonic queue."""
+    candidates: Deque[Tuple[datetime, float]]
+
+    def __init__(self, length: timedelta, maximum: bool) -> None:
+        self.length = length
+        self.replaces = operator.le if maximum else operator.ge
+        self.candidates = deque()
+
+    def add(self, ts: datetime, value: float) -> None:
+        while self.candidates and self.replaces(self.candidates[-1][1], value):
+            self.candidates.pop()
+        self.candidates.append((ts, value))
+
+    def value(self, now: datetime) -> Optional[float]:
+        cutoff = now - self.length
+        while self.candidates and self.candidates[0][0] < cutoff:
+            self.candidates.popleft()
+        return self.candidates[0][1] if self.candidates else None
+
+
+class Quantile(Aggregate):
+    """Approximate quantile within a sliding window, from a fixed set of log-scale buckets.
+
+    The result is the upper bound of the bucket containing the quantile, i.e. at most 25% above the exact value for
+    values above 1e-3. Only buckets that hold values are kept, so the range of a field doesn't matter.
+    """
+    values: Deque[Tuple[datetime, int]]
+    counts: Dict[int, int]
+
+    def __init__(self, length: timedelta, quantile: float) -> None:
+        self.length = length
+        self.quantile = quantile
+        self.values = deque()
+        self.counts = {}
+
+    @staticmethod
+    def get_bucket(value: float) -> int:
+        if value <= 0:
+            return -1
+        return max(0, math.ceil(math.log(value / QUANTILE_MIN, QUANTILE_GROWTH)))
+
+    @staticmethod
+    def get_upper_bound(bucket: int) -> float:
+        return QUANTILE_MIN * QUANTILE_GROWTH**bucket if bucket >= 0 else 0
+
+    def add(self, ts: datetime, value: float) -> None:
+        bucket = self.get_bucket(value)
+        self.values.append((ts, bucket))
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+
+    def value(self, now: datetime) -> Optional[float]:
+        cutoff = now - self.length
+        while self.values and self.values[0][0] < cutoff:
+            bucket = self.values.popleft()[1]
+            self.counts[bucket] -= 1
+            if not self.counts[bucket]:
+                del self.counts[bucket]
+        if not self.values:
+            return None
+        rank = max(1, math.ceil(self.quantile * len(self.values)))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return self.get_upper_bound(bucket)
+
+
+class Ratio(Aggregate):
+    """Aggregate over the rule's window relative to the same aggregate over a longer baseline window."""
+
+    def __init__(self, current: Aggregate, baseline: Aggregate) -> None:
+        self.current = current
+        self.baseline = baseline
+
+    def add(self, ts: datetime, value: float) -> None:
+        self.current.add(ts, value)
+        self.baseline.add(ts, value)
+
+    def value(self, now: datetime) -> Optional[float]:
+        current = self.current.value(now)
+        baseline = self.baseline.value(now)
+        if current is None or not baseline:
+            return None
+        return current / baseline
+
+
+def get_rule_values(event_type: Type[GoldEvent]) -> List[str]:
+    """Numeric values of an event type that rules can be evaluated on."""
+    values = [
+        column.key for column in event_type.__table__.columns
+        if not column.primary_key and isinstance(column.type, (Integer, Boolean))
+    ]
+    return values + [name for name, derived_type in DERIVED_VALUES.items() if derived_type is event_type]
+
+
+def create_aggregate(name: str, window: Optional[timedelta]) -> Aggregate:
+    if name == "last":
+        return Last()
+    if name == "age":
+        return Age()
+    if window is None:
+        raise ValueError(f"Aggregate '{name}' requires a 'window_seconds'")
+    if name in ("sum", "count", "avg", "rate"):
+        return Window(window, name)
+    if name in ("min", "max"):
+        return Extreme(window, name == "max")
+    match = QUANTILE_PATTERN.match(name)
+    if match is not None:
+        return Quantile(window, int(match.group(1)) / 100)
+    raise ValueError(f"Unknown aggregate '{name}'. Use one of last, age, sum, count, avg, rate, min, max or p0-p99")
+
+
+class RuleState:
+    """Evaluation state of a rule for a single group, e.g. a single harvester."""
+    aggregate: Aggregate
+    pending_since: Optional[datetime]
+    firing: bool
+
+    def __init__(self, aggregate: Aggregate) -> None:
+        self.aggregate = aggregate
+        self.pending_since = None
+        self.firing = False
+
+
+class Rule:
+    """Alert rule compiled from its config entry.
+
+    The rule fires once its condition held for `for_seconds`, and resolves as soon as it doesn't hold anymore.
+    With `group_by`, every value of that event field (e.g. each harvester host) is evaluated separately.
+    """
+    name: str
+    event_type: Type[GoldEvent]
+    states: Dict[Optional[str], RuleState]
+
+    def __init__(self, config: Dict) -> None:
+        try:
+            self.name = config["name"]
+            event_name = config["event"]
+            self.field = config["value"]
+            op = config["op"]
+            self.threshold = config["threshold"]
+        except KeyError as ex:
+            raise ValueError(f"Alert rule {config.get('name', config)} is missing required key {ex}")
+        if event_name not in EVENT_TYPES:
+            raise ValueError(f"Unknown event '{event_name}' in alert rule '{self.name}'. Use one of {list(EVENT_TYPES)}")
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown operator '{op}' in alert rule '{self.name}'. Use one of {list(OPERATORS)}")
+        self.event_type = EVENT_TYPES[event_name]
+        values = get_rule_values(self.event_type)
+        if self.field not in values:
+            raise ValueError(f"Unknown or non-numeric value '{self.field}' of {event_name} in alert rule '{self.name}'. "
+                             f"Use one of {values}")
+        self.op = op
+        self.compare = OPERATORS[op]
+        self.aggregate_name = config.get("aggregate", "last")
+        window_seconds = config.get("window_seconds")
+        baseline_seconds = config.get("baseline_seconds")
+        self.window = timedelta(seconds=window_seconds) if window_seconds is not None else None
+        self.baseline = timedelta(seconds=baseline_seconds) if baseline_seconds is not None else None
+        self.for_duration = timedelta(seconds=config.get("for_seconds", 0))
+        self.group_by = config.get("group_by")
+        if self.group_by is not None and self.group_by not in self.event_type.__table__.columns:
+            raise ValueError(f"Unknown group_by '{self.group_by}' of {event_name} in alert rule '{self.name}'. "
+                             f"Use one of {[column.key for column in self.event_type.__table__.columns]}")
+        self.destination = config.get("destination", "alert")
+        try:
+            self.create_aggregate()
+        except ValueError as ex:
+            raise ValueError(f"Invalid alert rule '{self.name}'. {ex}")
+        self.states = {}
+
+    def create_aggregate(self) -> Aggregate:
+        aggregate = create_aggregate(self.aggregate_name, self.window)
+        if self.baseline is None:
+            return aggregate
+        return Ratio(aggregate, create_aggregate(self.aggregate_name, self.baseline))
+
+    def add(self, event: GoldEvent, value: float) -> Optional[str]:
+        """Adds the value of an event and returns the group it belongs to."""
+        group = getattr(event, self.group_by) if self.group_by is not None else None
+        state = self.states.get(group)
+        if state is None:
+            state = self.states[group] = RuleState(self.create_aggregate())
+        state.aggregate.add(event.ts, value)
+        return group
+
+    def evaluate(self, group: Optional[str], now: datetime) -> Optional[Tuple[bool, Optional[float]]]:
+        """Returns whether the rule started firing (True) or resolved (False) for the group, None if nothing changed."""
+        state = self.states[group]
+        value = state.aggregate.value(now)
+        if value is not None and self.compare(value, self.threshold):
+            if state.pending_since is None:
+                state.pending_since = now
+            if not state.firing and now - state.pending_since >= self.for_duration:
+                state.firing = True
+                return True, value
+        else:
+            state.pending_since = None
+            if state.firing:
+                state.firing = False
+                return False, value
+        return None
+
+    def describe(self, group: Optional[str], value: Optional[float]) -> str:
+        subject = f"{self.aggregate_name}({self.field})"
+        if self.baseline is not None:
+            subject += f" vs. {int(self.baseline.total_seconds())}s baseline"
+        current = f"{value:.4g}" if value is not None else "n/a"
+        prefix = f"{group}: " if group is not None else ""
+        return f"{prefix}{subject} = {current} ({self.op} {self.threshold})"
+
+
+class RuleEngine:
+    """Evaluates all alert rules incrementally over the event stream.
+
+    Rules are indexed by event type, so an event only touches the rules listening to it, and each of those only
+    updates and evaluates the group the event belongs to. `tick` re-evaluates all groups periodically, so `for`
+    durations elapse and `age` conditions fire even while no events arrive.
+    """
+    rules: List[Rule]
+    rules_by_event: Dict[Type[GoldEvent], List[Rule]]
+
+    def __init__(self, rules_config: List[Dict], signage_points: SignagePointIndex) -> None:
+        self.rules = [Rule(config) for config in rules_config]
+        self.rules_by_event = {}
+        for rule in self.rules:
+            self.rules_by_event.setdefault(rule.event_type, []).append(rule)
+        self.derived_values: Dict[str, Callable[[GoldEvent], Optional[float]]] = {
+            "lookup_time": lambda event: self.get_lookup_time(event, signage_points)
+        }
+
+    @staticmethod
+    def get_lookup_time(event: GoldEvent, signage_points: SignagePointIndex) -> Optional[float]:
+        if not isinstance(event, FarmingInfoEvent):
+            return None
+        lookup_time = signage_points.get_lookup_time(event)
+        return lookup_time.total_seconds() if lookup_time is not None else None
+
+    def get_value(self, event: GoldEvent, field: str) -> Optional[float]:
+        derived_value = self.derived_values.get(field)
+        if derived_value is not None:
+            return derived_value(event)
+        value = getattr(event, field, None)
+        return float(value) if value is not None else None
+
+    def process_event(self, event: GoldEvent) -> List[Tuple[Rule, Optional[str], bool, Optional[float]]]:
+        """Returns the rules that started firing or resolved with this event."""
+        changes = []
+        for rule in self.rules_by_event.get(type(event), ()):
+            value = self.get_value(event, rule.field)
+            if value is None:
+                continue
+            group = rule.add(event, value)
+            change = rule.evaluate(group, event.ts)
+            if change is not None:
+                changes.append((rule, group, *change))
+        return changes
+
+    def tick(self, now: datetime) -> List[Tuple[Rule, Optional[str], bool, Optional[float]]]:
+        changes = []
+        for rule in self.rules:
+            for group in rule.states:
+                change = rule.evaluate(group, now)
+                if change is not None:
+                    changes.append((rule, group, *change))
+        return changes
@@ -0,0 +1,41 @@
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Optional
+
+from monitor.database.events import FarmingInfoEvent, GoldEvent, SignagePointEvent
+
+# 64 signage points per sub slot, a few sub slots worth of history
+MAX_SIGNAGE_POINTS = 64 * 4
+
+
+class SignagePointIndex:
+    """Bounded in-memory index of the receive time of recent signage points.
+
+    Farming infos reference the signage point they answer, so lookup times can be computed without querying
+    the DB, even before the signage point has been persisted.
+    """
+    signage_points: Deque[str]
+    timestamps: Dict[str, datetime]
+
+    def __init__(self, max_size: int = MAX_SIGNAGE_POINTS) -> None:
+        self.signage_points = deque()
+        self.timestamps = {}
+        self.max_size = max_size
+
+    def process_event(self, event: GoldEvent) -> None:
+        if isinstance(event, SignagePointEvent):
+            self.add(event)
+
+    def add(self, event: SignagePointEvent) -> None:
+        if event.signage_point in self.timestamps:
+            return
+        if len(self.signage_points) >= self.max_size:
+            del self.timestamps[self.signage_points.popleft()]
+        self.signage_points.append(event.signage_point)
+        self.timestamps[event.signage_point] = event.ts
+
+    def get_lookup_time(self, event: FarmingInfoEvent) -> Optional[timedelta]:
+        signage_point_ts = self.timestamps.get(event.signage_point)
+        if signage_point_ts is None:
+            return None
+        return event.ts - signage_point_ts
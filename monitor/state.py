@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from monitor.database.events import (BlockchainStateEvent, ConnectionsEvent, FarmingInfoEvent, GoldEvent,
+                                     HarvesterPlotsEvent, PAYMENT_TYPES, WalletBalanceEvent, WalletTransactionEvent)
+from monitor.database.harvesters import load_harvesters
+from monitor.database.queries import (get_blockchain_state, get_connections, get_farming_start, get_last_payment,
+                                      get_proofs_found, get_wallet_balance)
+
+# A harvester is stale once it missed this many polls in a row, so a single late poll doesn't drop its plots
+HARVESTER_STALE_POLLS = 3
+
+
+def get_harvester_ttl(method_config: Dict[str, Dict], refresh_interval_seconds: int) -> timedelta:
+    config = method_config.get("get_harvester_plots", {})
+    interval = config.get("interval_seconds", refresh_interval_seconds) + config.get("jitter_seconds", 0)
+    return timedelta(seconds=HARVESTER_STALE_POLLS * interval + config.get("timeout_seconds", 0))
+
+
+class StateSnapshot:
+    """Consistent copy of the latest values, taken at once so that a report doesn't mix values of different times."""
+    blockchain_state: Optional[BlockchainStateEvent]
+    wallet_balance: Optional[WalletBalanceEvent]
+    connections: Optional[ConnectionsEvent]
+    harvesters: List[HarvesterPlotsEvent]
+    proofs_found: Optional[int]
+    farming_start: Optional[datetime]
+
+    def __init__(self, state: "GoldState", now: datetime) -> None:
+        self.blockchain_state = state.blockchain_state
+        self.wallet_balance = state.wallet_balance
+        self.connections = state.connections
+        self.harvesters = [event for event in state.harvesters.values() if event.ts > now - state.harvester_ttl]
+        self.proofs_found = state.proofs_found
+        self.farming_start = state.farming_start
+
+    def sum_harvesters(self, *fields: str) -> Optional[int]:
+        """Sum of the fields over all harvesters that are not stale, None if there is none."""
+        if not self.harvesters:
+            return None
+        return sum(getattr(event, field) for event in self.harvesters for field in fields)
+
+
+class GoldState:
+    """Latest known value of every metric the notifications need.
+
+    The notifier updates it for every event it processes, so notifications never have to query the DB for
+    current values. It is only loaded from the DB once at startup.
+
+    Harvesters that didn't report within `harvester_ttl` are stale. Their plots don't count towards the current
+    plot counts anymore, and they are listed by `get_stale_harvesters` instead.
+
+    Payments are only buffered for `pop_payments` once a consumer called `subscribe_payments`, so they don't pile up
+    when no notification takes them.
+    """
+    blockchain_state: Optional[BlockchainStateEvent]
+    wallet_balance: Optional[WalletBalanceEvent]
+    connections: Optional[ConnectionsEvent]
+    harvesters: Dict[str, HarvesterPlotsEvent]
+    proofs_found: Optional[int]
+    farming_start: Optional[datetime]
+    last_payment: Optional[int]
+    payments: Optional[List[WalletTransactionEvent]]
+    harvester_ttl: timedelta
+
+    def __init__(self, harvester_ttl: timedelta) -> None:
+        self.lock = Lock()
+        self.harvester_ttl = harvester_ttl
+        self.blockchain_state = None
+        self.wallet_balance = None
+        self.connections = None
+        self.harvesters = {}
+        self.proofs_found = None
+        self.farming_start = None
+        self.last_payment = None
+        self.payments = None
+
+    def load(self, db_session: Session) -> None:
+        with self.lock:
+            self.blockchain_state = get_blockchain_state(db_session)
+            self.wallet_balance = get_wallet_balance(db_session)
+            self.connections = get_connections(db_session)
+            self.proofs_found = get_proofs_found(db_session)
+            self.farming_start = get_farming_start(db_session)
+            self.last_payment = get_last_payment(db_session)
+            self.harvesters = load_harvesters(db_session.connection())
+
+    def process_event(self, event: GoldEvent) -> None:
+        with self.lock:
+            if isinstance(event, HarvesterPlotsEvent):
+                self.harvesters[event.host] = event
+            elif isinstance(event, FarmingInfoEvent):
+                self.proofs_found = (self.proofs_found or 0) + event.proofs
+                if self.farming_start is None:
+                    self.farming_start = event.ts
+            elif isinstance(event, ConnectionsEvent):
+                self.connections = event
+            elif isinstance(event, BlockchainStateEvent):
+                self.blockchain_state = event
+            elif isinstance(event, WalletBalanceEvent):
+                self.wallet_balance = event
+            elif isinstance(event, WalletTransactionEvent):
+                if event.type in PAYMENT_TYPES and not event.initial:
+                    self.last_payment = event.amount
+                    if self.payments is not None:
+                        self.payments.append(event)
+
+    def get_snapshot(self) -> StateSnapshot:
+        with self.lock:
+            return StateSnapshot(self, datetime.now())
+
+    def get_sync_status(self) -> Optional[bool]:
+        with self.lock:
+            return self.blockchain_state.synced if self.blockchain_state is not None else None
+
+    def get_last_payment(self) -> Optional[int]:
+        with self.lock:
+            return self.last_payment
+
+    def subscribe_payments(self) -> None:
+        """Starts buffering payments for `pop_payments`."""
+        with self.lock:
+            if self.payments is None:
+                self.payments = []
+
+    def pop_payments(self) -> List[WalletTransactionEvent]:
+        """Returns the payments received since the last call, or since `subscribe_payments` for the first one."""
+        with self.lock:
+            payments = self.payments or []
+            if self.payments is not None:
+                self.payments = []
+            return payments
+
+    def get_stale_harvesters(self) -> List[HarvesterPlotsEvent]:
+        with self.lock:
+            oldest_ts = datetime.now() - self.harvester_ttl
+            return [event for event in self.harvesters.values() if event.ts <= oldest_ts]
+
+    def get_plot_count(self) -> Optional[int]:
+        return self.get_snapshot().sum_harvesters("plot_count", "portable_plot_count")
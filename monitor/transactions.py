@@ -0,0 +1,32 @@
+from typing import Dict, Iterable, Optional, Set
+
+
+class TransactionCursor:
+    """Confirmation height up to which the transactions of a wallet were ingested.
+
+    The wallet lists transactions by ascending confirmation height, so paging backwards from the end can stop at the
+    first page that is entirely below the cursor. Several transactions can be confirmed at the same height, hence the names of the ones already
+    ingested at the cursor height are kept as well.
+    """
+    height: int
+    names: Set[str]
+
+    def __init__(self, height: int = 0, names: Optional[Iterable[str]] = None) -> None:
+        self.height = height
+        self.names = set(names or ())
+
+    def is_behind(self, transaction: Dict) -> bool:
+        return transaction["confirmed_at_height"] < self.height
+
+    def is_new(self, transaction: Dict) -> bool:
+        height = transaction["confirmed_at_height"]
+        return height > self.height or (height == self.height and transaction["name"] not in self.names)
+
+    def advance(self, transactions: Iterable[Dict]) -> None:
+        for transaction in transactions:
+            height = transaction["confirmed_at_height"]
+            if height > self.height:
+                self.height = height
+                self.names = set()
+            if height == self.height:
+                self.names.add(transaction["name"])
@@ -0,0 +1,45 @@
+from chia.consensus.block_rewards import calculate_base_farmer_reward, calculate_pool_reward
+from chia.util.ints import uint32
+
+from monitor.collectors.block_collector import BlockCollector
+
+FARMER_TARGET = "11" * 32
+POOL_TARGET = "22" * 32
+P2_SINGLETON = "33" * 32
+HEIGHT = 1_000_000
+
+
+def block_collector() -> BlockCollector:
+    collector = BlockCollector()
+    collector.farmer_target = FARMER_TARGET
+    collector.pool_target = POOL_TARGET
+    collector.reward_targets = {FARMER_TARGET, POOL_TARGET, P2_SINGLETON}
+    return collector
+
+
+def block_record(farmer_puzzle_hash: str, pool_puzzle_hash: str) -> dict:
+    return {
+        "height": HEIGHT,
+        "timestamp": 1700000000,
+        "farmer_puzzle_hash": "0x" + farmer_puzzle_hash,
+        "pool_puzzle_hash": "0x" + pool_puzzle_hash,
+        "fees": 5
+    }
+
+
+def test_reward_of_block_won_with_own_pool_target():
+    row = block_collector().to_row(block_record(FARMER_TARGET, POOL_TARGET))
+    assert row["won"]
+    assert row["reward"] == calculate_base_farmer_reward(uint32(HEIGHT)) + calculate_pool_reward(uint32(HEIGHT)) + 5
+
+
+def test_reward_of_block_won_with_pool_plot():
+    row = block_collector().to_row(block_record(FARMER_TARGET, P2_SINGLETON))
+    assert row["won"]
+    assert row["reward"] == calculate_base_farmer_reward(uint32(HEIGHT)) + 5
+
+
+def test_reward_of_block_won_by_others():
+    row = block_collector().to_row(block_record("44" * 32, "55" * 32))
+    assert not row["won"]
+    assert row["reward"] == 0
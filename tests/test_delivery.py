@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+from apprise import Apprise, AppriseAsset
+
+from benchmarks.notification_delivery import STUB_PORT, start_stub
+from monitor.delivery import DeliveryQueue
+from monitor.exporter import GoldExporter
+
+
+def deliver(destination: str, send, failures: int = 0, latency: float = 0, **delivery_config) -> dict:
+    """Runs `send` against a delivery queue to the HTTP stub, stops the queue and returns the delivered titles."""
+
+    async def run() -> dict:
+        delivered = {}
+        runner = await start_stub(latency, 0, delivered, failures=failures)
+        apobj = Apprise(asset=AppriseAsset(async_mode=True))
+        apobj.add(f"json://127.0.0.1:{STUB_PORT}")
+        config = {
+            "worker_count": 1,
+            "max_retries": 3,
+            "backoff_seconds": 0.05,
+            "max_backoff_seconds": 1,
+            "rate_limit_seconds": 0,
+            **delivery_config
+        }
+        delivery = DeliveryQueue({destination: apobj}, **config)
+        delivery.start()
+        try:
+            await send(delivery)
+        finally:
+            await delivery.stop()
+            await runner.cleanup()
+        return delivered
+
+    return asyncio.run(run())
+
+
+async def settled(delivery: DeliveryQueue) -> None:
+    """Waits until all messages were delivered or given up, including the ones waiting for a retry."""
+    while True:
+        await delivery.queue.join()
+        if not delivery.retries:
+            return
+        await asyncio.sleep(0.01)
+
+
+def dropped(destination: str) -> float:
+    return GoldExporter.notification_dropped_counter.labels(destination)._value.get()
+
+
+def test_retries_with_backoff():
+
+    async def send(delivery: DeliveryQueue) -> None:
+        start = time.monotonic()
+        delivery.submit("retry", "alert", "body")
+        await settled(delivery)
+        # Two failures back off for 0.05s and 0.1s
+        assert time.monotonic() - start >= 0.15
+
+    assert list(deliver("retry", send, failures=2)) == ["alert"]
+    assert dropped("retry") == 0
+
+
+def test_gives_up_after_max_retries():
+
+    async def send(delivery: DeliveryQueue) -> None:
+        delivery.submit("give-up", "alert", "body")
+        await settled(delivery)
+
+    assert deliver("give-up", send, failures=3, max_retries=2) == {}
+    assert dropped("give-up") == 1
+
+
+def test_rate_limit():
+
+    async def send(delivery: DeliveryQueue) -> None:
+        for i in range(3):
+            delivery.submit("rate-limit", f"alert {i}", "body")
+
+    delivered = deliver("rate-limit", send, worker_count=3, rate_limit_seconds=0.1)
+    times = sorted(delivered.values())
+    assert len(times) == 3
+    assert all(b - a >= 0.09 for a, b in zip(times, times[1:]))
+
+
+def test_coalesces_queued_messages():
+
+    async def send(delivery: DeliveryQueue) -> None:
+        delivery.submit("coalesce", "plots 10", "body", key="plots")
+        delivery.submit("coalesce", "plots 9", "body", key="plots")
+        delivery.submit("coalesce", "proof", "body")
+
+    assert sorted(deliver("coalesce", send)) == ["plots 9", "proof"]
+
+
+def test_delivers_pending_retries_on_stop():
+
+    async def send(delivery: DeliveryQueue) -> None:
+        delivery.submit("drain", "alert", "body")
+        while not delivery.retries:
+            await asyncio.sleep(0.01)
+
+    # The retry would only be due after a minute
+    assert list(deliver("drain", send, failures=1, backoff_seconds=60, max_backoff_seconds=60)) == ["alert"]
+    assert dropped("drain") == 0
@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from monitor.database.events import HarvesterPlotsEvent, SignagePointEvent
+from monitor.dispatcher import BLOCK, COALESCE, DROP_OLDEST, Sink
+
+
+def harvester(host: str, plot_count: int) -> HarvesterPlotsEvent:
+    return HarvesterPlotsEvent(ts=datetime.now(), host=host, plot_count=plot_count)
+
+
+def signage_point(index: int) -> SignagePointEvent:
+    return SignagePointEvent(ts=datetime.now(), challenge_hash="0x3f", signage_point_index=index, signage_point="0x9a")
+
+
+def queued(sink: Sink) -> list:
+    return [(type(event).__name__, getattr(event, "host", None)) for event in sink.pending.values()]
+
+
+async def put_all(sink: Sink, events) -> None:
+    for event in events:
+        await sink.put(event)
+
+
+def test_coalesce_only_when_full():
+    sink = Sink("test", lambda event: None, 3, COALESCE)
+    asyncio.run(put_all(sink, [harvester("a", 1), harvester("a", 2)]))
+    assert len(sink.pending) == 2
+
+    asyncio.run(put_all(sink, [signage_point(0), harvester("a", 3), harvester("b", 1)]))
+    # The full queue replaced the latest event of host a, then dropped the oldest for host b
+    assert queued(sink) == [("HarvesterPlotsEvent", "a"), ("SignagePointEvent", None), ("HarvesterPlotsEvent", "b")]
+    assert [event.plot_count for event in sink.pending.values() if isinstance(event, HarvesterPlotsEvent)] == [3, 1]
+
+
+def test_coalesce_keeps_order_of_replaced_event():
+    sink = Sink("test", lambda event: None, 2, COALESCE)
+    asyncio.run(put_all(sink, [harvester("a", 1), signage_point(0), harvester("a", 2)]))
+    assert queued(sink) == [("HarvesterPlotsEvent", "a"), ("SignagePointEvent", None)]
+    assert next(iter(sink.pending.values())).plot_count == 2
+
+
+def test_drop_oldest():
+    sink = Sink("test", lambda event: None, 2, DROP_OLDEST)
+    asyncio.run(put_all(sink, [signage_point(i) for i in range(4)]))
+    assert [event.signage_point_index for event in sink.pending.values()] == [2, 3]
+
+
+def test_block_waits_for_consumer():
+
+    async def run() -> list:
+        handled = []
+        sink = Sink("test", lambda event: handled.append(event.signage_point_index), 1, BLOCK)
+        task = asyncio.create_task(sink.task())
+        await put_all(sink, [signage_point(i) for i in range(5)])
+        await sink.idle.wait()
+        task.cancel()
+        return handled
+
+    assert asyncio.run(run()) == [0, 1, 2, 3, 4]
+
+
+def test_unknown_overflow_policy():
+    with pytest.raises(ValueError, match="overflow"):
+        Sink("test", lambda event: None, 1, "drop_newest")
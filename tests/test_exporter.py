@@ -0,0 +1,45 @@
+import asyncio
+import gzip
+
+import pytest
+from aiohttp.test_utils import make_mocked_request
+
+from monitor.exporter import GoldExporter, accepts_gzip
+from monitor.signage_points import SignagePointIndex
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("", False),
+    ("gzip", True),
+    ("gzip, deflate, br", True),
+    ("GZIP;Q=0.5", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0, identity", False),
+    ("gzip;q=0.5, identity;q=0.8", False),
+    ("*", True),
+    ("*;q=0, identity", False),
+    ("deflate", False),
+])
+def test_accepts_gzip(accept_encoding, expected):
+    assert accepts_gzip(accept_encoding) == expected
+
+
+def scrape(exporter: GoldExporter, **headers):
+    return asyncio.run(exporter.handle_metrics(make_mocked_request("GET", "/metrics", headers=headers)))
+
+
+def test_metrics_gzip_and_etag():
+    exporter = GoldExporter(0, SignagePointIndex(), render_interval_seconds=60)
+    response = scrape(exporter, **{"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    body = gzip.decompress(response.body)
+
+    response = scrape(exporter, **{"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in response.headers
+    # Served from the cache within the render interval
+    assert response.body == body
+
+    response = scrape(exporter, **{"If-None-Match": response.headers["ETag"]})
+    assert response.status == 304
+    assert "Accept-Encoding" in response.headers["Vary"]
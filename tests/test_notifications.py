@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+from monitor.database.events import FarmingInfoEvent, PAYMENT_TYPES, WalletTransactionEvent
+from monitor.notifications import FoundProofNotification, PaymentNotification
+from monitor.state import GoldState
+
+
+class RecordingOutbox:
+
+    def __init__(self) -> None:
+        self.messages = []
+
+    def notify(self, title: str, body: str, key=None) -> bool:
+        self.messages.append((title, body, key))
+        return True
+
+
+def farming_info(proofs: int) -> FarmingInfoEvent:
+    return FarmingInfoEvent(ts=datetime.now(),
+                            challenge_hash="0x3f",
+                            signage_point="0x9a",
+                            passed_filter=2,
+                            proofs=proofs,
+                            total_plots=100)
+
+
+def test_found_proof_alerts_for_every_event_with_proofs():
+    outbox = RecordingOutbox()
+    notification = FoundProofNotification(outbox, None)
+    for proofs in (1, 1, 0, 2):
+        notification.update(farming_info(proofs))
+        notification.run()
+    assert len(outbox.messages) == 3
+    assert all(key is None for _, _, key in outbox.messages)
+
+
+def payment(amount: int) -> WalletTransactionEvent:
+    return WalletTransactionEvent(ts=datetime.now(),
+                                  name=f"0x{amount:064x}",
+                                  wallet_id=1,
+                                  height=1000,
+                                  created_ts=datetime.now(),
+                                  type=PAYMENT_TYPES[0],
+                                  amount=amount,
+                                  fee=0,
+                                  to_puzzle_hash="0x" + "00" * 32,
+                                  initial=False)
+
+
+def test_payments_are_only_buffered_for_a_subscriber():
+    state = GoldState(timedelta(minutes=1))
+    state.process_event(payment(1))
+    assert state.payments is None
+    assert state.get_last_payment() == 1
+
+    outbox = RecordingOutbox()
+    notification = PaymentNotification(outbox, state)
+    state.process_event(payment(2))
+    state.process_event(payment(3))
+    notification.run()
+    assert len(outbox.messages) == 1
+    assert state.pop_payments() == []
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.sql.expression import insert
+
+from monitor.database import meta
+from monitor.database.partials import PoolPartial, load_pool_partials
+from monitor.partials import PartialWindow
+
+P2 = "0x" + "ab" * 32
+
+
+def reported(*timestamps: datetime) -> list:
+    # The farmer reports partials as (unix timestamp, points), oldest first
+    return [(ts.timestamp(), 1) for ts in timestamps]
+
+
+def test_window_adds_partials_once_and_expires_them():
+    now = datetime.now().replace(microsecond=0)
+    window = PartialWindow()
+    assert len(window.update(reported(now - timedelta(hours=2), now - timedelta(hours=1)))) == 2
+    assert window.update(reported(now - timedelta(hours=2), now - timedelta(hours=1))) == []
+    assert len(window.update(reported(now - timedelta(hours=1), now))) == 1
+    assert window.total(now) == 3
+    assert window.total(now + timedelta(hours=23, minutes=30)) == 1
+
+
+def test_window_cursor_is_restored_from_db():
+    now = datetime.now().replace(microsecond=0)
+    old, recent = now - timedelta(hours=30), now - timedelta(hours=1)
+    engine = create_engine("sqlite://")
+    meta.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(PoolPartial), [{
+            "ts": ts,
+            "p2_singleton_puzzle_hash": P2,
+            "points": 1,
+            "acknowledged": acknowledged
+        } for ts, acknowledged in [(old, False), (recent, False), (old, True)]])
+        partials = load_pool_partials(connection)[P2]
+
+    assert partials.found.cursor == recent and partials.found.total(now) == 1
+    # The cursor of a window with only expired partials is kept, so they aren't added again
+    assert partials.acknowledged.cursor == old and partials.acknowledged.total(now) == 0
+    new_partials = partials.update(reported(recent, now), reported(old, now))
+    assert [(partial["ts"], partial["acknowledged"]) for partial in new_partials] == [(now, False), (now, True)]
+    assert partials.found.total(now) == 2
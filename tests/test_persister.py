@@ -0,0 +1,85 @@
+import sqlite3
+from datetime import datetime
+from time import monotonic, sleep
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from monitor import persister as persister_module
+from monitor.database.events import SignagePointEvent
+from monitor.persister import GoldPersister
+
+
+def signage_point(index: int) -> SignagePointEvent:
+    return SignagePointEvent(ts=datetime.now(), challenge_hash="0x3f", signage_point_index=index, signage_point="0x9a")
+
+
+def operational_error(message: str) -> OperationalError:
+    return OperationalError("INSERT", {}, sqlite3.OperationalError(message))
+
+
+class FlakyPersister(GoldPersister):
+    """Records the flushed batches instead of writing them, raising the given errors first."""
+
+    def __init__(self, errors, batch_size: int = 2, flush_interval_ms: int = 60_000) -> None:
+        super().__init__(batch_size, flush_interval_ms)
+        self.errors = list(errors)
+        self.batches = []
+
+    def flush(self, batch) -> None:
+        if self.errors:
+            raise self.errors.pop(0)
+        self.batches.append([event.signage_point_index for event in batch])
+
+
+def persist(persister: GoldPersister, count: int, written: int = 0) -> None:
+    persister.start()
+    for i in range(count):
+        persister.process_event(signage_point(i))
+    # Stopping gives up on a locked DB, so the events that should be written are awaited first
+    deadline = monotonic() + 5
+    while sum(map(len, persister.batches)) < written and monotonic() < deadline:
+        sleep(0.01)
+    persister.stop()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(persister_module, "LOCKED_BACKOFF_SECONDS", 0)
+
+
+def test_writes_batches_of_batch_size():
+    persister = FlakyPersister([])
+    persist(persister, 5)
+    assert persister.batches == [[0, 1], [2, 3], [4]]
+    assert persister.flushed_ts is not None
+
+
+def test_retries_batch_while_locked():
+    persister = FlakyPersister([operational_error("database is locked")] * 3)
+    persist(persister, 2, written=2)
+    assert persister.batches == [[0, 1]]
+    assert not persister.failed
+
+
+def test_drops_rejected_batch_and_keeps_running():
+    persister = FlakyPersister([ValueError("constraint")])
+    persist(persister, 4)
+    assert persister.batches == [[2, 3]]
+    assert not persister.failed
+
+
+def test_gives_up_locked_batch_on_stop():
+    persister = FlakyPersister([operational_error("database is locked")] * 3)
+    persister.start()
+    persister.process_event(signage_point(0))
+    persister.stop()
+    assert persister.batches == []
+    assert not persister.failed
+
+
+def test_fails_on_unusable_db():
+    persister = FlakyPersister([operational_error("no such table: signage_point_events")])
+    persist(persister, 4)
+    assert persister.batches == []
+    assert persister.failed
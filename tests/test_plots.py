@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine
+
+from monitor.database import meta
+from monitor.database.inventory import apply_plot_changes, load_plot_indexes
+from monitor.database.events import HarvesterPlotsEvent
+from monitor.plots import DuplicatePlotIndex, PlotIndex
+
+K32_SIZE = 108_837_910_000
+
+
+def plot(number: int, pool_contract_puzzle_hash: str = None) -> dict:
+    return {
+        "plot_id": f"0x{number:064x}",
+        "filename": f"/mnt/disk0/plot-{number}.plot",
+        "file_size": K32_SIZE,
+        "size": 32,
+        "pool_contract_puzzle_hash": pool_contract_puzzle_hash
+    }
+
+
+def test_plot_index_update_returns_changes():
+    index = PlotIndex()
+    portable = plot(2, "0x" + "ab" * 32)
+    added, removed = index.update([plot(1), portable])
+    assert len(added) == 2 and removed == []
+    assert (index.og_plot_count, index.portable_plot_count, index.total_size) == (1, 1, 2 * K32_SIZE)
+
+    added, removed = index.update([plot(1), plot(3)])
+    assert [p["plot_id"] for p in added] == [plot(3)["plot_id"]]
+    assert removed == [portable]
+    assert (index.og_plot_count, index.portable_plot_count) == (2, 0)
+    assert index.matches(2, 2 * K32_SIZE)
+
+
+def test_restored_plot_index_is_listed_once():
+    engine = create_engine("sqlite://")
+    meta.create_all(engine)
+    with engine.begin() as connection:
+        apply_plot_changes(
+            connection,
+            [HarvesterPlotsEvent(ts=datetime.now(), host="harvester", added_plots=[plot(1), plot(2)], removed_plots=[])])
+        index = load_plot_indexes(connection)["harvester"]
+
+    # Plots replaced by the same number of plots of the same size still match count and size
+    assert len(index) == 2 and not index.matches(2, 2 * K32_SIZE)
+    added, removed = index.update([plot(1), plot(3)])
+    assert [p["plot_id"] for p in added] == [plot(3)["plot_id"]]
+    assert [p["plot_id"] for p in removed] == [plot(2)["plot_id"]]
+    assert index.matches(2, 2 * K32_SIZE)
+
+
+def test_duplicate_plot_index():
+    duplicates = DuplicatePlotIndex()
+    assert duplicates.add("a", [plot(1), plot(2)]) == []
+    found = duplicates.add("b", [plot(2), plot(3)])
+    assert [(p["plot_id"], host, filename)
+            for p, host, filename in found] == [(plot(2)["plot_id"], "a", plot(2)["filename"])]
+    assert duplicates.pair_counts == {("a", "b"): 1}
+
+    duplicates.remove("a", [plot(2)])
+    assert duplicates.pair_counts == {}
+    assert duplicates.add("a", [plot(2)])
+    duplicates.evict("b", [plot(2), plot(3)])
+    assert duplicates.pair_counts == {} and duplicates.hosts == {"a"}
+    assert set(duplicates.filenames) == {plot(1)["plot_id"], plot(2)["plot_id"]}
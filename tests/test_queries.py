@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import insert
+
+from monitor.database import meta
+from monitor.database.aggregates import FarmingRollup1m
+from monitor.database.events import FarmingInfoEvent, SignagePointEvent
+from monitor.database.inventory import PlotRecord
+from monitor.database.queries import get_summary_start, get_summary_window
+
+K32_SIZE = 108_837_910_000
+
+
+def bucket(ts: datetime, signage_points: int, passed_filter: int, proofs: int) -> dict:
+    return {
+        "bucket": ts,
+        "signage_points": signage_points,
+        "challenges": 1,
+        "passed_filter": passed_filter,
+        "proofs": proofs,
+        "lookup_time_count": 0
+    }
+
+
+def farming_info(ts: datetime, passed_filter: int, proofs: int) -> dict:
+    return {
+        "ts": ts,
+        "challenge_hash": "0x3f",
+        "signage_point": "0x9a",
+        "passed_filter": passed_filter,
+        "proofs": proofs,
+        "total_plots": 100
+    }
+
+
+def plot(number: int, added_ts: datetime, removed_ts: datetime = None) -> dict:
+    return {
+        "plot_id": f"0x{number:064x}",
+        "host": "harvester",
+        "filename": f"/mnt/disk0/plot-{number}.plot",
+        "file_size": K32_SIZE,
+        "size": 32,
+        "pool_contract_puzzle_hash": None,
+        "added_ts": added_ts,
+        "removed_ts": removed_ts
+    }
+
+
+def test_summary_window_combines_rollups_raw_events_and_plot_inventory():
+    now = datetime.now()
+    start = get_summary_start(now - timedelta(hours=1))
+    rollup_end = start + timedelta(minutes=2)
+    engine = create_engine("sqlite://")
+    meta.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(FarmingRollup1m), [
+            bucket(start - timedelta(minutes=1), 100, 100, 100),
+            bucket(start, 10, 5, 1),
+            bucket(start + timedelta(minutes=1), 10, 5, 0),
+        ])
+        # Raw events before the end of the rollups are already counted by them
+        connection.execute(insert(FarmingInfoEvent), [
+            farming_info(rollup_end - timedelta(seconds=1), 100, 100),
+            farming_info(rollup_end, 2, 1),
+            farming_info(now, 3, 0),
+        ])
+        connection.execute(insert(SignagePointEvent), [{
+            "ts": ts,
+            "challenge_hash": "0x3f",
+            "signage_point_index": 0,
+            "signage_point": "0x9a"
+        } for ts in (rollup_end - timedelta(seconds=1), rollup_end)])
+        # The first snapshot of the harvester is its baseline, not plots added within the window
+        connection.execute(insert(PlotRecord), [
+            plot(1, now - timedelta(hours=2)),
+            plot(2, now - timedelta(hours=2), now - timedelta(minutes=10)),
+            plot(3, now - timedelta(minutes=30)),
+        ])
+
+    with Session(engine) as db_session:
+        window = get_summary_window(db_session, start, now - timedelta(hours=24))
+    assert (window.signage_points, window.passed_filter, window.proofs) == (21, 15, 2)
+    assert (window.plots_added, window.plot_size_added) == (1, K32_SIZE)
+    assert (window.plots_removed, window.plot_size_removed) == (1, K32_SIZE)
+    assert (window.farmed, window.received) == (0, 0)
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.sql.expression import insert, select
+from sqlalchemy.sql.functions import func
+
+from monitor.database import meta
+from monitor.database import rollups
+from monitor.database.aggregates import FarmingRollup1h, FarmingRollup1m
+from monitor.database.events import SignagePointEvent
+from monitor.database.rollups import ROLLUP_DELAY, RollupEngine, floor_ts, prune_rollup_1m
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'history.sqlite'}")
+    meta.create_all(engine)
+    monkeypatch.setattr(rollups, "engine", engine)
+    return engine
+
+
+def bucket(ts: datetime) -> dict:
+    return {"bucket": ts, "signage_points": 1, "challenges": 1, "passed_filter": 0, "proofs": 0, "lookup_time_count": 0}
+
+
+def test_prune_rollup_1m_in_batches(engine, monkeypatch):
+    monkeypatch.setattr(rollups, "PRUNE_BATCH_SIZE", 2)
+    start = floor_ts(datetime.now() - timedelta(days=3), timedelta(hours=1))
+    with engine.begin() as connection:
+        connection.execute(insert(FarmingRollup1m), [bucket(start + timedelta(minutes=i)) for i in range(5)])
+        connection.execute(insert(FarmingRollup1m), bucket(start + timedelta(days=2)))
+        connection.execute(insert(FarmingRollup1h), bucket(start))
+
+    assert prune_rollup_1m(timedelta(days=1)) == 5
+    with engine.connect() as connection:
+        assert connection.execute(select(func.count()).select_from(FarmingRollup1m)).scalar() == 1
+
+
+def test_prune_rollup_1m_keeps_buckets_not_rolled_up_hourly(engine):
+    start = floor_ts(datetime.now() - timedelta(days=3), timedelta(hours=1))
+    with engine.begin() as connection:
+        connection.execute(insert(FarmingRollup1m), [bucket(start + timedelta(minutes=30 * i)) for i in range(4)])
+        connection.execute(insert(FarmingRollup1h), bucket(start))
+
+    # Only the first hour is covered by the 1-hour rollup
+    assert prune_rollup_1m(timedelta(days=1)) == 2
+
+
+def test_rollup_stops_at_flushed_ts(engine):
+    flushed_ts = floor_ts(datetime.now(), timedelta(minutes=1)) + timedelta(seconds=30)
+    until = flushed_ts - ROLLUP_DELAY
+    timestamps = [until - timedelta(minutes=2), until - timedelta(seconds=1), until, flushed_ts]
+    with engine.begin() as connection:
+        connection.execute(insert(SignagePointEvent), [{
+            "ts": ts,
+            "challenge_hash": "0x3f",
+            "signage_point_index": i,
+            "signage_point": f"0x{i:02x}"
+        } for i, ts in enumerate(timestamps)])
+    flushed = [flushed_ts]
+    rollup_engine = RollupEngine(lambda: flushed[0], 30, 7, 60)
+
+    rollup_engine.run()
+    with engine.connect() as connection:
+        buckets = connection.execute(select(FarmingRollup1m.bucket, FarmingRollup1m.signage_points)).all()
+    # Only complete minutes before the flushed time, less the delay, are rolled up
+    assert buckets == [(floor_ts(timestamps[0], timedelta(minutes=1)), 1)]
+
+    # Rolled up buckets are never aggregated again, so events written later continue after them
+    flushed[0] = flushed_ts + timedelta(minutes=2)
+    rollup_engine.run()
+    with engine.connect() as connection:
+        buckets = connection.execute(select(FarmingRollup1m.bucket, FarmingRollup1m.signage_points)).all()
+    assert [count for _, count in buckets] == [1, 2, 1]
+
+
+def test_no_rollup_before_first_flush(engine):
+    with engine.begin() as connection:
+        connection.execute(
+            insert(SignagePointEvent), {
+                "ts": datetime.now() - timedelta(hours=1),
+                "challenge_hash": "0x3f",
+                "signage_point_index": 0,
+                "signage_point": "0x9a"
+            })
+    RollupEngine(lambda: None, 30, 7, 60).run()
+    with engine.connect() as connection:
+        assert connection.execute(select(func.count()).select_from(FarmingRollup1m)).scalar() == 0
@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from monitor.rules import Quantile, Rule
+
+RULE = {"name": "Plot size", "event": "HarvesterPlotsEvent", "value": "plot_size", "op": "<", "threshold": 1}
+
+
+def test_quantile_of_values_beyond_seconds():
+    # Plot sizes in bytes and balances in mojos are far larger than any lookup time
+    now = datetime.now()
+    quantile = Quantile(timedelta(minutes=1), 0.95)
+    for value in (108_000_000_000_000, 2_000_000_000_000_000, 5 * 10**21):
+        quantile.add(now, value)
+    assert 5 * 10**21 <= quantile.value(now) <= 1.25 * 5 * 10**21
+
+
+def test_quantile_of_zero_and_small_values():
+    now = datetime.now()
+    quantile = Quantile(timedelta(minutes=1), 0.5)
+    for value in (0, 0, 0.5):
+        quantile.add(now, value)
+    assert quantile.value(now) == 0
+    quantile.add(now, 0.5)
+    quantile.add(now, 0.5)
+    assert 0.5 <= quantile.value(now) <= 0.625
+
+
+def test_quantile_expires_values():
+    now = datetime.now()
+    quantile = Quantile(timedelta(minutes=1), 0.99)
+    quantile.add(now - timedelta(minutes=2), 1000)
+    quantile.add(now, 1)
+    assert 1 <= quantile.value(now) <= 1.25
+    assert quantile.counts == {quantile.get_bucket(1): 1}
+
+
+def test_rule_rejects_unknown_group_by():
+    with pytest.raises(ValueError, match="group_by"):
+        Rule({**RULE, "group_by": "hostname"})
+    assert Rule({**RULE, "group_by": "host"}).group_by == "host"
@@ -0,0 +1,34 @@
+from monitor import codec
+from monitor.collectors.streaming import sniff_command
+from monitor.collectors.ws_collector import WALLET_LIST_PATTERN
+
+# Messages as forwarded by the daemon, which serializes them with sorted keys
+FARMING_INFO = ('{"ack": false, "command": "new_farming_info", "data": {"farming_info": {"challenge_hash": "0x3f", '
+                '"passed_filter": 2, "proofs": 0, "signage_point": "0x9a", "timestamp": 1639000000, '
+                '"total_plots": 100}, "success": true}, "destination": "wallet_ui", "origin": "chia_farmer", '
+                '"request_id": "5a4b"}')
+WALLET_CREATED = ('{"ack": false, "command": "state_changed", "data": {"state": "wallet_created", "success": true, '
+                  '"wallet_id": 2}, "destination": "wallet_ui", "origin": "chia_wallet", "request_id": "77c1"}')
+SYNC_CHANGED = ('{"ack": false, "command": "state_changed", "data": {"state": "sync_changed", "success": true}, '
+                '"destination": "wallet_ui", "origin": "chia_wallet", "request_id": "77c2"}')
+
+
+def test_sniff_command_of_daemon_message():
+    assert sniff_command(FARMING_INFO) == "new_farming_info"
+    assert sniff_command(WALLET_CREATED) == "state_changed"
+
+
+def test_sniff_command_outside_prefix():
+    assert sniff_command('{"ack": false, "data": {"padding": "' + "x" * 300 + '"}, "command": "ping"}') is None
+
+
+def test_wallet_list_pattern():
+    assert WALLET_LIST_PATTERN.search(WALLET_CREATED) is not None
+    assert WALLET_LIST_PATTERN.search(SYNC_CHANGED) is None
+
+
+def test_codec_keeps_64_bit_integers():
+    # Mojo amounts are uint64, e.g. the amounts of wallet transactions
+    amount = 2**64 - 1
+    assert codec.loads(f'{{"amount": {amount}, "fee_amount": 1}}') == {"amount": amount, "fee_amount": 1}
+    assert codec.loads(f'[{amount}]'.encode()) == [amount]
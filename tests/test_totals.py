@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.sql.expression import insert, select
+
+from monitor.database import meta
+from monitor.database.aggregates import FarmingRollup1h, FarmingTotals
+from monitor.database.events import FarmingInfoEvent, SignagePointEvent
+from monitor.database.rollups import floor_ts
+from monitor.database.totals import TOTALS_ID, increment_totals, rebuild_totals
+
+
+def farming_info(ts: datetime, passed_filter: int, proofs: int) -> FarmingInfoEvent:
+    return FarmingInfoEvent(ts=ts,
+                            challenge_hash="0x3f",
+                            signage_point="0x9a",
+                            passed_filter=passed_filter,
+                            proofs=proofs,
+                            total_plots=100)
+
+
+def signage_point(ts: datetime) -> SignagePointEvent:
+    return SignagePointEvent(ts=ts, challenge_hash="0x3f", signage_point_index=0, signage_point="0x9a")
+
+
+def get_totals(connection) -> tuple:
+    return connection.execute(
+        select(FarmingTotals.challenges, FarmingTotals.signage_points, FarmingTotals.passed_filter,
+               FarmingTotals.proofs)).one()
+
+
+def test_increment_totals():
+    engine = create_engine("sqlite://")
+    meta.create_all(engine)
+    now = datetime.now()
+    with engine.begin() as connection:
+        connection.execute(
+            insert(FarmingTotals).values(id=TOTALS_ID, challenges=1, signage_points=2, passed_filter=3, proofs=4))
+        increment_totals(connection, [farming_info(now, 2, 1), signage_point(now), farming_info(now, 3, 0)])
+        increment_totals(connection, [])
+        assert tuple(get_totals(connection)) == (3, 3, 8, 5)
+
+
+def test_rebuild_totals_from_rollups_and_raw_events():
+    engine = create_engine("sqlite://")
+    meta.create_all(engine)
+    bucket = floor_ts(datetime.now() - timedelta(hours=3), timedelta(hours=1))
+    rollup_end = bucket + timedelta(hours=1)
+    with engine.begin() as connection:
+        connection.execute(
+            insert(FarmingRollup1h).values(bucket=bucket,
+                                           signage_points=64,
+                                           challenges=60,
+                                           passed_filter=100,
+                                           proofs=1,
+                                           lookup_time_count=0))
+        # Raw events of the rolled up hour may not be pruned yet and must not be counted twice
+        for event in [
+                farming_info(bucket + timedelta(minutes=5), 7, 1),
+                signage_point(bucket + timedelta(minutes=5)),
+                farming_info(rollup_end, 2, 0),
+                signage_point(rollup_end + timedelta(seconds=9)),
+        ]:
+            table = type(event).__table__
+            connection.execute(insert(table), {column.key: getattr(event, column.key) for column in table.columns})
+        rebuild_totals(connection)
+        assert tuple(get_totals(connection)) == (61, 65, 102, 1)
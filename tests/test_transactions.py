@@ -0,0 +1,59 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.sql.expression import insert
+
+from monitor.database import meta
+from monitor.database.events import INCOMING_TX, WalletTransactionEvent
+from monitor.database.transactions import load_transaction_cursors
+from monitor.transactions import TransactionCursor
+
+
+def transaction(name: str, height: int) -> dict:
+    return {"name": name, "confirmed_at_height": height}
+
+
+def test_cursor_keeps_names_at_equal_height():
+    cursor = TransactionCursor()
+    cursor.advance([transaction("a", 10), transaction("b", 10)])
+    assert cursor.height == 10 and cursor.names == {"a", "b"}
+
+    # A third transaction confirmed at the cursor height is still new, the ingested ones aren't
+    assert not cursor.is_new(transaction("a", 10))
+    assert cursor.is_new(transaction("c", 10))
+    assert not cursor.is_behind(transaction("c", 10))
+    assert cursor.is_behind(transaction("d", 9))
+
+    cursor.advance([transaction("c", 10)])
+    assert cursor.names == {"a", "b", "c"}
+    cursor.advance([transaction("e", 11), transaction("f", 10)])
+    assert cursor.height == 11 and cursor.names == {"e"}
+
+
+def test_cursor_advances_in_any_order():
+    cursor = TransactionCursor()
+    cursor.advance([transaction("b", 12), transaction("a", 11), transaction("c", 12)])
+    assert cursor.height == 12 and cursor.names == {"b", "c"}
+
+
+def test_cursors_are_restored_with_all_names_at_the_highest_height():
+    engine = create_engine("sqlite://")
+    meta.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(WalletTransactionEvent), [{
+            "ts": datetime.now(),
+            "name": f"0x{i:064x}",
+            "wallet_id": wallet_id,
+            "height": height,
+            "created_ts": datetime.now(),
+            "type": INCOMING_TX,
+            "amount": 1,
+            "fee": 0,
+            "to_puzzle_hash": "0x" + "00" * 32,
+            "initial": False
+        } for i, (wallet_id, height) in enumerate([(1, 10), (1, 12), (1, 12), (2, 5)])])
+        cursors = load_transaction_cursors(connection)
+
+    assert cursors[1].height == 12 and cursors[1].names == {f"0x{1:064x}", f"0x{2:064x}"}
+    assert not cursors[1].is_new(transaction(f"0x{2:064x}", 12))
+    assert cursors[2].height == 5
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import select
+
+from monitor.database import meta
+from monitor.database.events import BlockchainStateEvent, FarmingInfoEvent, PoolStateEvent
+
+
+def round_trip(event):
+    engine = create_engine("sqlite://")
+    meta.create_all(engine)
+    with Session(engine) as session:
+        session.add(event)
+        session.commit()
+        session.expunge_all()
+        return session.execute(select(type(event))).scalar_one()
+
+
+def test_timestamp_and_hashes_round_trip():
+    ts = datetime(2021, 12, 8, 23, 59, 59, 123456)
+    challenge_hash = "0x" + "3f" * 32
+    event = round_trip(
+        FarmingInfoEvent(ts=ts,
+                         challenge_hash=challenge_hash,
+                         signage_point="0x" + "9a" * 32,
+                         passed_filter=2,
+                         proofs=0,
+                         total_plots=100))
+    # Timestamps are stored in milliseconds
+    assert event.ts == ts.replace(microsecond=123000)
+    assert event.challenge_hash == challenge_hash
+    assert event.signage_point == "0x" + "9a" * 32
+
+
+def test_empty_hash_round_trips():
+    event = round_trip(PoolStateEvent(ts=datetime.now(), pool_url="https://pool.example"))
+    assert event.p2_singleton_puzzle_hash == ""
+
+
+def test_netspace_beyond_64_bits_round_trips():
+    space = 31415926535897932384626
+    event = round_trip(BlockchainStateEvent(ts=datetime.now(), space=str(space), peak_height=1, synced=True))
+    assert int(event.space) == space